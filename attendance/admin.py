@@ -27,3 +27,10 @@ class AttendanceAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_metrics()
+
+    @admin.display(description='Working hours', ordering='working_hours')
+    def working_hours(self, obj):
+        return obj.working_hours
@@ -0,0 +1,14 @@
+import django_filters
+from .models import Attendance
+
+
+class AttendanceFilter(django_filters.FilterSet):
+    """Filters over Attendance fields and the AttendanceQuerySet.with_metrics() annotations"""
+    is_late = django_filters.BooleanFilter()
+    min_working_hours = django_filters.NumberFilter(field_name='working_hours', lookup_expr='gte')
+    max_working_hours = django_filters.NumberFilter(field_name='working_hours', lookup_expr='lte')
+    department = django_filters.NumberFilter(field_name='employee__department')
+
+    class Meta:
+        model = Attendance
+        fields = ['employee', 'status', 'date']
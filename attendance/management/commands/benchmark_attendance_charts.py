@@ -0,0 +1,84 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from attendance.models import Attendance
+from attendance.rollups import rollups_cover
+from attendance.utils import daily_status_counts, month_bounds
+from datetime import timedelta
+from functools import partial
+import time
+
+
+def legacy_daily_status_counts(queryset, start_date, end_date, skip_weekends=False):
+    """The original per-day implementation: four COUNT queries for every day"""
+    daily_stats = []
+    current_date = start_date
+    while current_date <= end_date:
+        if not skip_weekends or current_date.weekday() < 5:
+            day_attendances = queryset.filter(date=current_date)
+            daily_stats.append({
+                'date': current_date,
+                'present': day_attendances.filter(status='present').count(),
+                'absent': day_attendances.filter(status='absent').count(),
+                'late': day_attendances.filter(status='late').count(),
+                'total': day_attendances.count()
+            })
+        current_date += timedelta(days=1)
+    return daily_stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare query count and latency of the per-day and single-query '
+        'monthly attendance aggregation. Seed first, e.g. '
+        '`python manage.py seed_data --employees 5000`.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=5,
+            help='Number of timed runs per implementation (default: 5)'
+        )
+        parser.add_argument('--year', type=int, help='Year to aggregate (default: current)')
+        parser.add_argument('--month', type=int, help='Month to aggregate (default: current)')
+
+    def handle(self, *args, **options):
+        today = timezone.now().date()
+        start_date, end_date = month_bounds(
+            options['year'] or today.year, options['month'] or today.month
+        )
+        queryset = Attendance.objects.all()
+        self.stdout.write(
+            f'{queryset.count()} attendance rows, '
+            f'aggregating {start_date} to {end_date}'
+        )
+
+        implementations = [
+            ('per-day loop', legacy_daily_status_counts),
+            ('GROUP BY date', daily_status_counts),
+        ]
+        if rollups_cover(start_date):
+            implementations.append(('daily rollup', partial(daily_status_counts, use_rollups=True)))
+
+        results = {}
+        for label, func in implementations:
+            timings = []
+            for _ in range(options['iterations']):
+                with CaptureQueriesContext(connection) as context:
+                    started = time.perf_counter()
+                    results[label] = func(queryset, start_date, end_date, skip_weekends=True)
+                    timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            self.stdout.write(
+                f'{label:>14}: {len(context.captured_queries):4d} queries, '
+                f'median {timings[len(timings) // 2]:8.2f} ms, '
+                f'min {timings[0]:8.2f} ms'
+            )
+
+        if any(result != results['per-day loop'] for result in results.values()):
+            self.stderr.write(self.style.ERROR('Implementations returned different results!'))
+        else:
+            self.stdout.write(self.style.SUCCESS('All implementations returned identical results'))
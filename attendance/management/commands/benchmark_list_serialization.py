@@ -0,0 +1,95 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+from attendance.views import AttendanceViewSet
+from employees.views import EmployeeViewSet
+from manage_system import serialization
+from manage_system.serialization import FastJSONRenderer
+from performance.views import PerformanceViewSet
+import time
+
+ENDPOINTS = {
+    'attendance': ('/api/v1/attendance/', AttendanceViewSet),
+    'performance': ('/api/v1/performance/', PerformanceViewSet),
+    'employees': ('/api/v1/employees/', EmployeeViewSet),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare DRF serializers with the values() fast path on the attendance, '
+        'performance and employee list endpoints, and check the rendered bytes '
+        'are identical. Seed first, e.g. `python manage.py seed_data --employees 5000`.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=5,
+            help='Number of timed runs per implementation (default: 5)'
+        )
+        parser.add_argument(
+            '--page-size',
+            type=int,
+            default=1000,
+            help='Rows per list page (default: 1000)'
+        )
+        parser.add_argument(
+            '--endpoint',
+            choices=sorted(ENDPOINTS),
+            action='append',
+            help='Endpoint to benchmark; repeat for several (default: all)'
+        )
+
+    def handle(self, *args, **options):
+        # Build absolute pagination links for a host the settings accept
+        host = (settings.ALLOWED_HOSTS or ['localhost'])[0].lstrip('.')
+        factory = APIRequestFactory(SERVER_NAME='localhost' if host == '*' else host)
+        # Unsaved user: authenticated for the permission check, never written
+        user = get_user_model()(username='benchmark')
+        orjson_label = 'orjson' if serialization.orjson is not None else 'stdlib, orjson not installed'
+
+        implementations = [
+            ('serializer + json', False, JSONRenderer),
+            ('values() + json', True, JSONRenderer),
+            (f'values() + {orjson_label}', True, FastJSONRenderer),
+        ]
+
+        all_identical = True
+        for name in options['endpoint'] or sorted(ENDPOINTS):
+            path, viewset = ENDPOINTS[name]
+            self.stdout.write(f'{path}?page_size={options["page_size"]}')
+
+            outputs = []
+            baseline = None
+            for label, fast, renderer_class in implementations:
+                view = viewset.as_view({'get': 'list'}, renderer_classes=[renderer_class])
+                timings = []
+                with override_settings(API_FAST_LIST_SERIALIZATION=fast):
+                    for _ in range(options['iterations']):
+                        request = factory.get(path, {'page_size': options['page_size']})
+                        force_authenticate(request, user=user)
+                        started = time.perf_counter()
+                        response = view(request)
+                        response.render()
+                        timings.append((time.perf_counter() - started) * 1000)
+                outputs.append(response.content)
+
+                timings.sort()
+                median = timings[len(timings) // 2]
+                baseline = baseline or median
+                self.stdout.write(
+                    f'  {label:>34}: median {median:8.2f} ms, '
+                    f'min {timings[0]:8.2f} ms, {baseline / median:5.2f}x'
+                )
+
+            if any(output != outputs[0] for output in outputs):
+                all_identical = False
+                self.stderr.write(self.style.ERROR(f'  {name}: rendered bytes differ!'))
+
+        if all_identical:
+            self.stdout.write(self.style.SUCCESS('All implementations rendered identical bytes'))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from attendance.rollups import rebuild_rollups
+from datetime import datetime
+
+
+class Command(BaseCommand):
+    help = 'Backfill the daily attendance rollup table from raw attendance records'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--start',
+            help='Rebuild rollups from this date (YYYY-MM-DD) onwards (default: earliest record)'
+        )
+        parser.add_argument(
+            '--chunk-days',
+            type=int,
+            default=31,
+            help='Number of days aggregated per query (default: 31)'
+        )
+
+    def handle(self, *args, **options):
+        start_date = None
+        if options['start']:
+            try:
+                start_date = datetime.strptime(options['start'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('--start must be a date in YYYY-MM-DD format')
+
+        written = rebuild_rollups(start_date=start_date, chunk_days=options['chunk_days'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt {written} attendance rollup rows')
+        )
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.3 on 2026-10-18 08:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("attendance", "0001_initial"),
+        ("employees", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AttendanceRollupCoverage",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("start_date", models.DateField()),
+                ("rebuilt_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="AttendanceDailyRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("present", models.PositiveIntegerField(default=0)),
+                ("absent", models.PositiveIntegerField(default=0)),
+                ("late", models.PositiveIntegerField(default=0)),
+                ("half_day", models.PositiveIntegerField(default=0)),
+                ("total", models.PositiveIntegerField(default=0)),
+                ("working_minutes", models.FloatField(default=0)),
+                ("checked_in", models.PositiveIntegerField(default=0)),
+                ("check_in_minutes", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "department",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="attendance_rollups",
+                        to="employees.department",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-date", "department__name"],
+                "unique_together": {("date", "department")},
+            },
+        ),
+    ]
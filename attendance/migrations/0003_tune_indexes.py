@@ -0,0 +1,47 @@
+# Generated by Django 5.2.3 on 2026-10-18 08:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("attendance", "0002_attendance_rollups"),
+        ("employees", "0002_tune_indexes"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="attendance",
+            name="attendance__employe_c89dc0_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="attendance",
+            name="attendance__date_61f2e1_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="attendance",
+            name="attendance__status_132c06_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="attendance",
+            name="attendance__employe_08d913_idx",
+        ),
+        migrations.AlterField(
+            model_name="attendance",
+            name="employee",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="attendances",
+                to="employees.employee",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="attendance",
+            index=models.Index(
+                fields=["date", "status"], name="attendance_date_status_idx"
+            ),
+        ),
+    ]
@@ -1,5 +1,41 @@
 from django.db import models
-from employees.models import Employee
+from django.db.models import BooleanField, Case, F, FloatField, Value, When
+from django.db.models.functions import Cast, ExtractHour, ExtractMinute, ExtractSecond
+from django.utils.functional import cached_property
+from employees.models import Department, Employee, current_month_range
+
+METRIC_ATTRIBUTES = ('is_late', 'working_hours')
+
+
+def seconds_of_day(field):
+    return ExtractHour(field) * 3600 + ExtractMinute(field) * 60 + ExtractSecond(field)
+
+
+class AttendanceQuerySet(models.QuerySet):
+    def current_month(self):
+        """Rows in the window Employee.attendance_rate is computed over"""
+        month_start, next_month_start = current_month_range()
+        return self.filter(date__gte=month_start, date__lt=next_month_start)
+
+    def with_metrics(self):
+        """
+        Annotate is_late and working_hours so they can be filtered, ordered and aggregated on.
+
+        Computed like the Python fallbacks on Attendance: is_late compares the
+        check-in with the department's late_after time, and working_hours is
+        NULL unless both check-in and check-out times are set.
+        """
+        return self.annotate(
+            is_late=Case(
+                When(check_in_time__gt=F('employee__department__late_after'), then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            ),
+            working_hours=Cast(
+                seconds_of_day('check_out_time') - seconds_of_day('check_in_time'),
+                FloatField()
+            ) / Value(3600.0),
+        )
 
 
 class Attendance(models.Model):
@@ -14,7 +50,9 @@ class Attendance(models.Model):
     employee = models.ForeignKey(
         Employee, 
         on_delete=models.CASCADE, 
-        related_name='attendances'
+        related_name='attendances',
+        # Covered by the (employee, date) unique index
+        db_index=False
     )
     date = models.DateField()
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='present')
@@ -24,28 +62,33 @@ class Attendance(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = AttendanceQuerySet.as_manager()
+
     class Meta:
         ordering = ['-date', 'employee__name']
         unique_together = ['employee', 'date']
         indexes = [
-            models.Index(fields=['employee']),
-            models.Index(fields=['date']),
-            models.Index(fields=['status']),
-            models.Index(fields=['employee', 'date']),
+            models.Index(fields=['date', 'status'], name='attendance_date_status_idx'),
         ]
 
     def __str__(self):
         return f"{self.employee.name} - {self.date} - {self.status}"
 
-    @property
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Annotated or cached values describe the row before this save
+        for name in METRIC_ATTRIBUTES:
+            self.__dict__.pop(name, None)
+
+    # Set directly by AttendanceQuerySet.with_metrics(); computed here otherwise
+    @cached_property
     def is_late(self):
-        """Check if employee was late (check-in after 9:00 AM)"""
+        """Check if employee was late (check-in after the department's late_after time)"""
         if self.check_in_time:
-            from datetime import time
-            return self.check_in_time > time(9, 0)
+            return self.check_in_time > self.employee.department.late_after
         return False
 
-    @property
+    @cached_property
     def working_hours(self):
         """Calculate working hours if check-in and check-out times are available"""
         if self.check_in_time and self.check_out_time:
@@ -55,3 +98,38 @@ class Attendance(models.Model):
             duration = check_out - check_in
             return duration.total_seconds() / 3600  # Convert to hours
         return None
+
+
+class AttendanceDailyRollup(models.Model):
+    """Per-day, per-department attendance totals maintained from Attendance"""
+    date = models.DateField()
+    department = models.ForeignKey(
+        Department,
+        on_delete=models.CASCADE,
+        related_name='attendance_rollups'
+    )
+    present = models.PositiveIntegerField(default=0)
+    absent = models.PositiveIntegerField(default=0)
+    late = models.PositiveIntegerField(default=0)
+    half_day = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    working_minutes = models.FloatField(default=0)
+    checked_in = models.PositiveIntegerField(default=0)
+    check_in_minutes = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-date', 'department__name']
+        unique_together = ['date', 'department']
+
+    def __str__(self):
+        return f"{self.department.name} - {self.date} - {self.total} records"
+
+
+class AttendanceRollupCoverage(models.Model):
+    """Earliest date from which AttendanceDailyRollup rows are known to be complete"""
+    start_date = models.DateField()
+    rebuilt_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Rollups complete from {self.start_date}"
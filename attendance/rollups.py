@@ -0,0 +1,74 @@
+from datetime import timedelta
+from django.db.models import Count, DurationField, F, Q, Sum
+from django.db.models.functions import ExtractHour, ExtractMinute
+from manage_system.rollups import Rollup, register
+from .models import Attendance, AttendanceDailyRollup, AttendanceRollupCoverage
+
+
+class AttendanceRollup(Rollup):
+    """Daily, per-department attendance totals"""
+    source = Attendance
+    date_field = 'date'
+    model = AttendanceDailyRollup
+    coverage_model = AttendanceRollupCoverage
+    period_fields = ('date',)
+    fields = [
+        'present', 'absent', 'late', 'half_day', 'total',
+        'working_minutes', 'checked_in', 'check_in_minutes',
+    ]
+    refresh_chunk_size = 500
+    rebuild_chunk_days = 31
+
+    def aggregates(self):
+        has_both_times = Q(check_in_time__isnull=False, check_out_time__isnull=False)
+        return {
+            'present': Count('id', filter=Q(status='present')),
+            'absent': Count('id', filter=Q(status='absent')),
+            'late': Count('id', filter=Q(status='late')),
+            'half_day': Count('id', filter=Q(status='half_day')),
+            'total': Count('id'),
+            'working_duration': Sum(
+                F('check_out_time') - F('check_in_time'),
+                filter=has_both_times,
+                output_field=DurationField()
+            ),
+            'checked_in': Count('check_in_time'),
+            'check_in_minutes': Sum(
+                ExtractHour('check_in_time') * 60 + ExtractMinute('check_in_time')
+            ),
+        }
+
+    def group(self, queryset):
+        return queryset.values('date', 'employee__department_id')
+
+    def build(self, row):
+        working_duration = row['working_duration'] or timedelta()
+        return AttendanceDailyRollup(
+            date=row['date'],
+            department_id=row['employee__department_id'],
+            present=row['present'],
+            absent=row['absent'],
+            late=row['late'],
+            half_day=row['half_day'],
+            total=row['total'],
+            working_minutes=working_duration.total_seconds() / 60,
+            checked_in=row['checked_in'],
+            check_in_minutes=row['check_in_minutes'] or 0,
+        )
+
+    def period_of(self, day):
+        return (day,)
+
+    def in_periods(self, periods):
+        return Q(date__in=[day for day, in periods])
+
+    def periods_from(self, start_date):
+        return Q(date__gte=start_date)
+
+
+attendance_rollup = register(AttendanceRollup())
+ROLLUP_FIELDS = attendance_rollup.fields
+rollup_aggregates = attendance_rollup.aggregates
+refresh_rollups = attendance_rollup.refresh
+rebuild_rollups = attendance_rollup.rebuild
+rollups_cover = attendance_rollup.covers
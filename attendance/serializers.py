@@ -1,5 +1,9 @@
 from rest_framework import serializers
+from django.conf import settings
+from django.utils import timezone
 from .models import Attendance
+from .utils import TIMESERIES_BUCKETS, TIMESERIES_GROUPS, bucket_starts
+from employees.models import Employee
 from employees.serializers import EmployeeSerializer
 
 
@@ -13,6 +17,11 @@ class AttendanceSerializer(serializers.ModelSerializer):
         model = Attendance
         fields = '__all__'
         read_only_fields = ('created_at', 'updated_at')
+        # Annotated by AttendanceQuerySet.with_metrics()
+        field_dependencies = {
+            'is_late': ['is_late'],
+            'working_hours': ['working_hours'],
+        }
 
 
 class AttendanceDetailSerializer(serializers.ModelSerializer):
@@ -23,4 +32,60 @@ class AttendanceDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = Attendance
         fields = '__all__'
-        read_only_fields = ('created_at', 'updated_at') 
\ No newline at end of file
+        read_only_fields = ('created_at', 'updated_at')
+        # Annotated by AttendanceQuerySet.with_metrics()
+        field_dependencies = {
+            'is_late': ['is_late'],
+            'working_hours': ['working_hours'],
+        }
+
+
+class BatchEmployeeField(serializers.PrimaryKeyRelatedField):
+    """Resolves employees from a dict preloaded into the serializer context"""
+
+    def to_internal_value(self, data):
+        employees = self.context.get('employees')
+        if employees is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return employees[int(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+
+class AttendanceBulkRecordSerializer(serializers.ModelSerializer):
+    employee = BatchEmployeeField(queryset=Employee.objects.all())
+
+    class Meta:
+        model = Attendance
+        fields = ['employee', 'date', 'status', 'check_in_time', 'check_out_time']
+        # Existing (employee, date) rows are updated rather than rejected
+        validators = []
+
+
+class AttendanceTimeseriesQuerySerializer(serializers.Serializer):
+    """Query parameters of the attendance time series endpoint"""
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+    bucket = serializers.ChoiceField(choices=TIMESERIES_BUCKETS, default='day')
+    department = serializers.IntegerField(required=False)
+    employee = serializers.IntegerField(required=False)
+    group_by = serializers.ChoiceField(choices=TIMESERIES_GROUPS, required=False)
+
+    def validate(self, attrs):
+        # Default to the current month so far, like the stats endpoint
+        today = timezone.now().date()
+        attrs.setdefault('end_date', today)
+        attrs.setdefault('start_date', today.replace(day=1))
+        if attrs['end_date'] < attrs['start_date']:
+            raise serializers.ValidationError({'end_date': 'Must not be before start_date.'})
+        max_buckets = getattr(settings, 'ATTENDANCE_TIMESERIES_MAX_BUCKETS', 1000)
+        if len(bucket_starts(attrs['start_date'], attrs['end_date'], attrs['bucket'])) > max_buckets:
+            raise serializers.ValidationError({
+                'bucket': f'The range spans more than {max_buckets} buckets; use a coarser bucket.'
+            })
+        return attrs
@@ -0,0 +1,42 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from employees.models import Department, Employee
+from .models import Attendance
+from .rollups import refresh_rollups
+
+
+@receiver(pre_save, sender=Attendance)
+def remember_previous_rollup_key(sender, instance, raw=False, **kwargs):
+    """Record the (date, department) an existing row counted towards before it changes"""
+    instance._previous_rollup_key = None
+    instance._previous_state = None
+    if raw or instance.pk is None:
+        return
+    previous = Attendance.objects.filter(pk=instance.pk).values(
+        'date', 'employee__department_id', 'status', 'check_in_time'
+    ).first()
+    if previous:
+        instance._previous_rollup_key = (previous['date'], previous['employee__department_id'])
+        # Read by the dashboard's live feed to compute counter deltas
+        instance._previous_state = previous
+
+
+@receiver(post_save, sender=Attendance)
+def update_rollup_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    keys = {(instance.date, instance.employee.department_id)}
+    previous_key = getattr(instance, '_previous_rollup_key', None)
+    if previous_key:
+        keys.add(previous_key)
+    refresh_rollups(keys)
+
+
+@receiver(post_delete, sender=Attendance)
+def update_rollup_on_delete(sender, instance, origin=None, **kwargs):
+    # Cascades from Employee/Department deletes are handled once per origin
+    # by the Employee receivers in manage_system.rollups
+    if isinstance(origin, (Employee, Department)):
+        return
+    refresh_rollups([(instance.date, instance.employee.department_id)])
+
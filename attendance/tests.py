@@ -3,8 +3,17 @@ from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
 from employees.models import Employee, Department
-from .models import Attendance
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from io import StringIO
+from unittest import mock
+from manage_system.pagination import StandardPagination
+from .models import Attendance, AttendanceDailyRollup
 from django.contrib.auth import get_user_model
+from datetime import date, time
+from django.db.models import Avg
+import json
 
 # Create your tests here.
 
@@ -27,6 +36,17 @@ class AttendanceAPITests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('John Doe', str(response.data))
 
+    def test_export_ndjson(self):
+        Attendance.objects.create(employee=self.employee, date='2023-06-02', status='late')
+        response = self.client.get(
+            reverse('attendance-export'), {'format': 'ndjson', 'ordering': 'date'}
+        )
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['date'] for row in rows], ['2023-06-01', '2023-06-02'])
+        self.assertEqual(rows[1]['status'], 'late')
+        self.assertEqual(rows[0]['department_name'], 'Engineering')
+
     def test_create_attendance(self):
         url = reverse('attendance-list')
         data = {
@@ -35,3 +55,375 @@ class AttendanceAPITests(APITestCase):
         response = self.client.post(url, data)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(Attendance.objects.count(), 2)
+
+    def test_monthly_overview_single_aggregate_query(self):
+        Attendance.objects.create(employee=self.employee, date='2023-06-02', status='late')
+        url = reverse('attendance-monthly-overview')
+        # One rollup coverage probe plus the GROUP BY date aggregate
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {'year': 2023, 'month': 6})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        daily_stats = response.data['daily_stats']
+        self.assertEqual(len(daily_stats), 30)
+        self.assertEqual(daily_stats[0], {
+            'date': date(2023, 6, 1), 'present': 1, 'absent': 0, 'late': 0, 'total': 1
+        })
+        self.assertEqual(daily_stats[1]['late'], 1)
+        self.assertEqual(daily_stats[2]['total'], 0)
+
+
+class AttendanceRollupTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.engineering = Department.objects.create(name='Engineering')
+        self.sales = Department.objects.create(name='Sales')
+        self.employee = Employee.objects.create(
+            name='John Doe', email='john@example.com', phone_number='1234567890',
+            address='123 Main St', date_of_joining='2023-01-01', department=self.engineering
+        )
+        self.other = Employee.objects.create(
+            name='Jane Roe', email='jane@example.com', phone_number='1234567890',
+            address='123 Main St', date_of_joining='2023-01-01', department=self.sales
+        )
+
+    def get_rollup(self, day, department):
+        return AttendanceDailyRollup.objects.filter(date=day, department=department).first()
+
+    def test_signals_keep_rollup_current(self):
+        attendance = Attendance.objects.create(
+            employee=self.employee, date='2023-06-01', status='present',
+            check_in_time=time(9, 0), check_out_time=time(17, 30)
+        )
+        rollup = self.get_rollup(date(2023, 6, 1), self.engineering)
+        self.assertEqual((rollup.present, rollup.total), (1, 1))
+        self.assertEqual(rollup.working_minutes, 510)
+        self.assertEqual((rollup.checked_in, rollup.check_in_minutes), (1, 540))
+
+        attendance.status = 'late'
+        attendance.date = date(2023, 6, 2)
+        attendance.save()
+        self.assertIsNone(self.get_rollup(date(2023, 6, 1), self.engineering))
+        self.assertEqual(self.get_rollup(date(2023, 6, 2), self.engineering).late, 1)
+
+        self.employee.department = self.sales
+        self.employee.save()
+        self.assertIsNone(self.get_rollup(date(2023, 6, 2), self.engineering))
+        self.assertEqual(self.get_rollup(date(2023, 6, 2), self.sales).total, 1)
+
+        attendance.delete()
+        self.assertFalse(AttendanceDailyRollup.objects.exists())
+
+    def test_employee_delete_updates_rollups(self):
+        Attendance.objects.create(employee=self.employee, date='2023-06-01', status='present')
+        Attendance.objects.create(employee=self.employee, date='2023-06-02', status='absent')
+        self.employee.delete()
+        self.assertFalse(AttendanceDailyRollup.objects.exists())
+
+    def test_stats_read_from_rollups_match_raw(self):
+        Attendance.objects.create(employee=self.employee, date='2023-06-01', status='present')
+        Attendance.objects.create(employee=self.employee, date='2023-06-02', status='late')
+        Attendance.objects.create(employee=self.other, date='2023-06-01', status='absent')
+        url = reverse('attendance-stats')
+        params = {'start_date': '2023-06-01', 'end_date': '2023-06-30'}
+        raw = self.client.get(url, params).json()
+        overview = self.client.get(reverse('attendance-monthly-overview'), {'year': 2023, 'month': 6}).json()
+
+        AttendanceDailyRollup.objects.all().delete()
+        call_command('rebuild_attendance_rollups', stdout=StringIO())
+        with self.assertNumQueries(2):
+            from_rollups = self.client.get(url, params).json()
+        self.assertEqual(from_rollups['overall_stats'], raw['overall_stats'])
+        self.assertCountEqual(from_rollups['department_stats'], raw['department_stats'])
+        with self.assertNumQueries(2):
+            rollup_overview = self.client.get(
+                reverse('attendance-monthly-overview'), {'year': 2023, 'month': 6}
+            ).json()
+        self.assertEqual(rollup_overview, overview)
+
+    def test_stats_fall_back_before_coverage(self):
+        Attendance.objects.create(employee=self.employee, date='2023-06-01', status='present')
+        call_command('rebuild_attendance_rollups', '--start', '2023-07-01', stdout=StringIO())
+        response = self.client.get(
+            reverse('attendance-stats'), {'start_date': '2023-06-01', 'end_date': '2023-06-30'}
+        )
+        self.assertEqual(response.data['overall_stats']['present'], 1)
+
+
+class AttendanceBulkUpsertTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.department = Department.objects.create(name='Engineering')
+        self.employees = [
+            Employee.objects.create(
+                name=f'Employee {i}', email=f'employee{i}@example.com', phone_number='1234567890',
+                address='123 Main St', date_of_joining='2023-01-01', department=self.department
+            ) for i in range(3)
+        ]
+        Attendance.objects.create(employee=self.employees[0], date='2023-06-01', status='absent')
+        self.url = reverse('attendance-bulk-upsert')
+
+    def test_upserts_valid_rows_and_reports_errors(self):
+        records = [
+            {'employee': self.employees[0].id, 'date': '2023-06-01', 'status': 'present',
+             'check_in_time': '08:55', 'check_out_time': '17:00'},
+            {'employee': self.employees[1].id, 'date': '2023-06-01', 'status': 'late',
+             'check_in_time': '09:30'},
+            {'employee': 9999, 'date': '2023-06-01', 'status': 'present'},
+            {'employee': self.employees[2].id, 'date': '2023-06-01', 'status': 'sleeping'},
+            {'employee': self.employees[1].id, 'date': '2023-06-01', 'status': 'present'},
+        ]
+        response = self.client.post(self.url, records, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual((response.data['created'], response.data['updated']), (1, 1))
+        self.assertEqual([error['index'] for error in response.data['errors']], [2, 3, 4])
+        self.assertIn('employee', response.data['errors'][0]['errors'])
+        self.assertIn('status', response.data['errors'][1]['errors'])
+
+        self.assertEqual(Attendance.objects.count(), 2)
+        updated = Attendance.objects.get(employee=self.employees[0], date='2023-06-01')
+        self.assertEqual((updated.status, updated.check_in_time), ('present', time(8, 55)))
+        rollup = AttendanceDailyRollup.objects.get(date='2023-06-01', department=self.department)
+        self.assertEqual((rollup.present, rollup.late, rollup.absent), (1, 1, 0))
+
+    def test_batch_query_count_independent_of_size(self):
+        def payload(day, employees):
+            return [
+                {'employee': employee.id, 'date': day, 'status': 'present'}
+                for employee in employees
+            ]
+        with CaptureQueriesContext(connection) as context:
+            self.client.post(self.url, payload('2023-06-02', self.employees[:1]), format='json')
+        with self.assertNumQueries(len(context.captured_queries)):
+            response = self.client.post(self.url, payload('2023-06-03', self.employees), format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 3)
+
+    def test_rejects_non_list_payload(self):
+        response = self.client.post(self.url, {'records': 'nope'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AttendancePaginationTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.department = Department.objects.create(name='Engineering')
+        for i in range(3):
+            employee = Employee.objects.create(
+                name=f'Employee {i}', email=f'employee{i}@example.com', phone_number='1234567890',
+                address='123 Main St', date_of_joining='2023-01-01', department=self.department
+            )
+            for day in range(1, 5):
+                Attendance.objects.create(employee=employee, date=date(2023, 6, day))
+        self.url = reverse('attendance-list')
+        self.expected_ids = list(
+            Attendance.objects.order_by('-date', 'employee__name', 'id').values_list('id', flat=True)
+        )
+
+    def test_cursor_mode_walks_forward_and_back(self):
+        response = self.client.get(self.url, {'pagination': 'cursor', 'page_size': 5})
+        self.assertNotIn('count', response.data)
+        self.assertIsNone(response.data['previous'])
+        pages = [[row['id'] for row in response.data['results']]]
+        while response.data['next']:
+            with self.assertNumQueries(1):
+                response = self.client.get(response.data['next'])
+            pages.append([row['id'] for row in response.data['results']])
+        self.assertEqual([row_id for page in pages for row_id in page], self.expected_ids)
+        self.assertEqual([len(page) for page in pages], [5, 5, 2])
+
+        response = self.client.get(response.data['previous'])
+        self.assertEqual([row['id'] for row in response.data['results']], pages[1])
+        response = self.client.get(response.data['previous'])
+        self.assertEqual([row['id'] for row in response.data['results']], pages[0])
+        self.assertIsNone(response.data['previous'])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {'pagination': 'cursor', 'cursor': 'garbage'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_count_modes(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {'count': 'none', 'page_size': 5, 'page': 2})
+        self.assertIsNone(response.data['count'])
+        self.assertEqual([row['id'] for row in response.data['results']], self.expected_ids[5:10])
+        self.assertIsNotNone(response.data['next'])
+        self.assertIsNotNone(response.data['previous'])
+
+        with mock.patch.object(StandardPagination, 'count_cap', 7):
+            response = self.client.get(self.url, {'count': 'capped', 'page_size': 5})
+        self.assertEqual((response.data['count'], response.data['count_capped']), (7, True))
+
+        response = self.client.get(self.url, {'count': 'capped', 'page_size': 5, 'page': 3})
+        self.assertEqual((response.data['count'], response.data['count_capped']), (12, False))
+        self.assertIsNone(response.data['next'])
+
+
+class AttendanceTimeseriesTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.engineering = Department.objects.create(name='Engineering')
+        self.sales = Department.objects.create(name='Sales')
+        self.employee = Employee.objects.create(
+            name='John Doe', email='john@example.com', phone_number='1234567890',
+            address='123 Main St', date_of_joining='2020-01-01', department=self.engineering
+        )
+        self.other = Employee.objects.create(
+            name='Jane Roe', email='jane@example.com', phone_number='1234567890',
+            address='123 Main St', date_of_joining='2020-01-01', department=self.sales
+        )
+        Attendance.objects.create(
+            employee=self.employee, date='2021-03-31', status='present',
+            check_in_time=time(9, 0), check_out_time=time(17, 0)
+        )
+        Attendance.objects.create(
+            employee=self.employee, date='2023-06-05', status='late',
+            check_in_time=time(9, 30), check_out_time=time(18, 0)
+        )
+        Attendance.objects.create(
+            employee=self.other, date='2023-06-07', status='present',
+            check_in_time=time(8, 30), check_out_time=time(12, 30)
+        )
+        Attendance.objects.create(employee=self.other, date='2023-06-12', status='absent')
+        self.url = reverse('attendance-timeseries')
+
+    def test_buckets_and_metrics(self):
+        response = self.client.get(
+            self.url, {'start_date': '2023-06-01', 'end_date': '2023-06-14', 'bucket': 'week'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        [series] = response.data['series']
+        self.assertEqual(
+            [point['bucket'] for point in series['points']],
+            [date(2023, 5, 29), date(2023, 6, 5), date(2023, 6, 12)]
+        )
+        empty, week, last = series['points']
+        self.assertEqual(empty['total'], 0)
+        self.assertIsNone(empty['average_check_in'])
+        self.assertEqual((week['present'], week['late'], week['total']), (1, 1, 2))
+        self.assertEqual(week['attendance_rate'], 50.0)
+        self.assertEqual(week['average_check_in'], '09:00')
+        self.assertEqual(week['working_hours'], 12.5)
+        self.assertEqual((last['absent'], last['attendance_rate']), (1, 0))
+
+    def test_filters_and_group_by(self):
+        params = {'start_date': '2023-06-01', 'end_date': '2023-06-30', 'bucket': 'month'}
+        response = self.client.get(self.url, {**params, 'group_by': 'department'})
+        self.assertEqual(
+            [(series['name'], series['points'][0]['total']) for series in response.data['series']],
+            [('Engineering', 1), ('Sales', 2)]
+        )
+        response = self.client.get(self.url, {**params, 'group_by': 'employee', 'department': self.sales.id})
+        self.assertEqual([series['id'] for series in response.data['series']], [self.other.id])
+        response = self.client.get(self.url, {**params, 'employee': self.employee.id})
+        self.assertEqual(response.data['series'][0]['points'][0]['late'], 1)
+
+    def test_rollups_match_raw_within_fixed_query_budget(self):
+        cases = [
+            {'bucket': 'quarter'},
+            {'bucket': 'month', 'group_by': 'department'},
+            {'bucket': 'week', 'department': self.sales.id},
+        ]
+        params = {'start_date': '2019-01-01', 'end_date': '2023-12-31'}
+        raw = []
+        for case in cases:
+            with self.assertNumQueries(2):
+                response = self.client.get(self.url, {**params, **case})
+            self.assertEqual(response.data['source'], 'attendance')
+            raw.append(response.data['series'])
+
+        call_command('rebuild_attendance_rollups', stdout=StringIO())
+        for case, expected in zip(cases, raw):
+            with self.assertNumQueries(2):
+                response = self.client.get(self.url, {**params, **case})
+            self.assertEqual(response.data['source'], 'rollups')
+            self.assertEqual(response.data['series'], expected)
+
+        response = self.client.get(self.url, {**params, 'bucket': 'quarter', 'group_by': 'employee'})
+        self.assertEqual(response.data['source'], 'attendance')
+
+    def test_invalid_parameters(self):
+        for params in [
+            {'start_date': 'yesterday'},
+            {'start_date': '2023-06-30', 'end_date': '2023-06-01'},
+            {'start_date': '2023-06-01', 'end_date': '2023-06-30', 'bucket': 'year'},
+            {'start_date': '2000-01-01', 'end_date': '2023-06-30', 'bucket': 'day'},
+        ]:
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+
+class AttendanceMetricsTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.engineering = Department.objects.create(name='Engineering')
+        self.support = Department.objects.create(name='Support', late_after=time(7, 30))
+        self.employee = Employee.objects.create(
+            name='John Doe', email='john@example.com', phone_number='1234567890',
+            address='123 Main St', date_of_joining='2023-01-01', department=self.engineering
+        )
+        self.other = Employee.objects.create(
+            name='Jane Roe', email='jane@example.com', phone_number='1234567890',
+            address='123 Main St', date_of_joining='2023-01-01', department=self.support
+        )
+        times = [
+            (self.employee, time(8, 45), time(17, 15)),
+            (self.employee, time(9, 20), time(17, 50, 30)),
+            (self.employee, None, None),
+            (self.other, time(8, 0), time(15, 0)),
+            (self.other, time(7, 0), None),
+        ]
+        self.attendances = [
+            Attendance.objects.create(
+                employee=employee, date=date(2023, 6, day), status='present',
+                check_in_time=check_in, check_out_time=check_out
+            ) for day, (employee, check_in, check_out) in enumerate(times, start=1)
+        ]
+        self.url = reverse('attendance-list')
+
+    def test_annotations_match_python_fallback(self):
+        annotated = {attendance.pk: attendance for attendance in Attendance.objects.with_metrics()}
+        for attendance in Attendance.objects.all():
+            with self.subTest(attendance=attendance.pk):
+                self.assertEqual(annotated[attendance.pk].is_late, attendance.is_late)
+                self.assertEqual(annotated[attendance.pk].working_hours, attendance.working_hours)
+        self.assertEqual(
+            [annotated[attendance.pk].is_late for attendance in self.attendances],
+            [False, True, False, True, False]
+        )
+
+    def test_filter_order_and_aggregate(self):
+        response = self.client.get(self.url, {'is_late': 'true', 'ordering': 'date'})
+        self.assertEqual(
+            [row['id'] for row in response.data['results']],
+            [self.attendances[1].pk, self.attendances[3].pk]
+        )
+        response = self.client.get(self.url, {'min_working_hours': 8, 'ordering': '-working_hours'})
+        self.assertEqual(
+            [row['id'] for row in response.data['results']],
+            [self.attendances[1].pk, self.attendances[0].pk]
+        )
+        response = self.client.get(self.url, {'max_working_hours': 8, 'department': self.support.id})
+        self.assertEqual([row['working_hours'] for row in response.data['results']], [7.0])
+
+        averages = Attendance.objects.with_metrics().values('employee__name').annotate(
+            average_hours=Avg('working_hours')
+        ).filter(average_hours__lt=8)
+        self.assertEqual([row['employee__name'] for row in averages], ['Jane Roe'])
+
+    def test_update_returns_recomputed_metrics(self):
+        attendance = self.attendances[0]
+        response = self.client.patch(
+            reverse('attendance-detail', args=[attendance.pk]),
+            {'check_in_time': '10:00', 'check_out_time': '18:00'}
+        )
+        self.assertEqual((response.data['is_late'], response.data['working_hours']), (True, 8.0))
+
+        self.engineering.late_after = time(10, 30)
+        self.engineering.save()
+        response = self.client.get(reverse('attendance-detail', args=[attendance.pk]))
+        self.assertFalse(response.data['is_late'])
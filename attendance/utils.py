@@ -0,0 +1,174 @@
+from datetime import date, timedelta
+from django.db.models import Count, DateField, Q, Sum
+from django.db.models.functions import Trunc
+from .models import Attendance, AttendanceDailyRollup
+from .rollups import ROLLUP_FIELDS, rollup_aggregates, rollups_cover
+
+TIMESERIES_BUCKETS = ['day', 'week', 'month', 'quarter']
+TIMESERIES_GROUPS = ['department', 'employee']
+
+
+def month_bounds(year, month):
+    """Return the first and last day of a calendar month"""
+    start_date = date(int(year), int(month), 1)
+    if int(month) == 12:
+        end_date = date(int(year) + 1, 1, 1) - timedelta(days=1)
+    else:
+        end_date = date(int(year), int(month) + 1, 1) - timedelta(days=1)
+    return start_date, end_date
+
+
+def daily_status_counts(queryset, start_date, end_date, skip_weekends=False, use_rollups=False):
+    """
+    Get present/absent/late/total counts for every day in a date range.
+
+    Runs a single GROUP BY date query and fills days without records with
+    zero counts, so charts always get one entry per (working) day. With
+    use_rollups, an unfiltered queryset is answered from AttendanceDailyRollup
+    whenever the rollups cover the whole range.
+    """
+    if use_rollups and rollups_cover(start_date):
+        rows = AttendanceDailyRollup.objects.filter(
+            date__range=[start_date, end_date]
+        ).order_by().values('date').annotate(
+            present=Sum('present'),
+            absent=Sum('absent'),
+            late=Sum('late'),
+            total=Sum('total')
+        )
+    else:
+        rows = queryset.filter(date__range=[start_date, end_date]).order_by().values('date').annotate(
+            present=Count('id', filter=Q(status='present')),
+            absent=Count('id', filter=Q(status='absent')),
+            late=Count('id', filter=Q(status='late')),
+            total=Count('id')
+        )
+    counts_by_date = {row['date']: row for row in rows}
+
+    daily_stats = []
+    current_date = start_date
+    while current_date <= end_date:
+        # Skip weekends (Saturday=5, Sunday=6)
+        if not skip_weekends or current_date.weekday() < 5:
+            counts = counts_by_date.get(current_date, {})
+            daily_stats.append({
+                'date': current_date,
+                'present': counts.get('present', 0),
+                'absent': counts.get('absent', 0),
+                'late': counts.get('late', 0),
+                'total': counts.get('total', 0)
+            })
+        current_date += timedelta(days=1)
+    return daily_stats
+
+
+def bucket_start(day, bucket):
+    """First day of the day/week/month/quarter bucket containing day (weeks start on Monday)"""
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    if bucket == 'quarter':
+        return date(day.year, (day.month - 1) // 3 * 3 + 1, 1)
+    return day
+
+
+def next_bucket_start(day, bucket):
+    if bucket == 'week':
+        return day + timedelta(days=7)
+    if bucket in ('month', 'quarter'):
+        month = day.month - 1 + (3 if bucket == 'quarter' else 1)
+        return date(day.year + month // 12, month % 12 + 1, 1)
+    return day + timedelta(days=1)
+
+
+def bucket_starts(start_date, end_date, bucket):
+    """Every bucket overlapping the date range, in order"""
+    starts = []
+    current = bucket_start(start_date, bucket)
+    while current <= end_date:
+        starts.append(current)
+        current = next_bucket_start(current, bucket)
+    return starts
+
+
+def timeseries_point(bucket, counts):
+    total = counts.get('total', 0)
+    checked_in = counts.get('checked_in', 0)
+    average_check_in = None
+    if checked_in:
+        minutes = round(counts['check_in_minutes'] / checked_in)
+        average_check_in = f'{minutes // 60:02d}:{minutes % 60:02d}'
+    return {
+        'bucket': bucket,
+        'present': counts.get('present', 0),
+        'absent': counts.get('absent', 0),
+        'late': counts.get('late', 0),
+        'half_day': counts.get('half_day', 0),
+        'total': total,
+        'attendance_rate': round(counts.get('present', 0) / total * 100, 2) if total else 0,
+        'average_check_in': average_check_in,
+        'working_hours': round(counts.get('working_minutes', 0) / 60, 2),
+    }
+
+
+def attendance_timeseries(start_date, end_date, bucket='day', department=None, employee=None, group_by=None):
+    """
+    Status counts, attendance rate, average check-in time and working hours per bucket.
+
+    Runs one GROUP BY query over Trunc(date) whatever the length of the range,
+    reading AttendanceDailyRollup when no per-employee detail is needed and
+    the rollups cover the range. Returns (source, series), with one series
+    per department or employee for group_by and a single series otherwise;
+    every series has a point for every bucket.
+    """
+    use_rollups = employee is None and group_by != 'employee' and rollups_cover(start_date)
+    if use_rollups:
+        source = 'rollups'
+        queryset = AttendanceDailyRollup.objects.filter(date__range=[start_date, end_date])
+        if department is not None:
+            queryset = queryset.filter(department_id=department)
+        group_fields = {'department': ('department_id', 'department__name')}
+        aggregates = {field: Sum(field) for field in ROLLUP_FIELDS}
+    else:
+        source = 'attendance'
+        queryset = Attendance.objects.filter(date__range=[start_date, end_date])
+        if department is not None:
+            queryset = queryset.filter(employee__department_id=department)
+        if employee is not None:
+            queryset = queryset.filter(employee_id=employee)
+        group_fields = {
+            'department': ('employee__department_id', 'employee__department__name'),
+            'employee': ('employee_id', 'employee__name'),
+        }
+        aggregates = rollup_aggregates()
+    id_field, name_field = group_fields.get(group_by, (None, None))
+
+    rows = queryset.order_by().annotate(
+        bucket=Trunc('date', bucket, output_field=DateField())
+    ).values('bucket', *filter(None, [id_field, name_field])).annotate(**aggregates)
+
+    groups = {}
+    for row in rows:
+        if 'working_duration' in row:
+            row['working_minutes'] = (row['working_duration'] or timedelta()).total_seconds() / 60
+        group_id = row[id_field] if id_field else None
+        group = groups.setdefault(group_id, {
+            'id': group_id,
+            'name': row[name_field] if name_field else None,
+            'counts': {},
+        })
+        group['counts'][row['bucket']] = row
+
+    starts = bucket_starts(start_date, end_date, bucket)
+    if not groups and group_by is None:
+        groups[None] = {'id': None, 'name': None, 'counts': {}}
+    series = [
+        {
+            'id': group['id'],
+            'name': group['name'],
+            'points': [timeseries_point(start, group['counts'].get(start, {})) for start in starts],
+        }
+        for group in sorted(groups.values(), key=lambda group: (group['name'] or '', group['id'] or 0))
+    ]
+    return source, series
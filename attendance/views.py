@@ -3,22 +3,72 @@ from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Count, Q
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q, Sum
 from django.utils import timezone
 from datetime import datetime, timedelta
-from .models import Attendance
-from .serializers import AttendanceSerializer, AttendanceDetailSerializer
+from .filters import AttendanceFilter
+from .models import Attendance, AttendanceDailyRollup
+from .rollups import refresh_rollups, rollups_cover
+from employees.models import Employee
+from changes.log import record_changes
+from dashboard.cache import bump_model_version
+from dashboard.live import publish_snapshot
+from manage_system.conditional import ConditionalGetMixin
+from manage_system.exports import ExportMixin
+from manage_system.fieldsets import SparseFieldsetMixin
+from manage_system.serialization import FastListMixin
+from manage_system.pagination import PaginationModeMixin
+from .serializers import (
+    AttendanceSerializer,
+    AttendanceDetailSerializer,
+    AttendanceBulkRecordSerializer,
+    AttendanceTimeseriesQuerySerializer
+)
+from .utils import attendance_timeseries, daily_status_counts, month_bounds
 
 
-class AttendanceViewSet(viewsets.ModelViewSet):
+class AttendanceViewSet(ConditionalGetMixin, FastListMixin, SparseFieldsetMixin, PaginationModeMixin, ExportMixin, viewsets.ModelViewSet):
     """ViewSet for Attendance model with CRUD operations"""
     queryset = Attendance.objects.select_related('employee', 'employee__department').all()
     serializer_class = AttendanceSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['employee', 'status', 'date']
+    filterset_class = AttendanceFilter
     search_fields = ['employee__name', 'employee__department__name']
-    ordering_fields = ['date', 'employee__name', 'status']
+    ordering_fields = ['date', 'employee__name', 'status', 'check_in_time', 'is_late', 'working_hours']
     ordering = ['-date', 'employee__name']
+    cursor_ordering = ['-date', 'employee__name', 'id']
+    export_fields = {
+        'id': 'id',
+        'employee': 'employee_id',
+        'employee_name': 'employee__name',
+        'department_name': 'employee__department__name',
+        'date': 'date',
+        'status': 'status',
+        'check_in_time': 'check_in_time',
+        'check_out_time': 'check_out_time',
+        'notes': 'notes',
+        'is_late': 'is_late',
+        'working_hours': 'working_hours',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+    }
+    last_modified_fields = ['updated_at', 'employee__updated_at', 'employee__department__updated_at']
+
+    def get_conditional_probes(self, queryset):
+        probes = super().get_conditional_probes(queryset)
+        if self.action == 'retrieve' and self.wants_field('employee'):
+            # The nested employee renders attendance_rate
+            probes.append((
+                Attendance.objects.current_month().filter(employee__in=queryset.values('employee')),
+                ['updated_at']
+            ))
+        return probes
+
+    def get_queryset(self):
+        # Aggregating actions use self.queryset and skip the annotation joins
+        return super().get_queryset().with_metrics()
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -29,7 +79,7 @@ class AttendanceViewSet(viewsets.ModelViewSet):
     def today(self, request):
         """Get today's attendance records"""
         today = timezone.now().date()
-        attendances = self.queryset.filter(date=today)
+        attendances = self.get_queryset().filter(date=today)
         serializer = self.get_serializer(attendances, many=True)
         return Response(serializer.data)
 
@@ -49,26 +99,33 @@ class AttendanceViewSet(viewsets.ModelViewSet):
             start_date = today.replace(day=1)
             end_date = today
 
-        # Filter attendances by date range
-        attendances = self.queryset.filter(date__range=[start_date, end_date])
-        
-        # Calculate statistics
-        total_records = attendances.count()
-        present_count = attendances.filter(status='present').count()
-        absent_count = attendances.filter(status='absent').count()
-        late_count = attendances.filter(status='late').count()
+        if rollups_cover(start_date):
+            dept_stats = self.rollup_department_stats(start_date, end_date)
+            total_records = sum(stat['total'] for stat in dept_stats)
+            present_count = sum(stat['present'] for stat in dept_stats)
+            absent_count = sum(stat['absent'] for stat in dept_stats)
+            late_count = sum(stat['late'] for stat in dept_stats)
+        else:
+            # Filter attendances by date range
+            attendances = self.queryset.filter(date__range=[start_date, end_date])
+            
+            # Calculate statistics
+            total_records = attendances.count()
+            present_count = attendances.filter(status='present').count()
+            absent_count = attendances.filter(status='absent').count()
+            late_count = attendances.filter(status='late').count()
+            
+            # Department-wise statistics
+            dept_stats = attendances.values('employee__department__name').annotate(
+                total=Count('id'),
+                present=Count('id', filter=Q(status='present')),
+                absent=Count('id', filter=Q(status='absent')),
+                late=Count('id', filter=Q(status='late'))
+            )
         
         # Calculate attendance rate
         attendance_rate = (present_count / total_records * 100) if total_records > 0 else 0
         
-        # Department-wise statistics
-        dept_stats = attendances.values('employee__department__name').annotate(
-            total=Count('id'),
-            present=Count('id', filter=Q(status='present')),
-            absent=Count('id', filter=Q(status='absent')),
-            late=Count('id', filter=Q(status='late'))
-        )
-        
         return Response({
             'date_range': {
                 'start_date': start_date,
@@ -84,35 +141,178 @@ class AttendanceViewSet(viewsets.ModelViewSet):
             'department_stats': dept_stats
         })
 
+    def rollup_department_stats(self, start_date, end_date):
+        """Department-wise status counts read from the daily rollup table"""
+        rows = AttendanceDailyRollup.objects.filter(
+            date__range=[start_date, end_date]
+        ).order_by().values('department__name').annotate(
+            total=Sum('total'),
+            present=Sum('present'),
+            absent=Sum('absent'),
+            late=Sum('late')
+        )
+        return [
+            {
+                'employee__department__name': row['department__name'],
+                'total': row['total'],
+                'present': row['present'],
+                'absent': row['absent'],
+                'late': row['late']
+            } for row in rows
+        ]
+
     @action(detail=False, methods=['get'])
     def monthly_overview(self, request):
         """Get monthly attendance overview for charts"""
         year = request.query_params.get('year', timezone.now().year)
         month = request.query_params.get('month', timezone.now().month)
         
-        # Get all dates in the month
-        start_date = datetime(int(year), int(month), 1).date()
-        if int(month) == 12:
-            end_date = datetime(int(year) + 1, 1, 1).date() - timedelta(days=1)
-        else:
-            end_date = datetime(int(year), int(month) + 1, 1).date() - timedelta(days=1)
-        
-        # Get daily attendance counts
-        daily_stats = []
-        current_date = start_date
-        while current_date <= end_date:
-            day_attendances = self.queryset.filter(date=current_date)
-            daily_stats.append({
-                'date': current_date,
-                'present': day_attendances.filter(status='present').count(),
-                'absent': day_attendances.filter(status='absent').count(),
-                'late': day_attendances.filter(status='late').count(),
-                'total': day_attendances.count()
-            })
-            current_date += timedelta(days=1)
+        start_date, end_date = month_bounds(year, month)
+        daily_stats = daily_status_counts(self.queryset, start_date, end_date, use_rollups=True)
         
         return Response({
             'year': year,
             'month': month,
             'daily_stats': daily_stats
         })
+
+    @action(detail=False, methods=['get'])
+    def timeseries(self, request):
+        """
+        Attendance metrics per day, week, month or quarter.
+
+        `start_date` and `end_date` default to the current month so far and
+        `bucket` to `day`.
+        Optional `department` and `employee` ids filter the records and
+        `group_by` (`department` or `employee`) returns one series per group.
+        """
+        params = AttendanceTimeseriesQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        query = params.validated_data
+        source, series = attendance_timeseries(**query)
+        return Response({
+            'date_range': {
+                'start_date': query['start_date'],
+                'end_date': query['end_date']
+            },
+            'bucket': query['bucket'],
+            'department': query.get('department'),
+            'employee': query.get('employee'),
+            'group_by': query.get('group_by'),
+            'source': source,
+            'series': series
+        })
+
+    @action(detail=False, methods=['post'])
+    def bulk_upsert(self, request):
+        """
+        Create or update a batch of attendance records keyed on (employee, date).
+
+        Accepts a list of {employee, date, status, check_in_time, check_out_time}
+        records (or {"records": [...]}). Valid rows are written in one transaction;
+        invalid rows are reported by index without aborting the rest of the batch.
+        """
+        records = request.data.get('records') if isinstance(request.data, dict) else request.data
+        if not isinstance(records, list):
+            return Response(
+                {'detail': 'Expected a list of attendance records.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        max_records = getattr(settings, 'ATTENDANCE_BULK_UPSERT_MAX_RECORDS', 5000)
+        if len(records) > max_records:
+            return Response(
+                {'detail': f'A batch may contain at most {max_records} records.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Resolve every referenced employee with a single query
+        employee_ids = set()
+        for record in records:
+            try:
+                employee_ids.add(int(record.get('employee')))
+            except (AttributeError, TypeError, ValueError):
+                pass
+        employees = Employee.objects.only('id', 'department_id').in_bulk(employee_ids)
+        context = {**self.get_serializer_context(), 'employees': employees}
+
+        errors = []
+        valid = {}
+        for index, record in enumerate(records):
+            if not isinstance(record, dict):
+                errors.append({'index': index, 'errors': {'non_field_errors': ['Expected an object.']}})
+                continue
+            serializer = AttendanceBulkRecordSerializer(data=record, context=context)
+            if not serializer.is_valid():
+                errors.append({'index': index, 'errors': serializer.errors})
+                continue
+            data = serializer.validated_data
+            key = (data['employee'].pk, data['date'])
+            if key in valid:
+                errors.append({
+                    'index': index,
+                    'errors': {'non_field_errors': [
+                        f'Duplicate record for this employee and date (see index {valid[key][0]}).'
+                    ]}
+                })
+                continue
+            valid[key] = (index, data)
+
+        created = updated = 0
+        if valid:
+            existing = set(
+                Attendance.objects.filter(
+                    employee_id__in={employee_id for employee_id, _ in valid},
+                    date__in={day for _, day in valid}
+                ).values_list('employee_id', 'date')
+            )
+            attendances = [
+                Attendance(
+                    employee=data['employee'],
+                    date=data['date'],
+                    status=data.get('status', 'present'),
+                    check_in_time=data.get('check_in_time'),
+                    check_out_time=data.get('check_out_time')
+                ) for _, data in valid.values()
+            ]
+            with transaction.atomic():
+                Attendance.objects.bulk_create(
+                    attendances,
+                    update_conflicts=True,
+                    unique_fields=['employee', 'date'],
+                    update_fields=['status', 'check_in_time', 'check_out_time', 'updated_at']
+                )
+                # bulk_create skips model signals, so refresh derived data here
+                ids = {(attendance.employee_id, attendance.date): attendance.pk for attendance in attendances}
+                if None in ids.values():
+                    # Backends that cannot return ids from bulk inserts
+                    ids = {
+                        (employee_id, day): pk for pk, employee_id, day in Attendance.objects.filter(
+                            employee_id__in={employee_id for employee_id, _ in ids},
+                            date__in={day for _, day in ids}
+                        ).values_list('pk', 'employee_id', 'date') if (employee_id, day) in ids
+                    }
+                record_changes(Attendance, (
+                    (pk, 'update' if key in existing else 'create') for key, pk in ids.items()
+                ))
+                refresh_rollups(
+                    (attendance.date, attendance.employee.department_id)
+                    for attendance in attendances
+                )
+                if any(attendance.date == timezone.now().date() for attendance in attendances):
+                    publish_snapshot()
+            bump_model_version(Attendance)
+            updated = len(existing & set(valid))
+            created = len(valid) - updated
+
+        if not errors:
+            response_status = status.HTTP_200_OK
+        elif valid:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response({
+            'created': created,
+            'updated': updated,
+            'failed': len(errors),
+            'errors': errors
+        }, status=response_status)
@@ -0,0 +1,167 @@
+"""
+Append-only change log behind the incremental sync feed (/api/v1/changes/).
+
+Saves and deletes of the synced models add a Change entry in the writing
+transaction (see changes.signals); deletes leave a tombstone. Bulk writes
+that skip model signals call record_changes() or record_queryset().
+
+Entries are numbered when they are sealed, not when they are inserted: ids
+are handed out at insert time, so a transaction that commits late could put
+an id behind a cursor a client already holds. seal_changes() numbers
+committed, unsealed entries under a lock on the ChangeLogState row, so an
+entry sealed later always gets a higher sequence than any a reader has
+seen. The feed seals before it reads.
+
+compact_changes() drops entries superseded by a later entry for the same
+object (a mirror only needs the latest) and tombstones older than the
+retention. Cursors from before the newest dropped tombstone get 410 Gone
+and must sync again from the start.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Exists, F, Max, OuterRef
+from django.utils import timezone
+from attendance.models import Attendance
+from employees.models import Department, Employee
+from performance.models import Performance
+from .models import Change, ChangeLogState
+
+SYNCED_MODELS = {
+    model._meta.model_name: model for model in (Department, Employee, Attendance, Performance)
+}
+
+
+def get_changes_settings():
+    return {
+        'PAGE_SIZE': 500,
+        'MAX_PAGE_SIZE': 5000,
+        'SEAL_BATCH_SIZE': 10000,
+        'TOMBSTONE_RETENTION_DAYS': 30,
+        **getattr(settings, 'CHANGES', {}),
+    }
+
+
+def record_change(instance, action):
+    Change.objects.create(model=instance._meta.model_name, object_id=instance.pk, action=action)
+
+
+def record_changes(model, changes):
+    """Log (pk, action) pairs of rows written in bulk"""
+    now = timezone.now()
+    Change.objects.bulk_create([
+        Change(model=model._meta.model_name, object_id=pk, action=action, recorded_at=now)
+        for pk, action in changes
+    ], batch_size=1000)
+
+
+def record_queryset(queryset, action):
+    """Log every row of a queryset with one INSERT ... SELECT, e.g. after a COPY"""
+    connection = connections[queryset.db]
+    quote = connection.ops.quote_name
+    select, params = queryset.order_by('pk').values_list('pk').query.sql_with_params()
+    columns = ', '.join(
+        quote(Change._meta.get_field(name).column) for name in ('model', 'action', 'recorded_at', 'object_id')
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {quote(Change._meta.db_table)} ({columns}) '
+            f'SELECT %s, %s, %s, changed.* FROM ({select}) changed',
+            [
+                queryset.model._meta.model_name, action,
+                connection.ops.adapt_datetimefield_value(timezone.now()), *params,
+            ]
+        )
+        return cursor.rowcount
+
+
+def lock_state():
+    """The ChangeLogState row, locked until the surrounding transaction ends"""
+    # Writing before reading locks the row on PostgreSQL and takes SQLite's
+    # write lock up front, where upgrading a read transaction can fail
+    ChangeLogState.objects.filter(pk=1).update(last_sequence=F('last_sequence'))
+    return ChangeLogState.objects.get_or_create(pk=1)[0]
+
+
+def seal_changes(batch_size=None):
+    """Number up to `batch_size` committed, unsealed entries in id order; returns how many"""
+    batch_size = batch_size or get_changes_settings()['SEAL_BATCH_SIZE']
+    pending = list(
+        Change.objects.filter(sequence__isnull=True).order_by('pk').values_list('pk', flat=True)[:batch_size]
+    )
+    if not pending:
+        return 0
+    first, last = pending[0], pending[-1]
+    with transaction.atomic():
+        state = lock_state()
+        # Entries committed since `pending` was read may fall in the range too;
+        # id + offset keeps all of them above every sequence handed out so far
+        offset = max(state.last_sequence + 1 - first, 0)
+        sealed = Change.objects.filter(sequence__isnull=True, pk__range=(first, last)).update(
+            sequence=F('pk') + offset
+        )
+        state.last_sequence = last + offset
+        state.save(update_fields=['last_sequence'])
+    return sealed
+
+
+def get_horizon():
+    return ChangeLogState.objects.values_list('horizon', flat=True).first() or 0
+
+
+def changes_after(since, limit):
+    """Up to `limit` sealed entries after the `since` sequence, in sequence order"""
+    return list(
+        Change.objects.filter(sequence__gt=since).order_by('sequence').values(
+            'sequence', 'model', 'object_id', 'action', 'recorded_at'
+        )[:limit]
+    )
+
+
+def current_rows(entries):
+    """{(model, pk): column values} of the rows behind created and updated entries"""
+    wanted = defaultdict(set)
+    for entry in entries:
+        if entry['action'] != 'delete':
+            wanted[entry['model']].add(entry['object_id'])
+
+    rows = {}
+    for name, pks in wanted.items():
+        model = SYNCED_MODELS[name]
+        fields = [field.attname for field in model._meta.concrete_fields]
+        for row in model._default_manager.filter(pk__in=pks).order_by().values(*fields):
+            # Decimals as strings, as elsewhere in the API
+            rows[name, row['id']] = {
+                field: str(value) if isinstance(value, Decimal) else value for field, value in row.items()
+            }
+    return rows
+
+
+def compact_changes(retention=None):
+    """
+    Drop superseded entries and tombstones older than `retention` (a timedelta).
+
+    Returns the number of superseded entries and of tombstones deleted.
+    """
+    if retention is None:
+        retention = timedelta(days=get_changes_settings()['TOMBSTONE_RETENTION_DAYS'])
+
+    later = Change.objects.filter(
+        model=OuterRef('model'), object_id=OuterRef('object_id'), sequence__gt=OuterRef('sequence')
+    )
+    superseded, _ = Change.objects.filter(sequence__isnull=False).filter(Exists(later)).delete()
+
+    with transaction.atomic():
+        state = lock_state()
+        expired = Change.objects.filter(
+            action='delete', sequence__isnull=False, recorded_at__lt=timezone.now() - retention
+        )
+        newest = expired.aggregate(newest=Max('sequence'))['newest']
+        if newest is None:
+            return superseded, 0
+        tombstones, _ = expired.filter(sequence__lte=newest).delete()
+        state.horizon = max(state.horizon, newest)
+        state.save(update_fields=['horizon'])
+    return superseded, tombstones
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from changes.log import compact_changes, get_changes_settings
+from datetime import timedelta
+
+
+class Command(BaseCommand):
+    help = (
+        'Compact the change log: drop entries superseded by a later change to the same row '
+        'and tombstones older than the retention. Clients whose cursor predates a dropped '
+        'tombstone must sync again from the start.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tombstone-days',
+            type=int,
+            default=get_changes_settings()['TOMBSTONE_RETENTION_DAYS'],
+            help='Keep tombstones recorded within this many days (default: CHANGES_TOMBSTONE_RETENTION_DAYS)'
+        )
+
+    def handle(self, *args, **options):
+        if options['tombstone_days'] < 0:
+            raise CommandError('--tombstone-days must not be negative')
+
+        superseded, tombstones = compact_changes(timedelta(days=options['tombstone_days']))
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Removed {superseded} superseded entries and {tombstones} tombstones')
+        )
@@ -0,0 +1,96 @@
+# Generated by Django 5.2.3 on 2026-10-18 10:30
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.utils import timezone
+
+SYNCED_MODELS = ["employees.Department", "employees.Employee", "attendance.Attendance", "performance.Performance"]
+
+
+def backfill_change_log(apps, schema_editor):
+    """Create the state row and log every existing row, so a full sync sees it"""
+    apps.get_model("changes", "ChangeLogState").objects.create(pk=1)
+    quote = schema_editor.quote_name
+    table = quote(apps.get_model("changes", "Change")._meta.db_table)
+    now = schema_editor.connection.ops.adapt_datetimefield_value(timezone.now())
+    for label in SYNCED_MODELS:
+        model = apps.get_model(label)
+        schema_editor.execute(
+            f"INSERT INTO {table} (model, object_id, action, recorded_at) "
+            f"SELECT %s, id, %s, %s FROM {quote(model._meta.db_table)} ORDER BY id",
+            [model._meta.model_name, "create", now],
+        )
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("employees", "0003_department_late_after"),
+        ("attendance", "0003_tune_indexes"),
+        ("performance", "0003_performance_rollups"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChangeLogState",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("last_sequence", models.BigIntegerField(default=0)),
+                ("horizon", models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="Change",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "sequence",
+                    models.BigIntegerField(blank=True, null=True, unique=True),
+                ),
+                ("model", models.CharField(max_length=30)),
+                ("object_id", models.BigIntegerField()),
+                (
+                    "action",
+                    models.CharField(
+                        choices=[
+                            ("create", "Created"),
+                            ("update", "Updated"),
+                            ("delete", "Deleted"),
+                        ],
+                        max_length=6,
+                    ),
+                ),
+                (
+                    "recorded_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["model", "object_id", "sequence"],
+                        name="change_object_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_change_log, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Change(models.Model):
+    """
+    One created, updated or deleted row of a synced model (see changes.log).
+
+    `sequence` is assigned when the entry is sealed, after the writing
+    transaction committed, so it follows commit order; unsealed entries have
+    none and are not served yet.
+    """
+    ACTION_CHOICES = [
+        ('create', 'Created'),
+        ('update', 'Updated'),
+        ('delete', 'Deleted'),
+    ]
+
+    sequence = models.BigIntegerField(null=True, blank=True, unique=True)
+    model = models.CharField(max_length=30)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=6, choices=ACTION_CHOICES)
+    recorded_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Compaction looks for later entries of the same object
+            models.Index(fields=['model', 'object_id', 'sequence'], name='change_object_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.sequence or '-'}: {self.action} {self.model} {self.object_id}"
+
+
+class ChangeLogState(models.Model):
+    """Single row: the last sequence handed out and the compaction horizon"""
+    last_sequence = models.BigIntegerField(default=0)
+    # Tombstones up to this sequence were compacted away; older cursors must resync
+    horizon = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"Sealed up to {self.last_sequence}, compacted up to {self.horizon}"
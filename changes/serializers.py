@@ -0,0 +1,14 @@
+from rest_framework import serializers
+from .log import get_changes_settings
+
+
+class ChangeFeedQuerySerializer(serializers.Serializer):
+    """Query parameters of the change feed"""
+    since = serializers.IntegerField(required=False, min_value=0)
+    limit = serializers.IntegerField(required=False, min_value=1)
+
+    def validate_limit(self, value):
+        max_page_size = get_changes_settings()['MAX_PAGE_SIZE']
+        if value > max_page_size:
+            raise serializers.ValidationError(f'Ensure this value is less than or equal to {max_page_size}.')
+        return value
@@ -0,0 +1,16 @@
+from django.db.models.signals import post_delete, post_save
+from .log import SYNCED_MODELS, record_change
+
+
+def log_save(sender, instance, created=False, **kwargs):
+    record_change(instance, 'create' if created else 'update')
+
+
+def log_delete(sender, instance, **kwargs):
+    # Cascaded deletes send this per row too, so each one leaves a tombstone
+    record_change(instance, 'delete')
+
+
+for model in SYNCED_MODELS.values():
+    post_save.connect(log_save, sender=model, dispatch_uid=f'changes_{model.__name__}_save')
+    post_delete.connect(log_delete, sender=model, dispatch_uid=f'changes_{model.__name__}_delete')
@@ -0,0 +1,136 @@
+from datetime import timedelta
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from attendance.models import Attendance
+from employees.models import Department, Employee
+from performance.models import Performance
+from .log import compact_changes, seal_changes
+from .models import Change
+
+
+class ChangeFeedTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.department = Department.objects.create(name='Engineering')
+        self.employee = Employee.objects.create(
+            name='Jane Smith', email='jane@example.com', phone_number='1234567890',
+            address='123 Main St', date_of_joining='2023-01-01', department=self.department,
+            salary='50000.00'
+        )
+        self.attendance = Attendance.objects.create(employee=self.employee, date='2023-06-01', status='present')
+
+    def feed(self, **params):
+        response = self.client.get(reverse('change-feed'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def entries(self, data):
+        return [(change['model'], change['id'], change['action']) for change in data['changes']]
+
+    def test_full_sync_pages_through_every_row(self):
+        first = self.feed(limit=2)
+        self.assertTrue(first['has_more'])
+        self.assertEqual(self.entries(first), [
+            ('department', self.department.pk, 'create'), ('employee', self.employee.pk, 'create'),
+        ])
+        employee = first['changes'][1]['data']
+        self.assertEqual((employee['name'], employee['department_id'], employee['salary']),
+                         ('Jane Smith', self.department.pk, '50000.00'))
+
+        rest = self.feed(since=first['cursor'], limit=2)
+        self.assertFalse(rest['has_more'])
+        self.assertEqual(self.entries(rest), [('attendance', self.attendance.pk, 'create')])
+        self.assertEqual(self.feed(since=rest['cursor']), {'changes': [], 'cursor': rest['cursor'], 'has_more': False})
+
+    def test_updates_and_tombstones_after_cursor(self):
+        cursor = self.feed()['cursor']
+        self.employee.name = 'Jane Doe'
+        self.employee.save()
+        review = Performance.objects.create(employee=self.employee, rating=4, review_date='2023-06-15')
+        review_id = review.pk
+        review.delete()
+
+        data = self.feed(since=cursor)
+        # The review's row is gone, so only its tombstone is served
+        self.assertEqual(self.entries(data), [
+            ('employee', self.employee.pk, 'update'), ('performance', review_id, 'delete'),
+        ])
+        self.assertEqual(data['changes'][0]['data']['name'], 'Jane Doe')
+        self.assertIsNone(data['changes'][1]['data'])
+
+    def test_cascaded_deletes_leave_tombstones(self):
+        cursor = self.feed()['cursor']
+        deleted = [
+            ('department', self.department.pk, 'delete'), ('employee', self.employee.pk, 'delete'),
+            ('attendance', self.attendance.pk, 'delete'),
+        ]
+        self.department.delete()
+        self.assertCountEqual(self.entries(self.feed(since=cursor)), deleted)
+
+    def test_late_commits_sort_after_cursor(self):
+        cursor = self.feed()['cursor']
+        # An entry inserted with a lower id than rows already served, as by a
+        # transaction that committed late
+        served = Change.objects.get(model='department').pk
+        Change.objects.filter(pk=served).delete()
+        Change.objects.create(pk=served, model='department', object_id=self.department.pk, action='update')
+
+        data = self.feed(since=cursor)
+        self.assertEqual(self.entries(data), [('department', self.department.pk, 'update')])
+        self.assertGreater(data['cursor'], cursor)
+
+    def test_bulk_upsert_is_logged(self):
+        cursor = self.feed()['cursor']
+        response = self.client.post(reverse('attendance-bulk-upsert'), [
+            {'employee': self.employee.pk, 'date': '2023-06-01', 'status': 'late'},
+            {'employee': self.employee.pk, 'date': '2023-06-02', 'status': 'present'},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        created = Attendance.objects.get(date='2023-06-02')
+        self.assertEqual(self.entries(self.feed(since=cursor)), [
+            ('attendance', self.attendance.pk, 'update'), ('attendance', created.pk, 'create'),
+        ])
+
+    def test_compaction_drops_superseded_entries_and_old_tombstones(self):
+        cursor = self.feed()['cursor']
+        self.employee.save()
+        self.attendance.delete()
+        seal_changes()
+        Change.objects.filter(action='delete').update(recorded_at=timezone.now() - timedelta(days=31))
+
+        out = StringIO()
+        call_command('compact_changes', stdout=out)
+        self.assertIn('Removed 2 superseded entries and 1 tombstones', out.getvalue())
+        self.assertEqual(self.entries(self.feed()), [
+            ('department', self.department.pk, 'create'), ('employee', self.employee.pk, 'update'),
+        ])
+        # The dropped tombstone came after this cursor
+        response = self.client.get(reverse('change-feed'), {'since': cursor})
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+
+    def test_recent_tombstones_survive_compaction(self):
+        cursor = self.feed()['cursor']
+        attendance_id = self.attendance.pk
+        self.attendance.delete()
+        seal_changes()
+        self.assertEqual(compact_changes(), (1, 0))
+        self.assertEqual(self.entries(self.feed(since=cursor)), [('attendance', attendance_id, 'delete')])
+
+    def test_seed_data_is_logged(self):
+        call_command('seed_data', employees=2, days=3, reviews_per_employee=1, seed=1, stdout=StringIO())
+        logged = Change.objects.filter(action='create')
+        for model in (Department, Employee, Attendance, Performance):
+            self.assertEqual(
+                logged.filter(model=model._meta.model_name).count(), model.objects.count(), model.__name__
+            )
+
+    def test_invalid_params(self):
+        url = reverse('change-feed')
+        self.assertEqual(self.client.get(url, {'since': -1}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url, {'limit': 100000}).status_code, status.HTTP_400_BAD_REQUEST)
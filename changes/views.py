@@ -0,0 +1,57 @@
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .log import changes_after, current_rows, get_changes_settings, get_horizon, seal_changes
+from .serializers import ChangeFeedQuerySerializer
+
+
+class ChangeFeedView(APIView):
+    """
+    Created, updated and deleted departments, employees, attendance and reviews, in commit order.
+
+    Omit `since` for a full sync: every live row, plus recent tombstones. Pass
+    the returned `cursor` as `since` to get what changed after it, and keep
+    going while `has_more` is true. `limit` caps the page (default 500).
+    Created and updated entries carry the row's current column values in
+    `data`; deleted ones carry none. A cursor older than the compacted
+    tombstones answers 410 Gone: sync again without `since`.
+    """
+
+    def get(self, request):
+        params = ChangeFeedQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        since = params.validated_data.get('since')
+        limit = params.validated_data.get('limit', get_changes_settings()['PAGE_SIZE'])
+
+        seal_changes()
+        entries = changes_after(since or 0, limit + 1)
+        # Read after the page: a compaction committing in between has either
+        # not removed the page's tombstones yet or already moved the horizon
+        if since is not None and since < get_horizon():
+            return Response(
+                {'detail': 'Changes since this cursor were compacted; sync again without `since`.'},
+                status=status.HTTP_410_GONE
+            )
+
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+        rows = current_rows(entries)
+        changes = []
+        for entry in entries:
+            data = rows.get((entry['model'], entry['object_id']))
+            if data is None and entry['action'] != 'delete':
+                # Deleted since; its tombstone follows later in the feed
+                continue
+            changes.append({
+                'sequence': entry['sequence'],
+                'model': entry['model'],
+                'id': entry['object_id'],
+                'action': entry['action'],
+                'recorded_at': entry['recorded_at'],
+                'data': data,
+            })
+        return Response({
+            'changes': changes,
+            'cursor': entries[-1]['sequence'] if entries else since or 0,
+            'has_more': has_more,
+        })
@@ -0,0 +1,222 @@
+"""
+Versioned response cache for the dashboard JSON endpoints.
+
+Every model an endpoint depends on has a version counter in the cache. Saving
+or deleting a row bumps that counter (see dashboard.signals), which changes
+the cache key of every response built from it, so cached responses are reused
+until the underlying data actually changes. Works with any Django cache
+backend that supports incr(), e.g. locmem or Redis.
+
+Entries keep the ETag and Last-Modified headers of the response they were
+built from, so a hit whose If-None-Match matches is answered with 304 without
+touching the database.
+"""
+import asyncio
+import hashlib
+import threading
+import time
+from functools import wraps
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils import timezone
+
+KEY_PREFIX = 'dashboard'
+STAT_NAMES = ('hits', 'misses', 'stale')
+# Response headers stored with an entry and replayed on hits
+STORED_HEADERS = ('ETag', 'Last-Modified', 'Cache-Control')
+
+
+def get_cache_settings():
+    return {
+        'CACHE_ALIAS': 'default',
+        'TIMEOUT': 300,
+        'STALE_WHILE_REVALIDATE': False,
+        'REFRESH_LOCK_TIMEOUT': 30,
+        **getattr(settings, 'DASHBOARD_CACHE', {}),
+    }
+
+
+def get_cache():
+    return caches[get_cache_settings()['CACHE_ALIAS']]
+
+
+def model_label(model):
+    return model._meta.label_lower
+
+
+def version_key(label):
+    return f'{KEY_PREFIX}:version:{label}'
+
+
+def stat_key(name):
+    return f'{KEY_PREFIX}:stats:{name}'
+
+
+def increment(key, initial=1):
+    """Atomically increment a counter, creating it with `initial` if it is missing"""
+    cache = get_cache()
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, initial, timeout=None):
+            return initial
+        return cache.incr(key)
+
+
+def bump_model_version(model):
+    """Invalidate every cached response built from the given model"""
+    # Seed with a timestamp so an evicted counter never reuses an old version
+    increment(version_key(model_label(model)), initial=time.time_ns())
+
+
+def get_model_versions(models):
+    cache = get_cache()
+    keys = [version_key(model_label(model)) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def record(name):
+    increment(stat_key(name))
+
+
+def get_cache_stats():
+    """Hit/miss/stale counters since the cache was last cleared"""
+    cache = get_cache()
+    values = cache.get_many([stat_key(name) for name in STAT_NAMES])
+    return {name: values.get(stat_key(name), 0) for name in STAT_NAMES}
+
+
+def reset_cache_stats():
+    get_cache().delete_many([stat_key(name) for name in STAT_NAMES])
+
+
+def request_fingerprint(view_name, request):
+    query = request.GET.urlencode()
+    digest = hashlib.md5(f'{request.path}?{query}'.encode(), usedforsecurity=False).hexdigest()
+    # Views read "today", so entries never outlive the day they were built on
+    return f'{KEY_PREFIX}:view:{view_name}:{digest}:{timezone.now().date().isoformat()}'
+
+
+def build_response(request, entry, cache_status):
+    response = HttpResponse(entry['content'], content_type=entry['content_type'])
+    for name, value in entry.get('headers', {}).items():
+        response[name] = value
+    if 'ETag' in response:
+        response = get_conditional_response(request, etag=response['ETag'], response=response)
+    response['X-Dashboard-Cache'] = cache_status
+    return response
+
+
+def store_response(response, key, latest_key, versions, timeout):
+    entry = {
+        'content': response.content,
+        'content_type': response['Content-Type'],
+        'headers': {name: response[name] for name in STORED_HEADERS if name in response},
+        'versions': versions,
+    }
+    cache = get_cache()
+    cache.set(key, entry, timeout)
+    if latest_key:
+        cache.set(latest_key, entry, timeout)
+
+
+def refresh_in_background(view_func, request, args, kwargs, key, latest_key, versions, timeout):
+    """Rebuild a stale entry on a worker thread; only one refresh per key at a time"""
+    config = get_cache_settings()
+    lock_key = f'{key}:refreshing'
+    if not get_cache().add(lock_key, 1, timeout=config['REFRESH_LOCK_TIMEOUT']):
+        return
+
+    def refresh():
+        try:
+            response = view_func(request, *args, **kwargs)
+            if response.status_code == 200:
+                store_response(response, key, latest_key, versions, timeout)
+        finally:
+            get_cache().delete(lock_key)
+            connections.close_all()
+
+    threading.Thread(target=refresh, daemon=True).start()
+
+
+def cached_json_view(*models, timeout=None):
+    """
+    Cache a GET JSON view until one of the given models changes.
+
+    With DASHBOARD_CACHE['STALE_WHILE_REVALIDATE'] enabled, a request whose
+    versioned entry is missing is answered from the last response built for
+    the same URL while a background thread refills the cache.
+
+    Async views stay coroutines: only the cache lookup and store hop to a
+    worker thread, and the view is awaited on the event loop, so no thread
+    is held while it runs.
+    """
+    def decorator(view_func):
+        view_name = f'{view_func.__module__}.{view_func.__name__}'
+        is_async = asyncio.iscoroutinefunction(view_func)
+        sync_view = async_to_sync(view_func) if is_async else view_func
+
+        def lookup(request, args, kwargs):
+            """(cached response, None) on a hit, or (None, arguments for store()) on a miss"""
+            config = get_cache_settings()
+            entry_timeout = timeout if timeout is not None else config['TIMEOUT']
+            versions = get_model_versions(models)
+            fingerprint = request_fingerprint(view_name, request)
+            key = f'{fingerprint}:' + '.'.join(str(version) for version in versions)
+            latest_key = f'{fingerprint}:latest' if config['STALE_WHILE_REVALIDATE'] else None
+
+            cache = get_cache()
+            entry = cache.get(key)
+            if entry is not None:
+                record('hits')
+                return build_response(request, entry, 'HIT'), None
+
+            if latest_key:
+                stale_entry = cache.get(latest_key)
+                if stale_entry is not None:
+                    record('stale')
+                    refresh_in_background(
+                        sync_view, request, args, kwargs, key, latest_key, versions, entry_timeout
+                    )
+                    return build_response(request, stale_entry, 'STALE'), None
+
+            record('misses')
+            return None, (key, latest_key, versions, entry_timeout)
+
+        def store(response, store_args):
+            if response.status_code == 200:
+                store_response(response, *store_args)
+                response['X-Dashboard-Cache'] = 'MISS'
+            return response
+
+        if is_async:
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method != 'GET':
+                    return await view_func(request, *args, **kwargs)
+                cached, store_args = await sync_to_async(lookup)(request, args, kwargs)
+                if cached is not None:
+                    return cached
+                response = await view_func(request, *args, **kwargs)
+                return await sync_to_async(store)(response, store_args)
+            return async_wrapper
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET':
+                return view_func(request, *args, **kwargs)
+            cached, store_args = lookup(request, args, kwargs)
+            if cached is not None:
+                return cached
+            return store(view_func(request, *args, **kwargs), store_args)
+        return wrapper
+    return decorator
@@ -0,0 +1,75 @@
+"""
+Concurrent query fan-out for the async dashboard views.
+
+Django's async ORM methods (acount(), aaggregate(), async iteration) hand
+each query to one shared thread, so awaiting several of them with
+asyncio.gather() still runs them back to back. gather_queries() runs every
+query coroutine on a small dedicated thread pool instead: the async ORM
+calls of a coroutine execute on the pool thread that runs it, each pool
+thread holds its own database connection, and independent queries overlap
+so a batch takes about as long as its slowest query.
+
+The pool size is DASHBOARD_QUERY_CONCURRENCY; 1 awaits the queries one by
+one in the calling context.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+_pool = None
+_pool_size = None
+_pool_lock = threading.Lock()
+
+
+def get_concurrency():
+    return max(getattr(settings, 'DASHBOARD_QUERY_CONCURRENCY', 4), 1)
+
+
+def get_pool():
+    global _pool, _pool_size
+    size = get_concurrency()
+    with _pool_lock:
+        if _pool_size != size:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ThreadPoolExecutor(max_workers=size, thread_name_prefix='dashboard-query')
+            _pool_size = size
+        return _pool
+
+
+def run_on_worker(query):
+    """Run a query coroutine function to completion on the current pool thread"""
+    async def run():
+        # Manager proxies such as Employee.objects.acount are plain functions returning coroutines
+        return await query()
+
+    try:
+        return async_to_sync(run)()
+    finally:
+        # Pool threads outlive requests; apply CONN_MAX_AGE like request_finished does
+        close_old_connections()
+
+
+async def gather_queries(*queries):
+    """
+    Await zero-argument coroutine functions concurrently and return their results in order.
+
+    e.g. `total, avg = await gather_queries(Employee.objects.acount,
+    partial(Performance.objects.aaggregate, avg=Avg('rating')))`
+    """
+    if get_concurrency() == 1 or len(queries) < 2:
+        return [await query() for query in queries]
+
+    pool = get_pool()
+    return await asyncio.gather(*(
+        sync_to_async(run_on_worker, thread_sensitive=False, executor=pool)(query)
+        for query in queries
+    ))
+
+
+async def alist(queryset):
+    """Evaluate a queryset with async iteration"""
+    return [obj async for obj in queryset]
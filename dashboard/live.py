@@ -0,0 +1,346 @@
+"""
+Live attendance feed for the dashboard.
+
+Attendance saves and deletes become events (see dashboard.signals):
+
+- `delta`: changes to today's present/absent/late/half_day/total counters
+- `check_in`: a check-in recorded for today
+- `snapshot`: the full counters, sent to new subscribers and after bulk writes
+
+Events reach the `/dashboard/api/live/` Server-Sent Events stream through an
+in-process broker. With DASHBOARD_LIVE['BACKEND'] = 'postgres' they are sent
+with PostgreSQL NOTIFY instead and a LISTEN thread in every process feeds its
+local broker, so all server processes see every change.
+
+Today's counters are held in memory and updated from the events, so
+subscribers connect without querying the database. They are recomputed at
+most every RESYNC_INTERVAL seconds to correct drift from writes that bypass
+model signals, such as queryset.update().
+"""
+import asyncio
+import json
+import logging
+import queue
+import select
+import threading
+import time
+from functools import partial
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, connections, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+COUNTERS = ('present', 'absent', 'late', 'half_day', 'total')
+
+
+def get_live_settings():
+    return {
+        'BACKEND': 'local',
+        'CHANNEL': 'dashboard_live',
+        'KEEPALIVE': 15,
+        'RESYNC_INTERVAL': 300,
+        'QUEUE_SIZE': 100,
+        **getattr(settings, 'DASHBOARD_LIVE', {}),
+    }
+
+
+def today_counts():
+    """Today's attendance counters from the database (one aggregate query)"""
+    from attendance.models import Attendance
+    aggregates = {
+        status: Count('id', filter=Q(status=status)) for status in COUNTERS if status != 'total'
+    }
+    return Attendance.objects.filter(date=timezone.now().date()).aggregate(total=Count('id'), **aggregates)
+
+
+class TodayCounters:
+    """Today's counters, kept current from delta events and resynced periodically"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.date = None
+        self.counts = None
+        self.synced_at = 0.0
+
+    def reset(self):
+        with self.lock:
+            self.date, self.counts, self.synced_at = None, None, 0.0
+
+    def current(self):
+        """The counters as a snapshot event, querying only when they are missing or due a resync"""
+        today = timezone.now().date().isoformat()
+        interval = get_live_settings()['RESYNC_INTERVAL']
+        with self.lock:
+            fresh = self.date == today and time.monotonic() - self.synced_at < interval
+            if fresh:
+                return snapshot_event(today, self.counts)
+        return self.set(today, today_counts())
+
+    def set(self, day, counts):
+        with self.lock:
+            self.date, self.counts, self.synced_at = day, dict(counts), time.monotonic()
+            return snapshot_event(day, self.counts)
+
+    def apply(self, event):
+        with self.lock:
+            if event['type'] == 'snapshot':
+                self.date, self.counts, self.synced_at = event['date'], {
+                    name: event[name] for name in COUNTERS
+                }, time.monotonic()
+            elif event['type'] == 'delta' and event['date'] == self.date:
+                for name in COUNTERS:
+                    self.counts[name] += event.get(name, 0)
+
+
+def snapshot_event(day, counts):
+    return {'type': 'snapshot', 'date': day, **{name: counts[name] for name in COUNTERS}}
+
+
+class SyncSubscription:
+    """Subscriber queue read from a worker thread (WSGI)"""
+
+    def __init__(self, size):
+        self.queue = queue.Queue(maxsize=size)
+        self.overflowed = False
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.overflowed = True
+
+    def get(self, timeout):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class AsyncSubscription:
+    """Subscriber queue read from an event loop (ASGI); put() may be called from any thread"""
+
+    def __init__(self, size):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=size)
+        self.overflowed = False
+
+    def put(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # The client's event loop has closed; nothing will read this queue again
+            self.overflowed = True
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self, timeout):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class Broker:
+    """In-process pub/sub fanning events out to every subscriber"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = set()
+        self.counters = TodayCounters()
+
+    def subscribe(self, subscription):
+        with self.lock:
+            self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscribers.discard(subscription)
+
+    def dispatch(self, event):
+        self.counters.apply(event)
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for subscription in subscribers:
+            subscription.put(event)
+            # Dead or lagging streams end themselves; drop them here too in
+            # case their loop closed before their cleanup could run
+            if subscription.overflowed:
+                self.unsubscribe(subscription)
+
+
+broker = Broker()
+
+
+class PostgresListener(threading.Thread):
+    """Feeds NOTIFY payloads on the live channel into the local broker"""
+
+    def __init__(self, channel):
+        super().__init__(name='dashboard-live-listener', daemon=True)
+        self.channel = channel
+
+    def run(self):
+        backoff = 1
+        while True:
+            try:
+                self.listen()
+            except Exception:
+                logger.exception('Live feed listener lost its connection; reconnecting')
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+
+    def listen(self):
+        # A dedicated connection: never one from the pool, which would be held forever
+        wrapper = connections.create_connection('default')
+        raw = wrapper.Database.connect(**wrapper.get_connection_params())
+        try:
+            raw.autocommit = True
+            with raw.cursor() as cursor:
+                cursor.execute(f'LISTEN "{self.channel}"')
+            # Events sent while disconnected are lost; resync the counters
+            broker.counters.reset()
+            for payload in notify_payloads(raw):
+                broker.dispatch(json.loads(payload))
+        finally:
+            raw.close()
+
+
+def notify_payloads(raw):
+    """Yield NOTIFY payloads received on a psycopg 3 or psycopg2 connection, forever"""
+    if not hasattr(raw, 'poll'):
+        while True:
+            for notify in raw.notifies(timeout=5):
+                yield notify.payload
+    while True:
+        if select.select([raw], [], [], 5) == ([], [], []):
+            continue
+        raw.poll()
+        while raw.notifies:
+            yield raw.notifies.pop(0).payload
+
+
+_listener = None
+_listener_lock = threading.Lock()
+
+
+def ensure_listener():
+    """Start this process's LISTEN thread when the postgres backend is configured"""
+    global _listener
+    config = get_live_settings()
+    if config['BACKEND'] != 'postgres':
+        return
+    with _listener_lock:
+        if _listener is None:
+            _listener = PostgresListener(config['CHANNEL'])
+            _listener.start()
+
+
+def publish(event):
+    """Send an event to every subscriber once the current transaction commits"""
+    config = get_live_settings()
+    if config['BACKEND'] == 'postgres' and connection.vendor == 'postgresql':
+        # NOTIFY is delivered on commit and dropped on rollback
+        payload = json.dumps(event, cls=DjangoJSONEncoder)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [config['CHANNEL'], payload])
+    else:
+        event = json.loads(json.dumps(event, cls=DjangoJSONEncoder))
+        transaction.on_commit(partial(broker.dispatch, event))
+
+
+def publish_snapshot():
+    """Recompute today's counters and send them, e.g. after a bulk write that skips signals"""
+    publish(snapshot_event(timezone.now().date().isoformat(), today_counts()))
+
+
+def attendance_changed(previous, current):
+    """
+    Publish the events for an attendance row changing from `previous` to `current`.
+
+    Both are dicts with date, status and check_in_time (plus employee and
+    employee_id for `current`), or None for a created or deleted row.
+    """
+    today = timezone.now().date()
+    delta = dict.fromkeys(COUNTERS, 0)
+    for state, sign in ((previous, -1), (current, 1)):
+        if state and state['date'] == today:
+            delta['total'] += sign
+            if state['status'] in delta:
+                delta[state['status']] += sign
+    if any(delta.values()):
+        publish({'type': 'delta', 'date': today, **delta})
+
+    checked_in = current and current['date'] == today and current['check_in_time']
+    was_checked_in = previous and previous['date'] == today and previous['check_in_time']
+    if checked_in and not was_checked_in:
+        publish({
+            'type': 'check_in',
+            'date': today,
+            'employee_id': current['employee_id'],
+            'employee': current['employee'],
+            'status': current['status'],
+            'check_in_time': current['check_in_time'],
+        })
+
+
+def format_event(event):
+    return f"event: {event['type']}\ndata: {json.dumps(event, cls=DjangoJSONEncoder)}\n\n"
+
+
+def stream_preamble(snapshot):
+    return f"retry: 3000\n\n{format_event(snapshot)}"
+
+
+def sync_event_stream():
+    """SSE chunks for a WSGI worker thread; holds the thread for the life of the stream"""
+    config = get_live_settings()
+    ensure_listener()
+    subscription = broker.subscribe(SyncSubscription(config['QUEUE_SIZE']))
+    try:
+        snapshot = broker.counters.current()
+        yield stream_preamble(snapshot)
+        while not subscription.overflowed:
+            event = subscription.get(config['KEEPALIVE'])
+            if event is None:
+                # Idle: keep proxies from closing the connection, and pick up a resync
+                latest = broker.counters.current()
+                if latest != snapshot:
+                    snapshot = latest
+                    yield format_event(latest)
+                else:
+                    yield ': keepalive\n\n'
+                continue
+            yield format_event(event)
+    finally:
+        broker.unsubscribe(subscription)
+
+
+async def async_event_stream():
+    """SSE chunks for an ASGI event loop; idle subscribers cost no thread"""
+    from asgiref.sync import sync_to_async
+    config = get_live_settings()
+    ensure_listener()
+    subscription = broker.subscribe(AsyncSubscription(config['QUEUE_SIZE']))
+    try:
+        snapshot = await sync_to_async(broker.counters.current)()
+        yield stream_preamble(snapshot)
+        while not subscription.overflowed:
+            event = await subscription.get(config['KEEPALIVE'])
+            if event is None:
+                latest = await sync_to_async(broker.counters.current)()
+                if latest != snapshot:
+                    snapshot = latest
+                    yield format_event(latest)
+                else:
+                    yield ': keepalive\n\n'
+                continue
+            yield format_event(event)
+    finally:
+        broker.unsubscribe(subscription)
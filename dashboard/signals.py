@@ -0,0 +1,47 @@
+from django.db.models.signals import post_delete, post_save
+from employees.models import Department, Employee
+from attendance.models import Attendance
+from performance.models import Performance
+from . import live
+from .cache import bump_model_version
+
+CACHED_MODELS = [Department, Employee, Attendance, Performance]
+
+
+def invalidate_dashboard_cache(sender, **kwargs):
+    bump_model_version(sender)
+
+
+for model in CACHED_MODELS:
+    post_save.connect(
+        invalidate_dashboard_cache, sender=model,
+        dispatch_uid=f'dashboard_cache_{model.__name__}_save'
+    )
+    post_delete.connect(
+        invalidate_dashboard_cache, sender=model,
+        dispatch_uid=f'dashboard_cache_{model.__name__}_delete'
+    )
+
+
+def attendance_state(instance):
+    return {'date': instance.date, 'status': instance.status, 'check_in_time': instance.check_in_time}
+
+
+def publish_attendance_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # attendance.signals stores the row as it was before the save
+    current = {
+        **attendance_state(instance),
+        'employee_id': instance.employee_id,
+        'employee': instance.employee.name,
+    }
+    live.attendance_changed(getattr(instance, '_previous_state', None), current)
+
+
+def publish_attendance_delete(sender, instance, **kwargs):
+    live.attendance_changed(attendance_state(instance), None)
+
+
+post_save.connect(publish_attendance_save, sender=Attendance, dispatch_uid='dashboard_live_attendance_save')
+post_delete.connect(publish_attendance_delete, sender=Attendance, dispatch_uid='dashboard_live_attendance_delete')
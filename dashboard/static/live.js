@@ -0,0 +1,36 @@
+// Today's attendance pushed from /dashboard/api/live/ (Server-Sent Events).
+// onCounts receives {date, present, absent, late, half_day, total} after the
+// initial snapshot and every change; onCheckIn receives each new check-in.
+// EventSource reconnects by itself and every connection starts with a snapshot.
+function subscribeTodayAttendance(onCounts, onCheckIn) {
+    const counters = ['present', 'absent', 'late', 'half_day', 'total'];
+    let counts = null;
+    const source = new EventSource('/dashboard/api/live/');
+
+    source.addEventListener('snapshot', event => {
+        counts = JSON.parse(event.data);
+        onCounts(counts);
+    });
+    source.addEventListener('delta', event => {
+        const delta = JSON.parse(event.data);
+        if (!counts || counts.date !== delta.date) return;
+        counters.forEach(key => { counts[key] += delta[key]; });
+        onCounts(counts);
+    });
+    if (onCheckIn) {
+        source.addEventListener('check_in', event => onCheckIn(JSON.parse(event.data)));
+    }
+    return source;
+}
+
+// Write today's counters into the bar for today in a chart built from
+// /dashboard/api/attendance-chart/ (datasets labelled Present/Absent/Late).
+function updateTodayBar(chart, counts) {
+    const index = chart.data.labels.indexOf(counts.date);
+    if (index === -1) return;
+    chart.data.datasets.forEach(dataset => {
+        const key = dataset.label.toLowerCase();
+        if (key in counts) dataset.data[index] = counts[key];
+    });
+    chart.update();
+}
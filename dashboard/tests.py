@@ -1,3 +1,298 @@
-from django.test import TestCase
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.http import JsonResponse
+from django.urls import reverse
+from unittest import mock
+from django.utils import timezone
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from asgiref.sync import async_to_sync, sync_to_async
+from employees.models import Employee, Department
+from attendance.models import Attendance
+from performance.models import Performance
+from .cache import cached_json_view, get_cache, get_cache_stats
+from .concurrency import gather_queries
+from .live import AsyncSubscription, SyncSubscription, broker
+from datetime import time as clock, timedelta
+import asyncio
+import json
+import threading
+import time
 
 # Create your tests here.
+
+class AttendanceChartTests(TestCase):
+    def setUp(self):
+        self.department = Department.objects.create(name='Engineering')
+        self.employee = Employee.objects.create(
+            name='John Doe', email='john@example.com', phone_number='1234567890',
+            address='123 Main St', date_of_joining='2023-01-01', department=self.department
+        )
+        self.today = timezone.now().date()
+        Attendance.objects.create(employee=self.employee, date=self.today, status='present')
+
+    def test_attendance_chart_single_aggregate_query(self):
+        # The conditional GET probe, one rollup coverage probe and the GROUP BY date aggregate
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('attendance_chart_data'))
+        data = response.json()
+        self.assertEqual(len(data['labels']), len(data['datasets'][0]['data']))
+        self.assertEqual([dataset['label'] for dataset in data['datasets']], ['Present', 'Absent', 'Late'])
+        today_label = self.today.strftime('%Y-%m-%d')
+        if self.today.weekday() < 5:
+            index = data['labels'].index(today_label)
+            self.assertEqual(data['datasets'][0]['data'][index], 1)
+        else:
+            self.assertNotIn(today_label, data['labels'])
+
+
+class DashboardCacheTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.department = Department.objects.create(name='Engineering')
+        self.employee = Employee.objects.create(
+            name='John Doe', email='john@example.com', phone_number='1234567890',
+            address='123 Main St', date_of_joining='2023-01-01', department=self.department
+        )
+
+    def test_response_cached_until_model_changes(self):
+        url = reverse('department_chart_data')
+        first = self.client.get(url)
+        self.assertEqual(first['X-Dashboard-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertEqual(second['X-Dashboard-Cache'], 'HIT')
+        self.assertEqual(first.content, second.content)
+
+        Department.objects.create(name='Sales')
+        third = self.client.get(url)
+        self.assertEqual(third['X-Dashboard-Cache'], 'MISS')
+        self.assertIn('Sales', third.json()['labels'])
+        self.assertEqual(get_cache_stats(), {'hits': 1, 'misses': 2, 'stale': 0})
+
+    def test_cache_hit_answers_not_modified_without_queries(self):
+        url = reverse('department_chart_data')
+        first = self.client.get(url)
+        self.assertIn('ETag', first)
+        with self.assertNumQueries(0):
+            second = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertEqual(second['X-Dashboard-Cache'], 'HIT')
+
+        Department.objects.create(name='Sales')
+        third = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(third.status_code, 200)
+        self.assertNotEqual(third['ETag'], first['ETag'])
+
+    def test_cache_miss_answers_not_modified_from_probe(self):
+        url = reverse('performance_chart_data')
+        etag = self.client.get(url)['ETag']
+        get_cache().clear()
+        # The probe alone; the chart aggregate never runs
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_unrelated_model_change_keeps_cache(self):
+        url = reverse('performance_chart_data')
+        self.client.get(url)
+        Attendance.objects.create(employee=self.employee, date='2023-06-01', status='present')
+        self.assertEqual(self.client.get(url)['X-Dashboard-Cache'], 'HIT')
+
+    @override_settings(DASHBOARD_CACHE={'STALE_WHILE_REVALIDATE': True})
+    def test_stale_while_revalidate_serves_previous_response(self):
+        url = reverse('dashboard_stats')
+        self.client.get(url)
+        Employee.objects.create(
+            name='Jane Roe', email='jane@example.com', phone_number='1234567890',
+            address='123 Main St', date_of_joining='2023-01-01', department=self.department
+        )
+        with mock.patch('dashboard.cache.refresh_in_background') as refresh:
+            with self.assertNumQueries(0):
+                response = self.client.get(url)
+        self.assertEqual(response['X-Dashboard-Cache'], 'STALE')
+        self.assertEqual(response.json()['overall']['total_employees'], 1)
+        refresh.assert_called_once()
+
+
+@override_settings(DASHBOARD_QUERY_CONCURRENCY=4)
+class AsyncDashboardTests(TransactionTestCase):
+    """Async endpoints; committed data so the query pool's connections can see it"""
+
+    def setUp(self):
+        get_cache().clear()
+        department = Department.objects.create(name='Engineering')
+        today = timezone.now().date()
+        for i in range(3):
+            employee = Employee.objects.create(
+                name=f'Employee {i}', email=f'employee{i}@example.com', phone_number='1234567890',
+                address='123 Main St', date_of_joining='2023-01-01', department=department,
+                is_active=i > 0
+            )
+            Attendance.objects.create(employee=employee, date=today, status=['present', 'late', 'absent'][i])
+            Performance.objects.create(
+                employee=employee, rating=i + 3, review_date=today, next_review_date=today
+            )
+
+    def test_async_endpoints_match_sync(self):
+        for name in ['dashboard_stats', 'department_chart_data', 'attendance_chart_data', 'performance_chart_data']:
+            with self.subTest(name=name):
+                expected = self.client.get(reverse(name))
+                response = self.client.get(reverse(f'async_{name}'))
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json(), expected.json())
+        stats = self.client.get(reverse('async_dashboard_stats')).json()
+        self.assertEqual(stats['overall']['active_employees'], 2)
+        self.assertEqual(stats['today_attendance'], {'present': 1, 'absent': 1, 'late': 1, 'total': 3})
+
+    def test_async_responses_cached(self):
+        url = reverse('async_dashboard_stats')
+        self.assertEqual(self.client.get(url)['X-Dashboard-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url)['X-Dashboard-Cache'], 'HIT')
+
+    async def test_async_views_hold_no_thread_while_running(self):
+        started = {'a': asyncio.Event(), 'b': asyncio.Event()}
+
+        @cached_json_view(Department)
+        async def view(request, name, other):
+            started[name].set()
+            # Only returns if the other request's view could start meanwhile
+            await asyncio.wait_for(started[other].wait(), 2)
+            return JsonResponse({'name': name})
+
+        factory = RequestFactory()
+        responses = await asyncio.gather(
+            view(factory.get('/a/'), 'a', 'b'), view(factory.get('/b/'), 'b', 'a')
+        )
+        self.assertEqual([response['X-Dashboard-Cache'] for response in responses], ['MISS', 'MISS'])
+
+    async def test_async_requests_profiled(self):
+        url = reverse('async_department_chart_data')
+        first = await self.async_client.get(url)
+        self.assertEqual(first['X-Dashboard-Cache'], 'MISS')
+        self.assertRegex(first['Server-Timing'], r'desc="[1-9]\d* queries"')
+        second = await self.async_client.get(url)
+        self.assertEqual(second['X-Dashboard-Cache'], 'HIT')
+        self.assertIn('desc="0 queries"', second['Server-Timing'])
+
+    def test_gather_queries_overlap(self):
+        threads = []
+
+        def blocking_query():
+            # Thread-sensitive ORM work runs here, on the pool thread
+            time.sleep(0.2)
+            threads.append(threading.current_thread().name)
+
+        def make_query(value):
+            async def query():
+                await sync_to_async(blocking_query)()
+                return value
+            return query
+
+        started = time.perf_counter()
+        results = async_to_sync(gather_queries)(*(make_query(value) for value in range(4)))
+        self.assertLess(time.perf_counter() - started, 0.6)
+        self.assertEqual(results, [0, 1, 2, 3])
+        self.assertEqual(len(set(threads)), 4)
+        self.assertTrue(all(name.startswith('dashboard-query') for name in threads))
+
+
+class LiveAttendanceTests(TestCase):
+    def setUp(self):
+        self.department = Department.objects.create(name='Engineering')
+        self.employee = Employee.objects.create(
+            name='John Doe', email='john@example.com', phone_number='1234567890',
+            address='123 Main St', date_of_joining='2023-01-01', department=self.department
+        )
+        self.today = timezone.now().date()
+        broker.counters.reset()
+        self.subscription = broker.subscribe(SyncSubscription(100))
+        self.addCleanup(broker.unsubscribe, self.subscription)
+
+    def events(self):
+        events = []
+        while (event := self.subscription.get(0)) is not None:
+            events.append(event)
+        return events
+
+    def test_save_and_delete_publish_deltas(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            attendance = Attendance.objects.create(employee=self.employee, date=self.today, status='absent')
+        delta, = self.events()
+        self.assertEqual(delta['type'], 'delta')
+        self.assertEqual((delta['absent'], delta['present'], delta['total']), (1, 0, 1))
+
+        attendance.status = 'late'
+        attendance.check_in_time = clock(9, 45)
+        with self.captureOnCommitCallbacks(execute=True):
+            attendance.save()
+        delta, check_in = self.events()
+        self.assertEqual((delta['absent'], delta['late'], delta['total']), (-1, 1, 0))
+        self.assertEqual(check_in['type'], 'check_in')
+        self.assertEqual(check_in['employee'], 'John Doe')
+        self.assertEqual(check_in['check_in_time'], '09:45:00')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            attendance.delete()
+        delta, = self.events()
+        self.assertEqual((delta['late'], delta['total']), (-1, -1))
+
+    def test_other_days_publish_nothing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.create(
+                employee=self.employee, date=self.today - timedelta(days=1),
+                status='present', check_in_time=clock(9, 0)
+            )
+        self.assertEqual(self.events(), [])
+
+    def test_stream_starts_with_snapshot_from_memory(self):
+        Attendance.objects.create(employee=self.employee, date=self.today, status='present')
+        url = reverse('dashboard_live')
+        with self.assertNumQueries(1):
+            first = self.client.get(url)
+            first_chunk = next(iter(first.streaming_content)).decode()
+        self.assertEqual(first['Content-Type'], 'text/event-stream')
+        self.assertIn('event: snapshot', first_chunk)
+        snapshot = json.loads(first_chunk.split('data: ', 1)[1])
+        self.assertEqual((snapshot['date'], snapshot['present'], snapshot['total']), (self.today.isoformat(), 1, 1))
+
+        # Later subscribers are served from the in-memory counters
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+            self.assertEqual(next(iter(second.streaming_content)).decode(), first_chunk)
+        first.close()
+        second.close()
+
+    def test_deltas_keep_counters_current(self):
+        broker.counters.current()
+        with self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.create(employee=self.employee, date=self.today, status='half_day')
+        with self.assertNumQueries(0):
+            snapshot = broker.counters.current()
+        self.assertEqual((snapshot['half_day'], snapshot['total']), (1, 1))
+
+    def test_closed_stream_loop_does_not_break_writes(self):
+        async def subscribe():
+            return broker.subscribe(AsyncSubscription(100))
+        # The loop is closed once asyncio.run() returns, as after a client disconnects
+        dead = asyncio.run(subscribe())
+        self.addCleanup(broker.unsubscribe, dead)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.create(employee=self.employee, date=self.today, status='present')
+        self.assertTrue(dead.overflowed)
+        self.assertNotIn(dead, broker.subscribers)
+        delta, = self.events()
+        self.assertEqual(delta['present'], 1)
+
+    def test_bulk_upsert_publishes_snapshot(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('admin', password='x'))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(reverse('attendance-bulk-upsert'), [
+                {'employee': self.employee.pk, 'date': self.today.isoformat(), 'status': 'present'},
+            ], format='json')
+        self.assertEqual(response.status_code, 200)
+        snapshot, = self.events()
+        self.assertEqual((snapshot['type'], snapshot['present'], snapshot['total']), ('snapshot', 1, 1))
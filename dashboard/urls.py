@@ -7,5 +7,11 @@ urlpatterns = [
     path('api/attendance-chart/', views.attendance_chart_data, name='attendance_chart_data'),
     path('api/performance-chart/', views.performance_chart_data, name='performance_chart_data'),
     path('api/stats/', views.dashboard_stats, name='dashboard_stats'),
+    path('api/async/department-chart/', views.async_department_chart_data, name='async_department_chart_data'),
+    path('api/async/attendance-chart/', views.async_attendance_chart_data, name='async_attendance_chart_data'),
+    path('api/async/performance-chart/', views.async_performance_chart_data, name='async_performance_chart_data'),
+    path('api/async/stats/', views.async_dashboard_stats, name='async_dashboard_stats'),
+    path('api/live/', views.live_attendance, name='dashboard_live'),
+    path('api/cache-stats/', views.cache_stats, name='dashboard_cache_stats'),
     path('attendance/', views.attendance_overview, name='attendance_overview'),
 ] 
\ No newline at end of file
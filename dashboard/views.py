@@ -1,11 +1,19 @@
 from django.shortcuts import render
-from django.http import JsonResponse
+from django.core.handlers.wsgi import WSGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
 from django.db.models import Count, Avg
 from employees.models import Department, Employee
 from attendance.models import Attendance
+from attendance.utils import daily_status_counts, month_bounds
 from performance.models import Performance
 from django.utils import timezone
+from asgiref.sync import sync_to_async
 from datetime import datetime, timedelta
+from functools import partial
+from manage_system.conditional import conditional_json_view
+from .cache import cached_json_view, get_cache_stats
+from .concurrency import alist, gather_queries
+from .live import async_event_stream, sync_event_stream
 
 
 def dashboard(request):
@@ -13,13 +21,14 @@ def dashboard(request):
     return render(request, 'dashboard/dashboard.html')
 
 
-def department_chart_data(request):
-    """API endpoint for department employee count chart"""
-    departments = Department.objects.annotate(
+def department_chart_queryset():
+    return Department.objects.annotate(
         employee_count=Count('employees')
     ).values('name', 'employee_count')
-    
-    data = {
+
+
+def department_chart_payload(departments):
+    return {
         'labels': [dept['name'] for dept in departments],
         'data': [dept['employee_count'] for dept in departments],
         'backgroundColor': [
@@ -27,38 +36,29 @@ def department_chart_data(request):
             '#9966FF', '#FF9F40', '#FF6384', '#C9CBCF'
         ]
     }
-    
-    return JsonResponse(data)
 
 
-def attendance_chart_data(request):
-    """API endpoint for monthly attendance overview chart"""
+@cached_json_view(Department, Employee)
+@conditional_json_view(Department, Employee)
+def department_chart_data(request):
+    """API endpoint for department employee count chart"""
+    return JsonResponse(department_chart_payload(department_chart_queryset()))
+
+
+def current_month_daily_stats():
     # Get current month data
     current_month = timezone.now().month
     current_year = timezone.now().year
     
-    # Get daily attendance counts for the current month
-    daily_stats = []
-    start_date = datetime(current_year, current_month, 1).date()
-    
-    if current_month == 12:
-        end_date = datetime(current_year + 1, 1, 1).date() - timedelta(days=1)
-    else:
-        end_date = datetime(current_year, current_month + 1, 1).date() - timedelta(days=1)
-    
-    current_date = start_date
-    while current_date <= end_date:
-        # Skip weekends
-        if current_date.weekday() < 5:
-            day_attendances = Attendance.objects.filter(date=current_date)
-            daily_stats.append({
-                'date': current_date.strftime('%Y-%m-%d'),
-                'present': day_attendances.filter(status='present').count(),
-                'absent': day_attendances.filter(status='absent').count(),
-                'late': day_attendances.filter(status='late').count(),
-                'total': day_attendances.count()
-            })
-        current_date += timedelta(days=1)
+    start_date, end_date = month_bounds(current_year, current_month)
+    return daily_status_counts(
+        Attendance.objects.all(), start_date, end_date, skip_weekends=True, use_rollups=True
+    )
+
+
+def attendance_chart_payload(daily_stats):
+    for stat in daily_stats:
+        stat['date'] = stat['date'].strftime('%Y-%m-%d')
     
     # Prepare data for chart
     dates = [stat['date'] for stat in daily_stats]
@@ -92,17 +92,23 @@ def attendance_chart_data(request):
             }
         ]
     }
-    
-    return JsonResponse(data)
+    return data
 
 
-def performance_chart_data(request):
-    """API endpoint for performance rating distribution chart"""
-    # Get performance rating distribution
-    rating_distribution = Performance.objects.values('rating').annotate(
+@cached_json_view(Attendance)
+@conditional_json_view(Attendance.objects.current_month)
+def attendance_chart_data(request):
+    """API endpoint for monthly attendance overview chart"""
+    return JsonResponse(attendance_chart_payload(current_month_daily_stats()))
+
+
+def rating_distribution_queryset():
+    return Performance.objects.values('rating').annotate(
         count=Count('id')
     ).order_by('rating')
-    
+
+
+def performance_chart_payload(rating_distribution):
     rating_labels = {
         1: 'Poor',
         2: 'Below Average',
@@ -120,51 +126,55 @@ def performance_chart_data(request):
         labels.append(rating_labels.get(rating, f'Rating {rating}'))
         data.append(rating_data['count'])
     
-    chart_data = {
+    return {
         'labels': labels,
         'data': data,
         'backgroundColor': colors[:len(labels)]
     }
-    
-    return JsonResponse(chart_data)
 
 
-def dashboard_stats(request):
-    """API endpoint for dashboard statistics"""
-    # Overall statistics
-    total_employees = Employee.objects.count()
-    active_employees = Employee.objects.filter(is_active=True).count()
-    total_departments = Department.objects.count()
-    
-    # Today's attendance
+@cached_json_view(Performance)
+@conditional_json_view(Performance)
+def performance_chart_data(request):
+    """API endpoint for performance rating distribution chart"""
+    # Get performance rating distribution
+    return JsonResponse(performance_chart_payload(rating_distribution_queryset()))
+
+
+def dashboard_stats_querysets():
+    """The independent querysets behind dashboard_stats: counts and recent activity lists"""
     today = timezone.now().date()
     today_attendance = Attendance.objects.filter(date=today)
-    present_today = today_attendance.filter(status='present').count()
-    absent_today = today_attendance.filter(status='absent').count()
-    late_today = today_attendance.filter(status='late').count()
-    
-    # Performance statistics
-    avg_performance = Performance.objects.aggregate(
-        avg_rating=Avg('rating')
-    )['avg_rating'] or 0
-    
-    # Recent activities
-    recent_employees = Employee.objects.order_by('-created_at')[:5]
-    recent_attendances = Attendance.objects.select_related('employee').order_by('-date')[:5]
-    recent_performances = Performance.objects.select_related('employee').order_by('-review_date')[:5]
-    
-    stats = {
+    counts = {
+        'total_employees': Employee.objects.all(),
+        'active_employees': Employee.objects.filter(is_active=True),
+        'total_departments': Department.objects.all(),
+        'present_today': today_attendance.filter(status='present'),
+        'absent_today': today_attendance.filter(status='absent'),
+        'late_today': today_attendance.filter(status='late'),
+        'total_today': today_attendance,
+    }
+    recent = {
+        'employees': Employee.objects.select_related('department').order_by('-created_at')[:5],
+        'attendances': Attendance.objects.select_related('employee').order_by('-date')[:5],
+        'performances': Performance.objects.select_related('employee').order_by('-review_date')[:5],
+    }
+    return counts, recent
+
+
+def dashboard_stats_payload(counts, avg_performance, recent):
+    return {
         'overall': {
-            'total_employees': total_employees,
-            'active_employees': active_employees,
-            'total_departments': total_departments,
-            'avg_performance': round(avg_performance, 2)
+            'total_employees': counts['total_employees'],
+            'active_employees': counts['active_employees'],
+            'total_departments': counts['total_departments'],
+            'avg_performance': round(avg_performance or 0, 2)
         },
         'today_attendance': {
-            'present': present_today,
-            'absent': absent_today,
-            'late': late_today,
-            'total': today_attendance.count()
+            'present': counts['present_today'],
+            'absent': counts['absent_today'],
+            'late': counts['late_today'],
+            'total': counts['total_today']
         },
         'recent_activities': {
             'employees': [
@@ -172,28 +182,103 @@ def dashboard_stats(request):
                     'name': emp.name,
                     'department': emp.department.name,
                     'created_at': emp.created_at.strftime('%Y-%m-%d')
-                } for emp in recent_employees
+                } for emp in recent['employees']
             ],
             'attendances': [
                 {
                     'employee': att.employee.name,
                     'status': att.status,
                     'date': att.date.strftime('%Y-%m-%d')
-                } for att in recent_attendances
+                } for att in recent['attendances']
             ],
             'performances': [
                 {
                     'employee': perf.employee.name,
                     'rating': perf.rating,
                     'review_date': perf.review_date.strftime('%Y-%m-%d')
-                } for perf in recent_performances
+                } for perf in recent['performances']
             ]
         }
     }
-    
-    return JsonResponse(stats)
+
+
+@cached_json_view(Department, Employee, Attendance, Performance)
+@conditional_json_view(Department, Employee, Attendance, Performance)
+def dashboard_stats(request):
+    """API endpoint for dashboard statistics"""
+    counts, recent = dashboard_stats_querysets()
+    avg_performance = Performance.objects.aggregate(avg_rating=Avg('rating'))['avg_rating']
+    return JsonResponse(dashboard_stats_payload(
+        {name: queryset.count() for name, queryset in counts.items()},
+        avg_performance,
+        {name: list(queryset) for name, queryset in recent.items()}
+    ))
+
+
+def cache_stats(request):
+    """API endpoint for dashboard cache hit/miss counters"""
+    return JsonResponse(get_cache_stats())
+
+
+async def live_attendance(request):
+    """
+    Server-Sent Events stream of today's attendance (see dashboard.live).
+
+    Under ASGI an open stream is just a queue on the event loop; under WSGI
+    each open stream holds a worker thread, so serve wall dashboards over ASGI.
+    """
+    # WSGI consumes async iterators eagerly, which never finishes for an endless stream
+    stream = sync_event_stream() if isinstance(request, WSGIRequest) else async_event_stream()
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
 
 def attendance_overview(request):
     """Attendance overview page"""
     return render(request, 'dashboard/attendance_overview.html')
+
+
+# Async versions of the JSON endpoints, for ASGI deployments. They build the
+# same payloads; dashboard stats runs its independent queries concurrently.
+
+@cached_json_view(Department, Employee)
+@conditional_json_view(Department, Employee)
+async def async_department_chart_data(request):
+    """Async API endpoint for department employee count chart"""
+    return JsonResponse(department_chart_payload(await alist(department_chart_queryset())))
+
+
+@cached_json_view(Attendance)
+@conditional_json_view(Attendance.objects.current_month)
+async def async_attendance_chart_data(request):
+    """Async API endpoint for monthly attendance overview chart"""
+    daily_stats = await sync_to_async(current_month_daily_stats)()
+    return JsonResponse(attendance_chart_payload(daily_stats))
+
+
+@cached_json_view(Performance)
+@conditional_json_view(Performance)
+async def async_performance_chart_data(request):
+    """Async API endpoint for performance rating distribution chart"""
+    return JsonResponse(performance_chart_payload(await alist(rating_distribution_queryset())))
+
+
+@cached_json_view(Department, Employee, Attendance, Performance)
+@conditional_json_view(Department, Employee, Attendance, Performance)
+async def async_dashboard_stats(request):
+    """Async API endpoint for dashboard statistics"""
+    counts, recent = dashboard_stats_querysets()
+    results = await gather_queries(
+        *(queryset.acount for queryset in counts.values()),
+        partial(Performance.objects.aaggregate, avg_rating=Avg('rating')),
+        *(partial(alist, queryset) for queryset in recent.values()),
+    )
+    average = results[len(counts)]
+    return JsonResponse(dashboard_stats_payload(
+        dict(zip(counts, results[:len(counts)])),
+        average['avg_rating'],
+        dict(zip(recent, results[len(counts) + 1:]))
+    ))
@@ -4,11 +4,18 @@ from .models import Department, Employee
 
 @admin.register(Department)
 class DepartmentAdmin(admin.ModelAdmin):
-    list_display = ['name', 'employee_count', 'created_at']
+    list_display = ['name', 'employee_count', 'late_after', 'created_at']
     search_fields = ['name', 'description']
     ordering = ['name']
     readonly_fields = ['created_at', 'updated_at']
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_stats()
+
+    @admin.display(description='Employee count', ordering='num_employees')
+    def employee_count(self, obj):
+        return obj.employee_count
+
 
 @admin.register(Employee)
 class EmployeeAdmin(admin.ModelAdmin):
@@ -1,13 +1,117 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
 from django.utils import timezone
-from django.db import transaction
 from employees.models import Department, Employee
 from attendance.models import Attendance
+from attendance.rollups import rebuild_rollups
+from performance.rollups import rebuild_rollups as rebuild_performance_rollups
 from performance.models import Performance
-from datetime import date, timedelta
+from changes.log import record_queryset
+from dashboard.cache import bump_model_version
+from datetime import date, time, timedelta
+from itertools import islice
+import csv
+import io
 import random
 
 
+DEPARTMENTS_DATA = [
+    {'name': 'Engineering', 'description': 'Software development and technical operations'},
+    {'name': 'Marketing', 'description': 'Marketing and communications'},
+    {'name': 'Sales', 'description': 'Sales and business development'},
+    {'name': 'Human Resources', 'description': 'HR and recruitment'},
+    {'name': 'Finance', 'description': 'Finance and accounting'},
+    {'name': 'Operations', 'description': 'Operations and logistics'},
+    {'name': 'Customer Support', 'description': 'Customer service and support'},
+    {'name': 'Product Management', 'description': 'Product strategy and management'},
+]
+
+FIRST_NAMES = [
+    'John', 'Jane', 'Michael', 'Sarah', 'David', 'Emily', 'Robert', 'Lisa',
+    'James', 'Jennifer', 'William', 'Jessica', 'Richard', 'Amanda', 'Thomas',
+    'Nicole', 'Christopher', 'Stephanie', 'Daniel', 'Melissa', 'Matthew',
+    'Ashley', 'Anthony', 'Elizabeth', 'Mark', 'Megan', 'Donald', 'Lauren',
+    'Steven', 'Rachel', 'Paul', 'Kimberly', 'Andrew', 'Heather', 'Joshua',
+    'Michelle', 'Kenneth', 'Tiffany', 'Kevin', 'Christina', 'Brian', 'Laura',
+    'George', 'Amber', 'Edward', 'Danielle', 'Ronald', 'Brittany', 'Timothy',
+    'Rebecca', 'Jason', 'Samantha'
+]
+
+LAST_NAMES = [
+    'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller',
+    'Davis', 'Rodriguez', 'Martinez', 'Hernandez', 'Lopez', 'Gonzalez',
+    'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore', 'Jackson', 'Martin',
+    'Lee', 'Perez', 'Thompson', 'White', 'Harris', 'Sanchez', 'Clark',
+    'Ramirez', 'Lewis', 'Robinson', 'Walker', 'Young', 'Allen', 'King',
+    'Wright', 'Scott', 'Torres', 'Nguyen', 'Hill', 'Flores', 'Green',
+    'Adams', 'Nelson', 'Baker', 'Hall', 'Rivera', 'Campbell', 'Mitchell',
+    'Carter', 'Roberts'
+]
+
+REVIEWERS = ['John Manager', 'Sarah Director', 'Mike Supervisor', 'Lisa HR', 'David Lead']
+
+COMMENTS = [
+    'Good performance overall',
+    'Shows great potential',
+    'Needs improvement in some areas',
+    'Excellent work ethic',
+    'Consistent performer',
+    'Team player',
+    'Strong technical skills',
+    'Good communication skills'
+]
+
+GOALS = [
+    'Improve technical skills',
+    'Take on more leadership responsibilities',
+    'Enhance communication skills',
+    'Complete advanced training',
+    'Mentor junior team members'
+]
+
+ACHIEVEMENTS = [
+    'Completed major project on time',
+    'Received positive feedback from clients',
+    'Improved team productivity',
+    'Successfully led a team',
+    'Implemented new process improvements'
+]
+
+AREAS_FOR_IMPROVEMENT = [
+    'Time management',
+    'Technical skills',
+    'Communication',
+    'Leadership',
+    'Problem solving'
+]
+
+
+class IteratorFile(io.TextIOBase):
+    """Read-only file object over an iterator of strings, used to feed COPY"""
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.buffer = ''
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while size < 0 or len(self.buffer) < size:
+            try:
+                self.buffer += next(self.lines)
+            except StopIteration:
+                break
+        if size < 0:
+            size = len(self.buffer)
+        chunk, self.buffer = self.buffer[:size], self.buffer[size:]
+        return chunk
+
+    def readline(self, size=-1):
+        return self.read(size)
+
+
 class Command(BaseCommand):
     help = 'Seed the database with fake employee data'
 
@@ -18,230 +122,281 @@ class Command(BaseCommand):
             default=50,
             help='Number of employees to create (default: 50)'
         )
+        parser.add_argument(
+            '--departments',
+            type=int,
+            default=len(DEPARTMENTS_DATA),
+            help=f'Number of departments to spread employees over (default: {len(DEPARTMENTS_DATA)})'
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=30,
+            help='Number of past days of attendance to create (default: 30)'
+        )
+        parser.add_argument(
+            '--reviews-per-employee',
+            type=int,
+            default=3,
+            help='Maximum number of performance reviews per employee (default: 3)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of rows per INSERT statement (default: 1000)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            help='Random seed for reproducible datasets'
+        )
+        parser.add_argument(
+            '--copy',
+            action='store_true',
+            help='Load attendance and performance rows with COPY (PostgreSQL only)'
+        )
 
     def handle(self, *args, **options):
         num_employees = options['employees']
-        
+        self.batch_size = options['batch_size']
+        self.random = random.Random(options['seed'])
+        self.use_copy = options['copy']
+
+        if self.batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+        if options['departments'] < 1:
+            raise CommandError('--departments must be at least 1')
+        if self.use_copy and connection.vendor != 'postgresql':
+            raise CommandError('--copy is only supported on PostgreSQL')
+
         self.stdout.write(
             self.style.SUCCESS(f'Starting to seed database with {num_employees} employees...')
         )
 
+        started = timezone.now()
         with transaction.atomic():
             # Create departments
-            departments = self.create_departments()
-            
+            departments = self.create_departments(options['departments'])
+
             # Create employees
-            employees = self.create_employees(departments, num_employees)
-            
+            employee_ids = self.create_employees(departments, num_employees)
+
             # Create attendance records
-            self.create_attendance_records(employees)
-            
+            self.create_attendance_records(employee_ids, options['days'])
+
             # Create performance records
-            self.create_performance_records(employees)
+            self.create_performance_records(employee_ids, options['reviews_per_employee'])
+
+            # Bulk inserts bypass model signals, so refresh derived data explicitly
+            if options['days'] > 0:
+                rebuild_rollups(start_date=date.today() - timedelta(days=options['days'] - 1))
+            if options['reviews_per_employee'] > 0:
+                rebuild_performance_rollups()
+            for model in (Department, Employee, Attendance, Performance):
+                record_queryset(model.objects.filter(created_at__gte=started), 'create')
+
+        for model in (Department, Employee, Attendance, Performance):
+            bump_model_version(model)
 
         self.stdout.write(
             self.style.SUCCESS('Successfully seeded database!')
         )
 
-    def create_departments(self):
+    def insert_objects(self, model, objects):
+        """Insert unsaved model instances in batches without materializing them all"""
+        if self.use_copy:
+            return self.copy_objects(model, objects)
+
+        inserted = 0
+        objects = iter(objects)
+        while True:
+            batch = list(islice(objects, self.batch_size))
+            if not batch:
+                break
+            model.objects.bulk_create(batch, batch_size=self.batch_size)
+            inserted += len(batch)
+        return inserted
+
+    def copy_objects(self, model, objects):
+        """Stream unsaved model instances into PostgreSQL with COPY ... FROM STDIN"""
+        fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+        columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+        sql = (
+            f'COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) '
+            f"FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+        )
+        counter = {'rows': 0}
+
+        def lines():
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for obj in objects:
+                values = []
+                for field in fields:
+                    value = field.get_db_prep_save(field.pre_save(obj, add=True), connection)
+                    values.append('\\N' if value is None else value)
+                writer.writerow(values)
+                counter['rows'] += 1
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+        with connection.cursor() as cursor:
+            if hasattr(cursor.cursor, 'copy_expert'):
+                # psycopg2
+                cursor.copy_expert(sql, IteratorFile(lines()), size=64 * 1024)
+            else:
+                # psycopg 3
+                with cursor.copy(sql) as copy:
+                    for line in lines():
+                        copy.write(line)
+        return counter['rows']
+
+    def create_departments(self, num_departments):
         """Create sample departments"""
-        departments_data = [
-            {'name': 'Engineering', 'description': 'Software development and technical operations'},
-            {'name': 'Marketing', 'description': 'Marketing and communications'},
-            {'name': 'Sales', 'description': 'Sales and business development'},
-            {'name': 'Human Resources', 'description': 'HR and recruitment'},
-            {'name': 'Finance', 'description': 'Finance and accounting'},
-            {'name': 'Operations', 'description': 'Operations and logistics'},
-            {'name': 'Customer Support', 'description': 'Customer service and support'},
-            {'name': 'Product Management', 'description': 'Product strategy and management'},
+        departments_data = DEPARTMENTS_DATA[:num_departments] + [
+            {'name': f'Department {number}', 'description': 'Generated department'}
+            for number in range(len(DEPARTMENTS_DATA) + 1, num_departments + 1)
         ]
-        
-        departments = []
-        for dept_data in departments_data:
-            dept, created = Department.objects.get_or_create(
-                name=dept_data['name'],
-                defaults=dept_data
-            )
-            departments.append(dept)
-            if created:
-                self.stdout.write(f'Created department: {dept.name}')
-        
-        return departments
 
-    def create_employees(self, departments, num_employees):
-        """Create sample employees"""
-        first_names = [
-            'John', 'Jane', 'Michael', 'Sarah', 'David', 'Emily', 'Robert', 'Lisa',
-            'James', 'Jennifer', 'William', 'Jessica', 'Richard', 'Amanda', 'Thomas',
-            'Nicole', 'Christopher', 'Stephanie', 'Daniel', 'Melissa', 'Matthew',
-            'Ashley', 'Anthony', 'Elizabeth', 'Mark', 'Megan', 'Donald', 'Lauren',
-            'Steven', 'Rachel', 'Paul', 'Kimberly', 'Andrew', 'Heather', 'Joshua',
-            'Michelle', 'Kenneth', 'Tiffany', 'Kevin', 'Christina', 'Brian', 'Laura',
-            'George', 'Amber', 'Edward', 'Danielle', 'Ronald', 'Brittany', 'Timothy',
-            'Rebecca', 'Jason', 'Samantha'
-        ]
-        
-        last_names = [
-            'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller',
-            'Davis', 'Rodriguez', 'Martinez', 'Hernandez', 'Lopez', 'Gonzalez',
-            'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore', 'Jackson', 'Martin',
-            'Lee', 'Perez', 'Thompson', 'White', 'Harris', 'Sanchez', 'Clark',
-            'Ramirez', 'Lewis', 'Robinson', 'Walker', 'Young', 'Allen', 'King',
-            'Wright', 'Scott', 'Torres', 'Nguyen', 'Hill', 'Flores', 'Green',
-            'Adams', 'Nelson', 'Baker', 'Hall', 'Rivera', 'Campbell', 'Mitchell',
-            'Carter', 'Roberts'
+        existing = set(
+            Department.objects.filter(
+                name__in=[dept_data['name'] for dept_data in departments_data]
+            ).values_list('name', flat=True)
+        )
+        new_departments = [
+            Department(**dept_data) for dept_data in departments_data
+            if dept_data['name'] not in existing
         ]
-        
-        employees = []
+        Department.objects.bulk_create(new_departments, batch_size=self.batch_size)
+        for dept in new_departments:
+            self.stdout.write(f'Created department: {dept.name}')
+
+        return list(Department.objects.filter(
+            name__in=[dept_data['name'] for dept_data in departments_data]
+        ))
+
+    def generate_employees(self, departments, num_employees, email_offset):
+        rng = self.random
         for i in range(num_employees):
-            first_name = random.choice(first_names)
-            last_name = random.choice(last_names)
-            name = f"{first_name} {last_name}"
-            email = f"{first_name.lower()}.{last_name.lower()}@company.com"
-            phone = f"+1-555-{random.randint(100, 999)}-{random.randint(1000, 9999)}"
-            
+            first_name = rng.choice(FIRST_NAMES)
+            last_name = rng.choice(LAST_NAMES)
+            # The numeric suffix keeps emails unique within and across runs
+            email = f"{first_name.lower()}.{last_name.lower()}.{email_offset + i + 1}@company.com"
+
             # Random address
-            addresses = [
-                f"{random.randint(100, 9999)} Main St, City, State {random.randint(10000, 99999)}",
-                f"{random.randint(100, 9999)} Oak Ave, Town, State {random.randint(10000, 99999)}",
-                f"{random.randint(100, 9999)} Pine Rd, Village, State {random.randint(10000, 99999)}",
-            ]
-            address = random.choice(addresses)
-            
-            # Random joining date (within last 5 years)
-            days_ago = random.randint(0, 1825)  # 5 years
-            date_of_joining = date.today() - timedelta(days=days_ago)
-            
-            department = random.choice(departments)
-            gender = random.choice(['M', 'F', 'O'])
-            salary = random.randint(30000, 150000)
-            
-            employee = Employee.objects.create(
-                name=name,
+            street = rng.choice(['Main St, City', 'Oak Ave, Town', 'Pine Rd, Village'])
+            address = f"{rng.randint(100, 9999)} {street}, State {rng.randint(10000, 99999)}"
+
+            yield Employee(
+                name=f"{first_name} {last_name}",
                 email=email,
-                phone_number=phone,
+                phone_number=f"+1-555-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}",
                 address=address,
-                date_of_joining=date_of_joining,
-                department=department,
-                gender=gender,
-                salary=salary,
-                is_active=random.choice([True, True, True, False])  # 75% active
+                # Random joining date (within last 5 years)
+                date_of_joining=date.today() - timedelta(days=rng.randint(0, 1825)),
+                department=rng.choice(departments),
+                gender=rng.choice(['M', 'F', 'O']),
+                salary=rng.randint(30000, 150000),
+                is_active=rng.choice([True, True, True, False])  # 75% active
             )
-            employees.append(employee)
-            
-            if i % 10 == 0:
-                self.stdout.write(f'Created employee {i+1}/{num_employees}: {name}')
-        
-        return employees
-
-    def create_attendance_records(self, employees):
-        """Create attendance records for the last 30 days"""
-        self.stdout.write('Creating attendance records...')
-        
-        for employee in employees:
-            # Create attendance for the last 30 days
-            for i in range(30):
-                attendance_date = date.today() - timedelta(days=i)
-                
+
+    def create_employees(self, departments, num_employees):
+        """Create sample employees and return their ids"""
+        # Existing ids bound every previously generated email suffix
+        email_offset = Employee.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+        employees = self.generate_employees(departments, num_employees, email_offset)
+
+        employee_ids = []
+        while True:
+            batch = list(islice(employees, self.batch_size))
+            if not batch:
+                break
+            created = Employee.objects.bulk_create(batch, batch_size=self.batch_size)
+            if any(employee.pk is None for employee in created):
+                # Backends that cannot return ids from bulk inserts
+                employee_ids.extend(Employee.objects.filter(
+                    email__in=[employee.email for employee in created]
+                ).values_list('id', flat=True))
+            else:
+                employee_ids.extend(employee.pk for employee in created)
+            self.stdout.write(f'Created employees {len(employee_ids)}/{num_employees}')
+
+        return employee_ids
+
+    def generate_attendance(self, employee_ids, days):
+        rng = self.random
+        statuses = ['present', 'absent', 'late', 'half_day']
+        status_weights = [0.7, 0.1, 0.15, 0.05]
+        today = date.today()
+        notes = ['', 'Good day', 'Busy day', 'Team meeting']
+
+        for employee_id in employee_ids:
+            for i in range(days):
+                attendance_date = today - timedelta(days=i)
+
                 # Skip weekends (Saturday=5, Sunday=6)
                 if attendance_date.weekday() >= 5:
                     continue
-                
+
                 # Random attendance status
-                status_weights = {'present': 0.7, 'absent': 0.1, 'late': 0.15, 'half_day': 0.05}
-                status = random.choices(
-                    list(status_weights.keys()),
-                    weights=list(status_weights.values())
-                )[0]
-                
+                status = rng.choices(statuses, weights=status_weights)[0]
+
                 # Random check-in and check-out times
-                check_in_hour = random.randint(7, 10) if status != 'absent' else None
-                check_in_minute = random.randint(0, 59) if check_in_hour else None
-                check_out_hour = random.randint(16, 19) if status in ['present', 'late'] else None
-                check_out_minute = random.randint(0, 59) if check_out_hour else None
-                
-                from datetime import time
-                check_in_time = time(check_in_hour, check_in_minute) if check_in_hour else None
-                check_out_time = time(check_out_hour, check_out_minute) if check_out_hour else None
-                
-                Attendance.objects.create(
-                    employee=employee,
+                check_in_time = None
+                check_out_time = None
+                if status != 'absent':
+                    check_in_time = time(rng.randint(7, 10), rng.randint(0, 59))
+                if status in ['present', 'late']:
+                    check_out_time = time(rng.randint(16, 19), rng.randint(0, 59))
+
+                yield Attendance(
+                    employee_id=employee_id,
                     date=attendance_date,
                     status=status,
                     check_in_time=check_in_time,
                     check_out_time=check_out_time,
-                    notes=random.choice(['', 'Good day', 'Busy day', 'Team meeting']) if status != 'absent' else 'Called in sick'
+                    notes=rng.choice(notes) if status != 'absent' else 'Called in sick'
                 )
 
-    def create_performance_records(self, employees):
-        """Create performance records for employees"""
-        self.stdout.write('Creating performance records...')
-        
-        reviewers = ['John Manager', 'Sarah Director', 'Mike Supervisor', 'Lisa HR', 'David Lead']
-        
-        for employee in employees:
-            # Create 1-3 performance reviews per employee
-            num_reviews = random.randint(1, 3)
-            
-            for i in range(num_reviews):
+    def create_attendance_records(self, employee_ids, days):
+        """Create attendance records for the last `days` days"""
+        self.stdout.write('Creating attendance records...')
+        created = self.insert_objects(Attendance, self.generate_attendance(employee_ids, days))
+        self.stdout.write(f'Created {created} attendance records')
+
+    def generate_performance(self, employee_ids, max_reviews):
+        rng = self.random
+        ratings = [1, 2, 3, 4, 5]
+        rating_weights = [0.05, 0.1, 0.3, 0.4, 0.15]
+        today = date.today()
+
+        for employee_id in employee_ids:
+            for i in range(rng.randint(1, max_reviews)):
                 # Review date within last 2 years
-                days_ago = random.randint(0, 730)
-                review_date = date.today() - timedelta(days=days_ago)
-                
-                # Random rating (weighted towards better ratings)
-                rating_weights = {1: 0.05, 2: 0.1, 3: 0.3, 4: 0.4, 5: 0.15}
-                rating = random.choices(
-                    list(rating_weights.keys()),
-                    weights=list(rating_weights.values())
-                )[0]
-                
+                review_date = today - timedelta(days=rng.randint(0, 730))
+
                 # Next review date (6-12 months from review date)
-                months_ahead = random.randint(6, 12)
-                next_review_date = review_date + timedelta(days=months_ahead * 30)
-                
-                comments = [
-                    'Good performance overall',
-                    'Shows great potential',
-                    'Needs improvement in some areas',
-                    'Excellent work ethic',
-                    'Consistent performer',
-                    'Team player',
-                    'Strong technical skills',
-                    'Good communication skills'
-                ]
-                
-                goals = [
-                    'Improve technical skills',
-                    'Take on more leadership responsibilities',
-                    'Enhance communication skills',
-                    'Complete advanced training',
-                    'Mentor junior team members'
-                ]
-                
-                achievements = [
-                    'Completed major project on time',
-                    'Received positive feedback from clients',
-                    'Improved team productivity',
-                    'Successfully led a team',
-                    'Implemented new process improvements'
-                ]
-                
-                areas_for_improvement = [
-                    'Time management',
-                    'Technical skills',
-                    'Communication',
-                    'Leadership',
-                    'Problem solving'
-                ]
-                
-                Performance.objects.create(
-                    employee=employee,
-                    rating=rating,
+                next_review_date = review_date + timedelta(days=rng.randint(6, 12) * 30)
+
+                yield Performance(
+                    employee_id=employee_id,
+                    # Random rating (weighted towards better ratings)
+                    rating=rng.choices(ratings, weights=rating_weights)[0],
                     review_date=review_date,
-                    reviewer=random.choice(reviewers),
-                    comments=random.choice(comments),
-                    goals=random.choice(goals),
-                    achievements=random.choice(achievements),
-                    areas_for_improvement=random.choice(areas_for_improvement),
+                    reviewer=rng.choice(REVIEWERS),
+                    comments=rng.choice(COMMENTS),
+                    goals=rng.choice(GOALS),
+                    achievements=rng.choice(ACHIEVEMENTS),
+                    areas_for_improvement=rng.choice(AREAS_FOR_IMPROVEMENT),
                     next_review_date=next_review_date
-                ) 
\ No newline at end of file
+                )
+
+    def create_performance_records(self, employee_ids, max_reviews):
+        """Create performance records for employees"""
+        self.stdout.write('Creating performance records...')
+        if max_reviews < 1:
+            return
+        created = self.insert_objects(Performance, self.generate_performance(employee_ids, max_reviews))
+        self.stdout.write(f'Created {created} performance records')
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-18 08:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employees", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="employee",
+            name="employees_e_departm_99b42d_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="employee",
+            name="employees_e_is_acti_ff761b_idx",
+        ),
+        migrations.AddIndex(
+            model_name="employee",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["name"],
+                name="employee_active_name_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.3 on 2026-10-18 09:21
+
+import datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employees", "0002_tune_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="department",
+            name="late_after",
+            field=models.TimeField(
+                default=datetime.time(9, 0),
+                help_text="Check-ins after this time count as late",
+            ),
+        ),
+    ]
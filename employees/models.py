@@ -1,15 +1,51 @@
+from datetime import time
 from django.db import models
+from django.db.models import Avg, Count, Max, Min, Q
 from django.core.validators import EmailValidator
 from django.utils import timezone
 
 
+def current_month_range():
+    """Return the first day of the current month and the first day of the next"""
+    today = timezone.now().date()
+    month_start = today.replace(day=1)
+    if month_start.month == 12:
+        next_month_start = month_start.replace(year=month_start.year + 1, month=1)
+    else:
+        next_month_start = month_start.replace(month=month_start.month + 1)
+    return month_start, next_month_start
+
+
+class DepartmentQuerySet(models.QuerySet):
+    def with_stats(self):
+        """Annotate headcount and salary figures so each department needs no extra queries"""
+        gender_counts = {
+            f'num_gender_{code.lower()}': Count('employees', filter=Q(employees__gender=code))
+            for code, _ in Employee.GENDER_CHOICES
+        }
+        return self.annotate(
+            num_employees=Count('employees'),
+            num_active_employees=Count('employees', filter=Q(employees__is_active=True)),
+            avg_salary=Avg('employees__salary'),
+            min_salary=Min('employees__salary'),
+            max_salary=Max('employees__salary'),
+            **gender_counts,
+        )
+
+
 class Department(models.Model):
     """Department model for organizing employees"""
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField(blank=True, null=True)
+    late_after = models.TimeField(
+        default=time(9, 0),
+        help_text='Check-ins after this time count as late'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = DepartmentQuerySet.as_manager()
+
     class Meta:
         ordering = ['name']
 
@@ -18,7 +54,34 @@ class Department(models.Model):
 
     @property
     def employee_count(self):
-        return self.employees.count()
+        num_employees = getattr(self, 'num_employees', None)
+        if num_employees is None:
+            return self.employees.count()
+        return num_employees
+
+    @property
+    def gender_distribution(self):
+        """Headcount per gender code; requires DepartmentQuerySet.with_stats()"""
+        return {
+            code: getattr(self, f'num_gender_{code.lower()}')
+            for code, _ in Employee.GENDER_CHOICES
+        }
+
+
+class EmployeeQuerySet(models.QuerySet):
+    def with_attendance_counts(self):
+        """Annotate current-month attendance totals so attendance_rate needs no extra queries"""
+        month_start, next_month_start = current_month_range()
+        in_month = Q(
+            attendances__date__gte=month_start,
+            attendances__date__lt=next_month_start,
+        )
+        return self.annotate(
+            month_attendance_total=Count('attendances', filter=in_month),
+            month_attendance_present=Count(
+                'attendances', filter=in_month & Q(attendances__status='present')
+            ),
+        )
 
 
 class Employee(models.Model):
@@ -45,12 +108,18 @@ class Employee(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = EmployeeQuerySet.as_manager()
+
     class Meta:
         ordering = ['name']
         indexes = [
-            models.Index(fields=['department']),
             models.Index(fields=['date_of_joining']),
-            models.Index(fields=['is_active']),
+            # Active-employee lists are filtered on is_active and ordered by name
+            models.Index(
+                fields=['name'],
+                condition=Q(is_active=True),
+                name='employee_active_name_idx'
+            ),
         ]
 
     def __str__(self):
@@ -65,23 +134,20 @@ class Employee(models.Model):
     @property
     def attendance_rate(self):
         """Calculate attendance rate for the current month"""
-        from attendance.models import Attendance
-        current_month = timezone.now().month
-        current_year = timezone.now().year
-        
-        total_days = Attendance.objects.filter(
-            employee=self,
-            date__month=current_month,
-            date__year=current_year
-        ).count()
-        
-        present_days = Attendance.objects.filter(
-            employee=self,
-            date__month=current_month,
-            date__year=current_year,
-            status='present'
-        ).count()
-        
+        total_days = getattr(self, 'month_attendance_total', None)
+        present_days = getattr(self, 'month_attendance_present', None)
+
+        if total_days is None or present_days is None:
+            from attendance.models import Attendance
+            month_start, next_month_start = current_month_range()
+            month_attendances = Attendance.objects.filter(
+                employee=self,
+                date__gte=month_start,
+                date__lt=next_month_start
+            )
+            total_days = month_attendances.count()
+            present_days = month_attendances.filter(status='present').count()
+
         if total_days == 0:
             return 0
         return (present_days / total_days) * 100
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from django.utils import timezone
 from .models import Department, Employee
 
 
@@ -19,6 +20,10 @@ class EmployeeSerializer(serializers.ModelSerializer):
         model = Employee
         fields = '__all__'
         read_only_fields = ('created_at', 'updated_at')
+        field_dependencies = {
+            'years_of_service': ['date_of_joining'],
+            'attendance_rate': ['month_attendance_total', 'month_attendance_present'],
+        }
 
 
 class EmployeeDetailSerializer(serializers.ModelSerializer):
@@ -30,6 +35,10 @@ class EmployeeDetailSerializer(serializers.ModelSerializer):
         model = Employee
         fields = '__all__'
         read_only_fields = ('created_at', 'updated_at')
+        field_dependencies = {
+            'years_of_service': ['date_of_joining'],
+            'attendance_rate': ['month_attendance_total', 'month_attendance_present'],
+        }
 
 
 class DepartmentDetailSerializer(serializers.ModelSerializer):
@@ -38,4 +47,28 @@ class DepartmentDetailSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Department
-        fields = '__all__' 
\ No newline at end of file
+        fields = '__all__'
+
+
+class EmployeeHistoryQuerySerializer(serializers.Serializer):
+    """Date bounds of an employee's attendance and performance history"""
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        start_date, end_date = attrs.get('start_date'), attrs.get('end_date')
+        if start_date and end_date and end_date < start_date:
+            raise serializers.ValidationError({'end_date': 'Must not be before start_date.'})
+        return attrs
+
+
+class EmployeeSummaryQuerySerializer(EmployeeHistoryQuerySerializer):
+    """Query parameters of the employee summary endpoint"""
+    page = serializers.IntegerField(min_value=1, default=1)
+    reviews = serializers.IntegerField(min_value=1, max_value=50, default=5)
+
+    def validate(self, attrs):
+        # Default to the current month so far, like the attendance stats
+        attrs.setdefault('end_date', timezone.now().date())
+        attrs.setdefault('start_date', attrs['end_date'].replace(day=1))
+        return super().validate(attrs)
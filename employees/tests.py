@@ -2,7 +2,15 @@ from django.test import TestCase
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
+from django.core.management import call_command
+from django.db import connection
+from io import StringIO
+from django.test.utils import CaptureQueriesContext
+from datetime import date, time, timedelta
+from django.utils import timezone
 from .models import Employee, Department
+from attendance.models import Attendance
+from performance.models import Performance
 from django.contrib.auth import get_user_model
 
 # Create your tests here.
@@ -42,6 +50,23 @@ class EmployeeAPITests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('John Doe', str(response.data))
 
+    def test_export_csv_honors_filters(self):
+        other = Department.objects.create(name='Sales')
+        Employee.objects.create(
+            name='Jane Smith', email='jane@example.com', phone_number='9876543210',
+            address='456 Elm St', date_of_joining='2023-02-01', department=other
+        )
+        response = self.client.get(
+            reverse('employee-export'), {'format': 'csv', 'department': self.department.id}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:3], ['id', 'name', 'email'])
+        self.assertEqual(len(lines), 2)
+        self.assertIn('John Doe', lines[1])
+        self.assertIn('Engineering', lines[1])
+
     def test_create_employee(self):
         url = reverse('employee-list')
         data = {
@@ -51,3 +76,205 @@ class EmployeeAPITests(APITestCase):
         response = self.client.post(url, data)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(Employee.objects.count(), 2)
+
+
+class EmployeeAttendanceRateQueryTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.department = Department.objects.create(name='Engineering')
+        self.today = timezone.now().date()
+
+    def create_employees(self, count):
+        for i in range(Employee.objects.count(), Employee.objects.count() + count):
+            employee = Employee.objects.create(
+                name=f'Employee {i}', email=f'employee{i}@example.com', phone_number='1234567890',
+                address='123 Main St', date_of_joining='2023-01-01', department=self.department
+            )
+            Attendance.objects.create(
+                employee=employee, date=self.today, status='present' if i % 2 else 'absent'
+            )
+
+    def count_list_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('employee-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries)
+
+    def test_list_query_count_constant_as_page_grows(self):
+        self.create_employees(2)
+        small_page_queries = self.count_list_queries()
+        self.create_employees(18)
+        with self.assertNumQueries(small_page_queries):
+            response = self.client.get(reverse('employee-list'))
+        self.assertEqual(len(response.data['results']), 20)
+
+    def test_department_detail_query_count_constant(self):
+        self.create_employees(2)
+        url = reverse('department-detail', args=[self.department.id])
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+        self.create_employees(10)
+        with self.assertNumQueries(len(context.captured_queries)):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data['employees']), 12)
+
+    def test_annotated_attendance_rate_matches_fallback(self):
+        self.create_employees(2)
+        for employee in Employee.objects.with_attendance_counts():
+            fresh = Employee.objects.get(pk=employee.pk)
+            self.assertEqual(employee.attendance_rate, fresh.attendance_rate)
+
+
+class EmployeeHistoryTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.department = Department.objects.create(name='Engineering')
+        self.employee = Employee.objects.create(
+            name='John Doe', email='john@example.com', phone_number='1234567890',
+            address='123 Main St', date_of_joining='2023-01-01', department=self.department
+        )
+
+    def create_history(self, days, start=date(2023, 6, 1)):
+        for offset in range(Attendance.objects.count(), Attendance.objects.count() + days):
+            day = start + timedelta(days=offset)
+            Attendance.objects.create(
+                employee=self.employee, date=day, status='present' if offset % 2 else 'absent',
+                check_in_time=time(9, 30), check_out_time=time(17, 30)
+            )
+            Performance.objects.create(
+                employee=self.employee, rating=offset % 5 + 1, review_date=day,
+                next_review_date=day + timedelta(days=90)
+            )
+
+    def test_history_actions_are_paginated_and_date_filtered(self):
+        self.create_history(5)
+        for url_name, field in (('employee-attendance', 'date'), ('employee-performance', 'review_date')):
+            url = reverse(url_name, args=[self.employee.pk])
+            response = self.client.get(url, {'start_date': '2023-06-02', 'end_date': '2023-06-04', 'page_size': 2})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data['count'], 3)
+            self.assertEqual([row[field] for row in response.data['results']], ['2023-06-04', '2023-06-03'])
+            self.assertIn('page=2', response.data['next'])
+
+            response = self.client.get(url, {'start_date': '2023-06-04', 'end_date': '2023-06-02'})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_summary(self):
+        self.create_history(4)
+        response = self.client.get(
+            reverse('employee-summary', args=[self.employee.pk]),
+            {'start_date': '2023-06-01', 'end_date': '2023-06-30', 'page_size': 3, 'reviews': 2}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['employee']['department']['name'], 'Engineering')
+
+        attendance = response.data['attendance']
+        self.assertEqual(attendance['count'], 4)
+        self.assertEqual([row['date'] for row in attendance['results']], ['2023-06-04', '2023-06-03', '2023-06-02'])
+        self.assertEqual(attendance['results'][0]['department_name'], 'Engineering')
+        self.assertTrue(attendance['results'][0]['is_late'])
+        self.assertIn('page=2', attendance['next'])
+        self.assertIsNone(attendance['previous'])
+        self.assertEqual([review['review_date'] for review in response.data['recent_reviews']], ['2023-06-04', '2023-06-03'])
+
+        kpis = response.data['kpis']
+        self.assertEqual(
+            (kpis['attendance']['present'], kpis['attendance']['absent'], kpis['attendance']['attendance_rate']),
+            (2, 2, 50)
+        )
+        self.assertEqual((kpis['attendance']['late_check_ins'], kpis['attendance']['avg_working_hours']), (4, 8))
+        self.assertEqual(
+            (kpis['performance']['total_reviews'], kpis['performance']['avg_rating'], kpis['performance']['latest_rating']),
+            (4, 2.5, 4)
+        )
+
+        last_page = self.client.get(attendance['next'])
+        self.assertEqual([row['date'] for row in last_page.data['attendance']['results']], ['2023-06-01'])
+        self.assertIsNotNone(last_page.data['attendance']['previous'])
+        self.assertIsNone(last_page.data['attendance']['next'])
+        self.assertEqual(self.client.get(attendance['next'].replace('page=2', 'page=3')).status_code, 404)
+
+    def test_summary_query_count_constant_as_history_grows(self):
+        url = reverse('employee-summary', args=[self.employee.pk])
+        params = {'start_date': '2023-06-01', 'end_date': '2023-07-31'}
+        self.create_history(2)
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url, params)
+        self.create_history(30)
+        with self.assertNumQueries(len(context.captured_queries)):
+            response = self.client.get(url, params)
+        self.assertEqual(response.data['attendance']['count'], 32)
+        self.assertEqual(len(response.data['attendance']['results']), 20)
+        self.assertEqual(len(response.data['recent_reviews']), 5)
+
+
+class SeedDataCommandTests(TestCase):
+    def seed(self, **options):
+        call_command('seed_data', stdout=StringIO(), **options)
+
+    def test_emails_unique_across_runs(self):
+        self.seed(employees=30, days=3, seed=1, batch_size=7)
+        self.seed(employees=30, days=3, seed=1, batch_size=7)
+        self.assertEqual(Employee.objects.count(), 60)
+        self.assertEqual(Employee.objects.values('email').distinct().count(), 60)
+
+    def test_scale_flags(self):
+        self.seed(employees=5, days=7, departments=10, reviews_per_employee=1, seed=3)
+        self.assertEqual(Department.objects.count(), 10)
+        # Any seven consecutive days contain exactly five weekdays
+        self.assertEqual(Attendance.objects.count(), 5 * 5)
+
+
+class DepartmentStatsQueryTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+
+    def create_departments(self, count):
+        for i in range(Department.objects.count(), Department.objects.count() + count):
+            department = Department.objects.create(name=f'Department {i}')
+            for j, (gender, salary) in enumerate([('M', 1000), ('F', 3000), ('F', None)]):
+                Employee.objects.create(
+                    name=f'Employee {i}-{j}', email=f'employee{i}-{j}@example.com',
+                    phone_number='1234567890', address='123 Main St', date_of_joining='2023-01-01',
+                    department=department, gender=gender, salary=salary, is_active=j < 2
+                )
+
+    def assert_constant_queries(self, url_name):
+        self.create_departments(1)
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(reverse(url_name))
+        self.create_departments(5)
+        with self.assertNumQueries(len(context.captured_queries)):
+            response = self.client.get(reverse(url_name))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_department_list_query_count_constant(self):
+        response = self.assert_constant_queries('department-list')
+        self.assertEqual([row['employee_count'] for row in response.data['results']], [3] * 6)
+
+    def test_department_stats_query_count_constant(self):
+        response = self.assert_constant_queries('department-stats')
+        self.assertEqual(len(response.data), 6)
+        stats = response.data[0]
+        self.assertEqual(stats['employee_count'], 3)
+        self.assertEqual(stats['active_employee_count'], 2)
+        self.assertEqual(stats['avg_salary'], 2000)
+        self.assertEqual(stats['min_salary'], 1000)
+        self.assertEqual(stats['max_salary'], 3000)
+        self.assertEqual(stats['gender_distribution'], {'M': 1, 'F': 2, 'O': 0})
+
+    def test_employee_stats_query_count_constant(self):
+        response = self.assert_constant_queries('employee-stats')
+        self.assertEqual(response.data['total_employees'], 18)
+        self.assertEqual(response.data['active_employees'], 12)
+        self.assertEqual(len(response.data['department_distribution']), 6)
+
+    def test_annotated_employee_count_matches_fallback(self):
+        self.create_departments(2)
+        for department in Department.objects.with_stats():
+            fresh = Department.objects.get(pk=department.pk)
+            self.assertEqual(department.employee_count, fresh.employee_count)
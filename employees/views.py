@@ -8,12 +8,31 @@ from .serializers import (
     DepartmentSerializer, 
     DepartmentDetailSerializer,
     EmployeeSerializer, 
-    EmployeeDetailSerializer
+    EmployeeDetailSerializer,
+    EmployeeHistoryQuerySerializer,
+    EmployeeSummaryQuerySerializer
 )
 from django.db import models
+from django.db.models import Avg, Count, Prefetch, Q, prefetch_related_objects
+from rest_framework.exceptions import NotFound
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from manage_system.conditional import ConditionalGetMixin
+from manage_system.exports import ExportMixin
+from manage_system.fieldsets import SparseFieldsetMixin
+from manage_system.serialization import FastListMixin
 
 
-class DepartmentViewSet(viewsets.ModelViewSet):
+def date_lookups(field, bounds):
+    """Filter kwargs keeping `field` within the validated start_date/end_date bounds"""
+    lookups = {}
+    if 'start_date' in bounds:
+        lookups[f'{field}__gte'] = bounds['start_date']
+    if 'end_date' in bounds:
+        lookups[f'{field}__lte'] = bounds['end_date']
+    return lookups
+
+
+class DepartmentViewSet(ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """ViewSet for Department model with CRUD operations"""
     queryset = Department.objects.all()
     serializer_class = DepartmentSerializer
@@ -22,6 +41,35 @@ class DepartmentViewSet(viewsets.ModelViewSet):
     ordering_fields = ['name', 'created_at']
     ordering = ['name']
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.wants_field('employee_count'):
+            queryset = queryset.with_stats()
+        if self.action == 'retrieve' and self.wants_field('employees'):
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    'employees',
+                    queryset=Employee.objects.select_related('department').with_attendance_counts()
+                )
+            )
+        return queryset
+
+    def get_conditional_queryset(self):
+        return self.queryset.all()
+
+    def get_conditional_probes(self, queryset):
+        probes = super().get_conditional_probes(queryset)
+        nests_employees = self.action == 'retrieve' and self.wants_field('employees')
+        if self.wants_field('employee_count') or nests_employees:
+            probes.append((Employee.objects.filter(department__in=queryset.values('pk')), ['updated_at']))
+        if nests_employees:
+            from attendance.models import Attendance
+            probes.append((
+                Attendance.objects.current_month().filter(employee__department__in=queryset.values('pk')),
+                ['updated_at']
+            ))
+        return probes
+
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return DepartmentDetailSerializer
@@ -31,28 +79,30 @@ class DepartmentViewSet(viewsets.ModelViewSet):
     def employees(self, request, pk=None):
         """Get all employees in a specific department"""
         department = self.get_object()
-        employees = department.employees.all()
+        employees = department.employees.select_related('department').with_attendance_counts()
         serializer = EmployeeSerializer(employees, many=True)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
     def stats(self, request):
         """Get department statistics"""
-        departments = Department.objects.all()
+        departments = Department.objects.with_stats()
         stats = []
         for dept in departments:
             stats.append({
                 'id': dept.id,
                 'name': dept.name,
                 'employee_count': dept.employee_count,
-                'avg_salary': dept.employees.aggregate(
-                    avg_salary=models.Avg('salary')
-                )['avg_salary'] or 0
+                'active_employee_count': dept.num_active_employees,
+                'avg_salary': dept.avg_salary or 0,
+                'min_salary': dept.min_salary or 0,
+                'max_salary': dept.max_salary or 0,
+                'gender_distribution': dept.gender_distribution,
             })
         return Response(stats)
 
 
-class EmployeeViewSet(viewsets.ModelViewSet):
+class EmployeeViewSet(ConditionalGetMixin, FastListMixin, SparseFieldsetMixin, ExportMixin, viewsets.ModelViewSet):
     """ViewSet for Employee model with CRUD operations"""
     queryset = Employee.objects.select_related('department').all()
     serializer_class = EmployeeSerializer
@@ -61,38 +111,181 @@ class EmployeeViewSet(viewsets.ModelViewSet):
     search_fields = ['name', 'email', 'phone_number']
     ordering_fields = ['name', 'date_of_joining', 'salary', 'created_at']
     ordering = ['name']
+    export_fields = {
+        'id': 'id',
+        'name': 'name',
+        'email': 'email',
+        'phone_number': 'phone_number',
+        'address': 'address',
+        'date_of_joining': 'date_of_joining',
+        'department': 'department_id',
+        'department_name': 'department__name',
+        'gender': 'gender',
+        'salary': 'salary',
+        'is_active': 'is_active',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+    }
+    last_modified_fields = ['updated_at', 'department__updated_at']
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # The history actions only read the employee's id
+        if self.action in ('export', 'attendance', 'performance') or not self.wants_field('attendance_rate'):
+            return queryset
+        # Annotated per request so the current-month window is never stale
+        return queryset.with_attendance_counts()
+
+    def get_conditional_queryset(self):
+        return self.queryset.all()
+
+    def get_conditional_probes(self, queryset):
+        from attendance.models import Attendance
+        probes = super().get_conditional_probes(queryset)
+        if self.wants_field('attendance_rate'):
+            attendance = Attendance.objects.current_month()
+            if self.action == 'retrieve':
+                attendance = attendance.filter(employee__in=queryset.values('pk'))
+            probes.append((attendance, ['updated_at']))
+        if self.action == 'retrieve' and self.wants_field('department'):
+            # The nested department renders its employee_count
+            probes.append((Employee.objects.filter(department__in=queryset.values('department')), ['updated_at']))
+        return probes
 
     def get_serializer_class(self):
-        if self.action == 'retrieve':
+        if self.action in ('retrieve', 'summary'):
             return EmployeeDetailSerializer
         return EmployeeSerializer
 
+    def get_history_bounds(self, request):
+        params = EmployeeHistoryQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return params.validated_data
+
     @action(detail=True, methods=['get'])
     def attendance(self, request, pk=None):
-        """Get attendance records for a specific employee"""
-        employee = self.get_object()
+        """Paginated attendance records of an employee, newest first, between `start_date` and `end_date`"""
         from attendance.models import Attendance
-        attendances = Attendance.objects.filter(employee=employee).order_by('-date')
         from attendance.serializers import AttendanceSerializer
-        serializer = AttendanceSerializer(attendances, many=True)
-        return Response(serializer.data)
+        bounds = self.get_history_bounds(request)
+        employee = self.get_object()
+        attendances = Attendance.objects.filter(
+            employee=employee, **date_lookups('date', bounds)
+        ).select_related('employee__department').with_metrics().order_by('-date')
+        page = self.paginate_queryset(attendances)
+        if page is not None:
+            return self.get_paginated_response(AttendanceSerializer(page, many=True).data)
+        return Response(AttendanceSerializer(attendances, many=True).data)
 
     @action(detail=True, methods=['get'])
     def performance(self, request, pk=None):
-        """Get performance records for a specific employee"""
+        """Paginated performance reviews of an employee, newest first, between `start_date` and `end_date`"""
+        from performance.models import Performance
+        from performance.serializers import PerformanceSerializer
+        bounds = self.get_history_bounds(request)
         employee = self.get_object()
+        performances = Performance.objects.filter(
+            employee=employee, **date_lookups('review_date', bounds)
+        ).select_related('employee__department').order_by('-review_date', '-id')
+        page = self.paginate_queryset(performances)
+        if page is not None:
+            return self.get_paginated_response(PerformanceSerializer(page, many=True).data)
+        return Response(PerformanceSerializer(performances, many=True).data)
+
+    @action(detail=True, methods=['get'])
+    def summary(self, request, pk=None):
+        """
+        Get an employee's profile page in one response.
+
+        Returns the profile, a page of attendance between `start_date` and
+        `end_date` (default: this month so far; `page`, `page_size`), the
+        latest `reviews` reviews (default 5) and KPIs over both, in a fixed
+        number of queries however long the history is.
+        """
+        from attendance.models import Attendance
+        from attendance.serializers import AttendanceSerializer
         from performance.models import Performance
-        performances = Performance.objects.filter(employee=employee).order_by('-review_date')
         from performance.serializers import PerformanceSerializer
-        serializer = PerformanceSerializer(performances, many=True)
-        return Response(serializer.data)
+        params = EmployeeSummaryQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        start_date, end_date = params.validated_data['start_date'], params.validated_data['end_date']
+        page_number = params.validated_data['page']
+        page_size = self.paginator.get_page_size(request)
+        employee = self.get_object()
+
+        window = Attendance.objects.filter(date__range=[start_date, end_date]).with_metrics()
+        attendance_kpis = window.filter(employee=employee).aggregate(
+            total_days=Count('id'),
+            **{status: Count('id', filter=Q(status=status)) for status, _ in Attendance.STATUS_CHOICES},
+            late_check_ins=Count('id', filter=Q(is_late=True)),
+            avg_working_hours=Avg('working_hours'),
+        )
+        count = attendance_kpis['total_days']
+        offset = (page_number - 1) * page_size
+        if page_number > 1 and offset >= count:
+            raise NotFound('Invalid page.')
+        performance_kpis = Performance.objects.filter(employee=employee).aggregate(
+            total_reviews=Count('id'), avg_rating=Avg('rating')
+        )
+
+        # Sliced prefetches fetch just this page and the latest reviews
+        prefetch_related_objects(
+            [employee],
+            Prefetch(
+                'attendances', queryset=window.order_by('-date')[offset:offset + page_size],
+                to_attr='attendance_page'
+            ),
+            Prefetch(
+                'performances', queryset=Performance.objects.order_by('-review_date', '-id')[
+                    :params.validated_data['reviews']
+                ],
+                to_attr='recent_reviews'
+            ),
+        )
+
+        url = request.build_absolute_uri()
+        next_link = previous_link = None
+        if offset + page_size < count:
+            next_link = replace_query_param(url, self.paginator.page_query_param, page_number + 1)
+        if page_number == 2:
+            previous_link = remove_query_param(url, self.paginator.page_query_param)
+        elif page_number > 2:
+            previous_link = replace_query_param(url, self.paginator.page_query_param, page_number - 1)
+
+        latest = employee.recent_reviews[0] if employee.recent_reviews else None
+        return Response({
+            'employee': self.get_serializer(employee).data,
+            'attendance': {
+                'start_date': start_date,
+                'end_date': end_date,
+                'count': count,
+                'next': next_link,
+                'previous': previous_link,
+                'results': AttendanceSerializer(employee.attendance_page, many=True).data,
+            },
+            'recent_reviews': PerformanceSerializer(employee.recent_reviews, many=True).data,
+            'kpis': {
+                'attendance': {
+                    **attendance_kpis,
+                    'attendance_rate': (attendance_kpis['present'] / count) * 100 if count else 0,
+                },
+                'performance': {
+                    **performance_kpis,
+                    'latest_rating': latest.rating if latest else None,
+                    'last_review_date': latest.review_date if latest else None,
+                    'next_review_date': latest.next_review_date if latest else None,
+                },
+            },
+        })
 
     @action(detail=False, methods=['get'])
     def stats(self, request):
         """Get employee statistics"""
-        total_employees = Employee.objects.count()
-        active_employees = Employee.objects.filter(is_active=True).count()
-        departments = Department.objects.all()
+        totals = Employee.objects.aggregate(
+            total_employees=models.Count('id'),
+            active_employees=models.Count('id', filter=models.Q(is_active=True))
+        )
+        departments = Department.objects.with_stats()
         
         dept_stats = []
         for dept in departments:
@@ -102,7 +295,7 @@ class EmployeeViewSet(viewsets.ModelViewSet):
             })
         
         return Response({
-            'total_employees': total_employees,
-            'active_employees': active_employees,
+            'total_employees': totals['total_employees'],
+            'active_employees': totals['active_employees'],
             'department_distribution': dept_stats
         })
@@ -20,10 +20,14 @@ python manage.py migrate
 echo "Collecting static files..."
 python manage.py collectstatic --noinput
 
-# Seed data if needed
-echo "Seeding data..."
-python manage.py seed_data
+# Seed demo data only when asked to (SEED_DATA=True)
+case "${SEED_DATA:-False}" in
+    [Tt]rue|1|[Yy]es|[Oo]n)
+        echo "Seeding data..."
+        python manage.py seed_data
+        ;;
+esac
 
 # Start the application
-echo "Starting Django server..."
+echo "Starting server..."
 exec "$@" 
\ No newline at end of file
@@ -0,0 +1,183 @@
+"""
+Batched GET sub-requests: POST /api/v1/batch/.
+
+    {"requests": [{"id": "chart", "path": "/dashboard/api/attendance-chart/"},
+                  {"id": "recent", "path": "/api/v1/attendance/?ordering=-date&page_size=10"}],
+     "parallel": false}
+
+Each sub-request is resolved and handed straight to its view, skipping the
+middleware stack: the batch request's session and authenticated user are
+attached as AuthenticationMiddleware would attach them, so sub-requests
+authenticate without queries and each view still applies its own
+permissions. Only the routes of the API routers and the dashboard JSON
+endpoints can be batched.
+
+The response lists {"id", "status", "body"} per sub-request, in request
+order; sub-response bodies are spliced in as they were rendered, not decoded
+and encoded again. With `"parallel": true` sub-requests run on a thread pool
+of BATCH['MAX_WORKERS'] threads, each with its own database connection; the
+query profiler does not see queries run on those threads.
+"""
+import io
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
+from urllib.parse import urlsplit
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import close_old_connections
+from django.http import Http404, HttpResponse
+from django.urls import Resolver404, resolve
+from rest_framework import serializers
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny
+
+DASHBOARD_ROUTES = ['dashboard_stats', 'department_chart_data', 'attendance_chart_data', 'performance_chart_data']
+
+# Validators and request bodies of the batch request do not apply to its sub-requests
+DROPPED_HEADERS = {
+    'HTTP_AUTHORIZATION', 'HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE', 'CONTENT_TYPE', 'CONTENT_LENGTH',
+}
+
+_pool = None
+_pool_size = None
+_pool_lock = threading.Lock()
+
+
+def get_batch_settings():
+    return {
+        'MAX_REQUESTS': 20,
+        'MAX_WORKERS': 4,
+        **getattr(settings, 'BATCH', {}),
+    }
+
+
+@cache
+def batch_routes():
+    """URL names a sub-request may resolve to"""
+    from attendance.urls import router as attendance_router
+    from employees.urls import router as employees_router
+    from performance.urls import router as performance_router
+    names = {
+        pattern.name
+        for router in (employees_router, attendance_router, performance_router)
+        for pattern in router.urls
+    }
+    names.discard('api-root')
+    return names | set(DASHBOARD_ROUTES)
+
+
+def get_pool():
+    global _pool, _pool_size
+    size = max(get_batch_settings()['MAX_WORKERS'], 1)
+    with _pool_lock:
+        if _pool_size != size:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ThreadPoolExecutor(max_workers=size, thread_name_prefix='batch')
+            _pool_size = size
+        return _pool
+
+
+class SubRequestSerializer(serializers.Serializer):
+    id = serializers.CharField(required=False, max_length=100)
+    path = serializers.CharField(max_length=2000)
+
+    def validate_path(self, value):
+        url = urlsplit(value)
+        if url.scheme or url.netloc or not value.startswith('/'):
+            raise serializers.ValidationError('Expected a path on this server, e.g. /api/v1/employees/.')
+        return value
+
+
+class BatchSerializer(serializers.Serializer):
+    requests = SubRequestSerializer(many=True, allow_empty=False)
+    parallel = serializers.BooleanField(required=False, default=False)
+
+    def validate_requests(self, value):
+        max_requests = get_batch_settings()['MAX_REQUESTS']
+        if len(value) > max_requests:
+            raise serializers.ValidationError(f'Ensure this field has no more than {max_requests} elements.')
+        return value
+
+
+def sub_request(request, path):
+    """A GET request for `path` carrying the batch request's headers, session and user"""
+    url = urlsplit(path)
+    environ = {key: value for key, value in request.META.items() if key not in DROPPED_HEADERS}
+    environ.update({
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': url.path,
+        'QUERY_STRING': url.query,
+        'HTTP_ACCEPT': 'application/json',
+        'wsgi.input': io.BytesIO(),
+    })
+    sub = WSGIRequest(environ)
+    sub.session = getattr(request._request, 'session', None)
+    # Read by SessionAuthentication in place of the token or session lookup
+    sub.user = request.user
+    return sub
+
+
+def error_body(detail):
+    return json.dumps({'detail': detail}).encode()
+
+
+def run_sub_request(request, path):
+    """(status, JSON body bytes) of one sub-request"""
+    try:
+        match = resolve(urlsplit(path).path)
+    except Resolver404:
+        return 404, error_body('Not found.')
+    if match.url_name not in batch_routes():
+        return 400, error_body('This route cannot be batched.')
+
+    sub = sub_request(request, path)
+    sub.resolver_match = match
+    try:
+        response = match.func(sub, *match.args, **match.kwargs)
+    except Http404:
+        return 404, error_body('Not found.')
+    if hasattr(response, 'render'):
+        response.render()
+    if response.streaming or not response.get('Content-Type', '').startswith('application/json'):
+        if response.streaming:
+            response.close()
+        return 406, error_body('Only JSON responses can be batched.')
+    # e.g. 204 No Content
+    return response.status_code, response.content or b'null'
+
+
+def run_on_worker(request, path):
+    try:
+        return run_sub_request(request, path)
+    finally:
+        # Pool threads outlive requests; apply CONN_MAX_AGE like request_finished does
+        close_old_connections()
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def batch(request):
+    """
+    Run GET sub-requests for API and dashboard routes and return their responses together.
+
+    Body: `requests`, a list of {"path", optional "id"}, and `parallel`.
+    Each sub-request is authorized by its own view, as if requested directly.
+    """
+    params = BatchSerializer(data=request.data)
+    params.is_valid(raise_exception=True)
+    items = params.validated_data['requests']
+    paths = [item['path'] for item in items]
+
+    if params.validated_data['parallel'] and len(paths) > 1:
+        results = list(get_pool().map(run_on_worker, [request] * len(paths), paths))
+    else:
+        results = [run_sub_request(request, path) for path in paths]
+
+    parts = []
+    for index, (item, (status, body)) in enumerate(zip(items, results)):
+        head = json.dumps({'id': item.get('id', str(index)), 'status': status})
+        parts.append(head[:-1].encode() + b', "body": ' + body + b'}')
+    return HttpResponse(b'{"responses": [' + b', '.join(parts) + b']}', content_type='application/json')
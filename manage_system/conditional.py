@@ -0,0 +1,207 @@
+"""
+HTTP conditional GET for the API ViewSets and the dashboard JSON endpoints.
+
+Responses carry an ETag and a Last-Modified header derived from cheap probes
+run before the view: for each queryset the response reads, the latest
+`updated_at` (plus related timestamps, e.g. the department of an employee)
+and the row count, which changes when a row is deleted. All probes of a
+request run as one UNION ALL query. A request whose If-None-Match matches is
+answered with 304 Not Modified before the page is fetched or serialized.
+
+The ETag also covers the negotiated media type and today's date, since some
+fields (years_of_service, attendance_rate, "today" counters) move with the
+calendar. Last-Modified is informational: deleting a row does not move it,
+so If-Modified-Since alone never produces a 304. Responses are marked
+`Cache-Control: no-cache` so clients revalidate instead of guessing a
+freshness lifetime from Last-Modified.
+
+Writes that skip `updated_at` (queryset.update() without it, raw SQL) are not
+seen by the probes; the bulk paths in this project set it.
+"""
+import asyncio
+import hashlib
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.db.models import Count, DateTimeField, IntegerField, Max, Value
+from django.db.models.base import ModelBase
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+
+def probe_select(index, queryset, lookups, width):
+    """One row: the probe index, the row count and the latest value of each lookup"""
+    latest = {f'latest_{position}': Max(lookup) for position, lookup in enumerate(lookups)}
+    # Pad so every probe has the same columns for UNION ALL
+    latest.update({
+        f'latest_{position}': Value(None, output_field=DateTimeField())
+        for position in range(len(lookups), width)
+    })
+    return queryset.order_by().annotate(
+        probe=Value(index, output_field=IntegerField())
+    ).values('probe').annotate(rows=Count('pk'), **latest)
+
+
+def run_probes(probes):
+    """[(row count, [latest timestamps])] for (queryset, lookups) probes, in one query"""
+    width = max(len(lookups) for _, lookups in probes)
+    selects = [probe_select(index, queryset, lookups, width) for index, (queryset, lookups) in enumerate(probes)]
+    rows = {row['probe']: row for row in selects[0].union(*selects[1:], all=True)}
+    return [
+        (rows[index]['rows'], [rows[index][f'latest_{position}'] for position in range(len(lookups))])
+        for index, (_, lookups) in enumerate(probes)
+    ]
+
+
+def get_validators(probes, *extra, require_rows=False):
+    """
+    (ETag, Last-Modified datetime or None) for a list of (queryset, lookups) probes.
+
+    `extra` values (view name, media type, ...) are folded into the ETag. With
+    `require_rows`, returns None when the first queryset is empty.
+    """
+    results = run_probes(probes)
+    if require_rows and not results[0][0]:
+        return None
+    parts = [timezone.now().date().isoformat(), *extra]
+    latest = []
+    for rows, timestamps in results:
+        parts.append(rows)
+        parts.extend(timestamp.isoformat() if timestamp else '' for timestamp in timestamps)
+        latest.extend(timestamp for timestamp in timestamps if timestamp)
+    digest = hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+    return quote_etag(digest), max(latest, default=None)
+
+
+def not_modified(request, etag, last_modified):
+    """A 304 response when If-None-Match matches the ETag, otherwise None"""
+    # If-Modified-Since is left out on purpose; see the module docstring
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified):
+    if response.status_code not in (200, 304):
+        return response
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    ETag/Last-Modified validators and 304 responses for `list` and `retrieve`.
+
+    The list validators probe the filtered list queryset; retrieve probes the
+    requested row alone, so each object has its own validators. ViewSets set
+    `last_modified_fields` to the timestamp lookups that change whenever a
+    rendered field does, and extend get_conditional_probes() with other
+    querysets a response depends on (e.g. this month's attendance behind
+    attendance_rate).
+    """
+    last_modified_fields = ['updated_at']
+
+    def get_conditional_queryset(self):
+        """
+        Queryset the probes filter; defaults to get_queryset().
+
+        Override to drop aggregate annotations, which would turn the probe into
+        a subquery over the whole annotated list.
+        """
+        return self.get_queryset()
+
+    def get_conditional_probes(self, queryset):
+        """(queryset, timestamp lookups) pairs for a filtered list or single-row queryset"""
+        return [(queryset, self.last_modified_fields)]
+
+    def get_response_validators(self, queryset, require_rows=False):
+        return get_validators(
+            self.get_conditional_probes(queryset), self.request.accepted_media_type, require_rows=require_rows
+        )
+
+    def counts_list(self):
+        """
+        Whether a list response counts every matching row anyway.
+
+        The probe costs about as much as that COUNT, so lists paginated
+        without one (`?pagination=cursor`, `?count=none|capped`) get no
+        validators rather than a full count they were meant to avoid.
+        """
+        paginator = self.paginator
+        if paginator is None:
+            return True
+        get_count_mode = getattr(paginator, 'get_count_mode', None)
+        return get_count_mode is not None and get_count_mode(self.request) == 'exact'
+
+    def list(self, request, *args, **kwargs):
+        if not self.counts_list():
+            return super().list(request, *args, **kwargs)
+        validators = self.get_response_validators(self.filter_queryset(self.get_conditional_queryset()))
+        response = not_modified(request, *validators)
+        if response is not None:
+            return response
+        return set_validators(super().list(request, *args, **kwargs), *validators)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_conditional_queryset()).filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        validators = self.get_response_validators(queryset, require_rows=True)
+        if validators is None:
+            # Let retrieve() answer 404 as usual
+            return super().retrieve(request, *args, **kwargs)
+        response = not_modified(request, *validators)
+        if response is not None:
+            return response
+        return set_validators(super().retrieve(request, *args, **kwargs), *validators)
+
+
+def conditional_json_view(*sources):
+    """
+    ETag/Last-Modified validators and 304 responses for a GET JSON view.
+
+    Each source is a model, probed over all its rows, or a callable returning
+    the queryset the view reads, e.g. the current month's attendance; either
+    way `updated_at` and the row count are probed. Under cached_json_view,
+    apply it inside: a cache miss probes and may still answer 304 without
+    running the view, and a hit replays the stored validators without any
+    query.
+    """
+    def decorator(view_func):
+        view_name = f'{view_func.__module__}.{view_func.__name__}'
+
+        def validators():
+            probes = [
+                (source._default_manager.all() if isinstance(source, ModelBase) else source(), ['updated_at'])
+                for source in sources
+            ]
+            return get_validators(probes, view_name)
+
+        if asyncio.iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method != 'GET':
+                    return await view_func(request, *args, **kwargs)
+                current = await sync_to_async(validators)()
+                response = not_modified(request, *current)
+                if response is not None:
+                    return response
+                return set_validators(await view_func(request, *args, **kwargs), *current)
+            return async_wrapper
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET':
+                return view_func(request, *args, **kwargs)
+            current = validators()
+            response = not_modified(request, *current)
+            if response is not None:
+                return response
+            return set_validators(view_func(request, *args, **kwargs), *current)
+        return wrapper
+    return decorator
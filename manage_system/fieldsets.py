@@ -0,0 +1,216 @@
+"""
+Sparse fieldsets for the API ViewSets.
+
+`?fields=id,name` returns only the listed fields and `?omit=address` drops
+the listed ones. The selection also narrows the queryset: with `fields` the
+list/retrieve queries load just the columns (and select_related joins) the
+remaining serializer fields read, via only(); with `omit` the omitted columns
+are skipped with defer().
+
+Serializer fields that are not model fields (properties, annotations) can
+declare the columns they read in `Meta.field_dependencies`, e.g.
+{'years_of_service': ['date_of_joining']}; undeclared ones are assumed to
+need no columns.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+LOOKUP_SEP = '__'
+
+
+def parse_field_list(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def flatten_select_related(tree, prefix=''):
+    """Turn Query.select_related ({'employee': {'department': {}}}) into lookup paths"""
+    paths = []
+    for name, subtree in tree.items():
+        path = f'{prefix}{name}'
+        paths.append(path)
+        paths.extend(flatten_select_related(subtree, f'{path}{LOOKUP_SEP}'))
+    return paths
+
+
+def resolve_lookup(model, lookup):
+    """
+    Split a model lookup into (relation paths it traverses, concrete column).
+
+    Returns (None, None) when the first part is not a concrete model field,
+    e.g. a property, an annotation or a reverse relation.
+    """
+    relations = []
+    parts = lookup.split(LOOKUP_SEP)
+    for index, part in enumerate(parts):
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            field = None
+        if field is None or not field.concrete:
+            if index == 0:
+                return None, None
+            # Property on a related model; load the whole related row
+            return relations, LOOKUP_SEP.join(parts[:index])
+        if field.is_relation and index < len(parts) - 1:
+            relations.append(LOOKUP_SEP.join(parts[:index + 1]))
+            model = field.related_model
+    return relations, lookup
+
+
+def joined_prefix(lookup, joined):
+    """
+    Trim a lookup to the part loadable with the joined relation paths.
+
+    'employee__department__name' stays as is when 'employee__department' is
+    joined, and becomes 'employee__department' (the foreign key column on
+    the joined employee row) when only 'employee' is.
+    """
+    parts = lookup.split(LOOKUP_SEP)
+    depth = 0
+    while depth < len(parts) - 1 and LOOKUP_SEP.join(parts[:depth + 1]) in joined:
+        depth += 1
+    return LOOKUP_SEP.join(parts[:depth + 1])
+
+
+class SparseFieldsetMixin:
+    """
+    Adds `?fields=` and `?omit=` to GET requests of a ModelViewSet.
+
+    Serializers returned by get_serializer() drop the unselected fields on
+    every GET action; the queryset is narrowed for the actions listed in
+    `sparse_queryset_actions`, which serialize get_queryset() rows directly.
+    """
+    fields_query_param = 'fields'
+    omit_query_param = 'omit'
+    sparse_queryset_actions = ('list', 'retrieve')
+
+    def get_sparse_fieldset(self):
+        """Names of the serializer fields to return, or None for all of them"""
+        if hasattr(self, '_sparse_fieldset'):
+            return self._sparse_fieldset
+
+        self._sparse_fieldset = None
+        request = getattr(self, 'request', None)
+        if request is None or request.method not in ('GET', 'HEAD'):
+            return None
+        fields = request.query_params.get(self.fields_query_param)
+        omit = request.query_params.get(self.omit_query_param)
+        if fields is None and omit is None:
+            return None
+
+        available = list(self.get_serializer_class()().fields)
+        selected = parse_field_list(fields) if fields is not None else available
+        omitted = parse_field_list(omit) if omit is not None else []
+        errors = {}
+        for param, names in ((self.fields_query_param, selected), (self.omit_query_param, omitted)):
+            unknown = [name for name in names if name not in available]
+            if unknown:
+                errors[param] = [
+                    f"Unknown field(s): {', '.join(unknown)}. "
+                    f"Available fields: {', '.join(available)}"
+                ]
+        if errors:
+            raise ValidationError(errors)
+
+        self._sparse_fieldset = [name for name in available if name in selected and name not in omitted]
+        return self._sparse_fieldset
+
+    def wants_field(self, name):
+        """Whether the response includes the given serializer field"""
+        fieldset = self.get_sparse_fieldset()
+        return fieldset is None or name in fieldset
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fieldset = self.get_sparse_fieldset()
+        if fieldset is not None:
+            target = getattr(serializer, 'child', serializer)
+            for name in list(target.fields):
+                if name not in fieldset:
+                    target.fields.pop(name)
+        return serializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in self.sparse_queryset_actions or self.get_sparse_fieldset() is None:
+            return queryset
+        if self.request.query_params.get(self.fields_query_param) is not None:
+            return self.apply_only(queryset)
+        return self.apply_defer(queryset)
+
+    def get_field_lookups(self, serializer_fields):
+        """Model lookups read by the given serializer fields, and the relations loaded whole"""
+        dependencies = getattr(getattr(self.get_serializer_class(), 'Meta', None), 'field_dependencies', {})
+        lookups, whole_relations = set(), set()
+        for name, field in serializer_fields.items():
+            if name in dependencies:
+                lookups.update(dependencies[name])
+            elif field.source != '*':
+                lookup = LOOKUP_SEP.join(field.source_attrs)
+                if isinstance(field, serializers.BaseSerializer):
+                    whole_relations.add(lookup)
+                lookups.add(lookup)
+
+        # Keyset pagination reads the ordering values of the boundary rows
+        for name in getattr(self.paginator, 'ordering', None) or ():
+            lookups.add(name.lstrip('-'))
+        return lookups, whole_relations
+
+    def apply_only(self, queryset):
+        model = queryset.model
+        fields = self.get_serializer_class()().fields
+        selected = {name: fields[name] for name in self.get_sparse_fieldset()}
+        lookups, whole_relations = self.get_field_lookups(selected)
+
+        columns, relations = {model._meta.pk.name}, set()
+        for lookup in lookups:
+            lookup_relations, column = resolve_lookup(model, lookup)
+            if column is None:
+                continue
+            relations.update(lookup_relations)
+            columns.add(column)
+
+        select_related = queryset.query.select_related
+        if isinstance(select_related, dict):
+            def needed(path):
+                return path in relations or any(
+                    path == root or path.startswith(f'{root}{LOOKUP_SEP}') for root in whole_relations
+                )
+            kept = [path for path in flatten_select_related(select_related) if needed(path)]
+            queryset = queryset.select_related(None)
+            if kept:
+                queryset = queryset.select_related(*kept)
+        else:
+            kept = []
+
+        only = set()
+        for column in columns:
+            # Nested serializers read every column of their relation
+            root = next((root for root in whole_relations if column.startswith(f'{root}{LOOKUP_SEP}')), None)
+            only.add(root or joined_prefix(column, kept))
+        return queryset.only(*only)
+
+    def apply_defer(self, queryset):
+        model = queryset.model
+        fields = self.get_serializer_class()().fields
+        fieldset = self.get_sparse_fieldset()
+        kept_lookups, _ = self.get_field_lookups(
+            {name: field for name, field in fields.items() if name in fieldset}
+        )
+        omitted_lookups, _ = self.get_field_lookups(
+            {name: field for name, field in fields.items() if name not in fieldset}
+        )
+
+        deferred = []
+        for lookup in omitted_lookups - kept_lookups:
+            if LOOKUP_SEP in lookup:
+                continue
+            try:
+                field = model._meta.get_field(lookup)
+            except FieldDoesNotExist:
+                continue
+            # Foreign keys may be traversed by select_related, so only plain columns are skipped
+            if field.concrete and not field.is_relation and not field.primary_key:
+                deferred.append(lookup)
+        return queryset.defer(*deferred) if deferred else queryset
@@ -0,0 +1,69 @@
+"""
+Health check endpoint for load balancers and orchestrators.
+
+GET /healthz runs `SELECT 1` on the default database and reports how this
+server process reuses connections: the psycopg pool's statistics when
+DATABASE_POOL is on, otherwise the persistent connection settings. Pool
+statistics are per process, so `pid` tells the workers apart.
+
+The status is `ok`, `degraded` when the pool is saturated (every
+connection in use and requests queueing for one), or `unavailable` with a
+503 when the database cannot be reached. A saturated pool still returns
+200 so a busy instance is not taken out of rotation.
+"""
+import os
+import time
+from django.db import DatabaseError, connection
+from django.http import JsonResponse
+from django.views.decorators.cache import never_cache
+
+
+def pool_stats(pool):
+    """Current usage of a psycopg_pool.ConnectionPool, plus its counters since it opened"""
+    stats = pool.get_stats()
+    in_use = stats['pool_size'] - stats['pool_available']
+    return {
+        'min_size': stats['pool_min'],
+        'max_size': stats['pool_max'],
+        'size': stats['pool_size'],
+        'available': stats['pool_available'],
+        'in_use': in_use,
+        'saturation': round(in_use / stats['pool_max'], 3),
+        'requests_waiting': stats.get('requests_waiting', 0),
+        # Counters are only present once they are non-zero
+        'requests': stats.get('requests_num', 0),
+        'requests_queued': stats.get('requests_queued', 0),
+        'requests_wait_ms': stats.get('requests_wait_ms', 0),
+        'requests_failed': stats.get('requests_errors', 0),
+    }
+
+
+@never_cache
+def health_check(request):
+    database = {'vendor': connection.vendor}
+    started = time.perf_counter()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+    except DatabaseError as exc:
+        database['error'] = str(exc).strip()
+        status = 'unavailable'
+    else:
+        database['latency_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        status = 'ok'
+
+    pool = getattr(connection, 'pool', None)
+    if pool is not None:
+        # This request's own connection counts as in use
+        database['pool'] = pool_stats(pool)
+        if status == 'ok' and database['pool']['requests_waiting']:
+            status = 'degraded'
+    else:
+        database['conn_max_age'] = connection.settings_dict['CONN_MAX_AGE']
+        database['conn_health_checks'] = connection.settings_dict['CONN_HEALTH_CHECKS']
+
+    return JsonResponse(
+        {'status': status, 'pid': os.getpid(), 'database': database},
+        status=503 if status == 'unavailable' else 200
+    )
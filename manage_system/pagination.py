@@ -0,0 +1,255 @@
+"""
+Pagination classes shared by the API ViewSets.
+
+StandardPagination is the project-wide page-number pagination with an
+optional `count` mode that skips or caps the COUNT(*) query. KeysetPagination
+is an opt-in cursor mode (`?pagination=cursor`) that seeks past the last row
+of the previous page instead of using OFFSET, so deep pages cost the same as
+the first one.
+"""
+import base64
+import json
+from functools import reduce
+from operator import or_
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class StandardPagination(PageNumberPagination):
+    """
+    Page-number pagination with a selectable count mode.
+
+    `?count=exact` (default) runs the usual COUNT(*), `?count=none` skips it
+    and `?count=capped` counts at most `count_cap` rows.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    count_query_param = 'count'
+    count_modes = ('exact', 'none', 'capped')
+    count_cap = 10000
+
+    def get_count_mode(self, request):
+        mode = request.query_params.get(self.count_query_param, 'exact')
+        return mode if mode in self.count_modes else 'exact'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_mode = self.get_count_mode(request)
+        if self.count_mode == 'exact':
+            return super().paginate_queryset(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        try:
+            self.page_number = int(request.query_params.get(self.page_query_param, 1))
+            if self.page_number < 1:
+                raise ValueError
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_page_message.format(
+                page_number=request.query_params.get(self.page_query_param), message='Invalid page.'
+            ))
+
+        # Fetch one extra row to learn whether a next page exists without counting
+        offset = (self.page_number - 1) * page_size
+        rows = list(queryset[offset:offset + page_size + 1])
+        self.has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        if self.page_number > 1 and not rows:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=self.page_number, message='That page contains no results'
+            ))
+
+        self.count = None
+        self.count_capped = False
+        if self.count_mode == 'capped':
+            if not self.has_next:
+                self.count = offset + len(rows)
+            else:
+                self.count = queryset[:self.count_cap + 1].count()
+                self.count_capped = self.count > self.count_cap
+                self.count = min(self.count, self.count_cap)
+
+        self.request = request
+        return rows
+
+    def get_next_link(self):
+        if self.count_mode == 'exact':
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.page_query_param, self.page_number + 1)
+
+    def get_previous_link(self):
+        if self.count_mode == 'exact':
+            return super().get_previous_link()
+        if self.page_number <= 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.page_number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.page_number - 1)
+
+    def get_paginated_response(self, data):
+        if self.count_mode == 'exact':
+            return super().get_paginated_response(data)
+        response_data = {
+            'count': self.count,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+        if self.count_mode == 'capped':
+            response_data['count_capped'] = self.count_capped
+        return Response(response_data)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a fixed, unique ordering such as ('-date', 'id').
+
+    The cursor encodes every ordering value of the boundary row, and pages are
+    fetched with a lexicographic "after this row" filter plus LIMIT, so the
+    database never scans or counts the rows before the requested page.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = StandardPagination.max_page_size
+
+    def __init__(self, ordering):
+        self.ordering = tuple(ordering)
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+            if page_size > 0:
+                return min(page_size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    def encode_cursor(self, values, reverse):
+        payload = json.dumps({'v': values, 'r': reverse}, default=str, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, queryset, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            raw_values, reverse = payload['v'], bool(payload['r'])
+            if len(raw_values) != len(self.ordering):
+                raise ValueError
+            values = [
+                self.get_field(queryset.model, name.lstrip('-')).to_python(value)
+                for name, value in zip(self.ordering, raw_values)
+            ]
+        except (TypeError, ValueError, KeyError, ValidationError, json.JSONDecodeError):
+            raise NotFound('Invalid cursor')
+        return values, reverse
+
+    def get_field(self, model, lookup):
+        *relations, field_name = lookup.split('__')
+        for relation in relations:
+            model = model._meta.get_field(relation).related_model
+        return model._meta.get_field(field_name)
+
+    def get_row_values(self, row):
+        # values() rows are keyed by lookup
+        if isinstance(row, dict):
+            return [row[name.lstrip('-')] for name in self.ordering]
+        values = []
+        for name in self.ordering:
+            value = row
+            for attribute in name.lstrip('-').split('__'):
+                value = getattr(value, attribute)
+            values.append(value)
+        return values
+
+    def seek_filter(self, values, reverse):
+        """Q matching rows strictly after (or before, when reversed) the boundary values"""
+        conditions = []
+        for index, name in enumerate(self.ordering):
+            descending = name.startswith('-') != reverse
+            lookup = name.lstrip('-') + ('__lt' if descending else '__gt')
+            equal_prefix = {
+                self.ordering[i].lstrip('-'): values[i] for i in range(index)
+            }
+            conditions.append(Q(**equal_prefix, **{lookup: values[index]}))
+        return reduce(or_, conditions)
+
+    def reversed_ordering(self):
+        return [name[1:] if name.startswith('-') else f'-{name}' for name in self.ordering]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        cursor = request.query_params.get(self.cursor_query_param)
+
+        reverse = False
+        if cursor:
+            values, reverse = self.decode_cursor(queryset, cursor)
+            queryset = queryset.filter(self.seek_filter(values, reverse))
+        queryset = queryset.order_by(*(self.reversed_ordering() if reverse else self.ordering))
+
+        rows = list(queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        # Moving backwards means there is always a next page, and vice versa
+        self.has_next = has_more if not reverse else True
+        self.has_previous = bool(cursor) and (has_more if reverse else True)
+        self.first_values = self.get_row_values(rows[0]) if rows else None
+        self.last_values = self.get_row_values(rows[-1]) if rows else None
+        return rows
+
+    def get_link(self, values, reverse):
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(values, reverse))
+
+    def get_next_link(self):
+        if not self.has_next or self.last_values is None:
+            return None
+        return self.get_link(self.last_values, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or self.first_values is None:
+            return None
+        return self.get_link(self.first_values, reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+
+class PaginationModeMixin:
+    """
+    Lets clients opt into keyset pagination with `?pagination=cursor`.
+
+    ViewSets set `cursor_ordering` to a unique ordering, e.g. ('-date', 'id');
+    in cursor mode it replaces any `ordering` query parameter.
+    """
+    pagination_mode_query_param = 'pagination'
+    cursor_ordering = None
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            query_params = getattr(self.request, 'query_params', {})
+            mode = query_params.get(self.pagination_mode_query_param)
+            if mode == 'cursor' and self.cursor_ordering:
+                self._paginator = KeysetPagination(self.cursor_ordering)
+            else:
+                return super().paginator
+        return self._paginator
@@ -0,0 +1,279 @@
+"""
+Per-request query profiling.
+
+QueryProfilingMiddleware times every SQL statement a request runs and the
+time spent rendering the response, reports them in a `Server-Timing` header
+and keeps a summary of recent requests in an in-process ring buffer. The
+`/api/v1/_profile/` view (DEBUG only) ranks endpoints from that buffer.
+
+Under ASGI the middleware runs on the event loop. Database connections are
+thread-local, so it records the queries run on the request's thread-sensitive
+worker thread, where sync_to_async() and the async ORM run them; queries on
+other threads, such as the dashboard's query pool, are not counted.
+
+Per-endpoint query budgets are configured in QUERY_PROFILING['BUDGETS'],
+keyed by URL name for GET requests or 'METHOD url-name' for others; a request that goes over its budget is logged,
+or raises QueryBudgetExceeded when BUDGET_ACTION is 'raise' (as in tests).
+"""
+import logging
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import ExitStack
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import Http404
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+_history = deque()
+_history_lock = threading.Lock()
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def get_profiling_settings():
+    return {
+        'ENABLED': True,
+        'SLOWEST_QUERIES': 3,
+        'HISTORY_SIZE': 1000,
+        'BUDGETS': {},
+        'BUDGET_ACTION': 'log',
+        **getattr(settings, 'QUERY_PROFILING', {}),
+    }
+
+
+class QueryRecorder:
+    """Database execute wrapper collecting (duration in ms, sql) per statement"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(((time.perf_counter() - start) * 1000, sql))
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def duration(self):
+        return sum(duration for duration, _ in self.queries)
+
+    def slowest(self, limit):
+        return sorted(self.queries, key=lambda query: query[0], reverse=True)[:limit]
+
+
+def endpoint_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match and match.view_name:
+        return match.view_name
+    return request.path
+
+
+def timing_entry(name, duration, description=None):
+    entry = f'{name};dur={duration:.2f}'
+    if description:
+        description = description.replace('\\', '\\\\').replace('"', '\\"')
+        entry += f';desc="{description}"'
+    return entry
+
+
+def record_request(entry, history_size):
+    global _history
+    with _history_lock:
+        if _history.maxlen != history_size:
+            _history = deque(_history, maxlen=history_size)
+        _history.append(entry)
+
+
+def get_history():
+    with _history_lock:
+        return list(_history)
+
+
+def clear_history():
+    with _history_lock:
+        _history.clear()
+
+
+class QueryProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        config = get_profiling_settings()
+        if not config['ENABLED']:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        request._profiling_render_time = 0.0
+        start = time.perf_counter()
+        with self.record_queries(recorder):
+            response = self.get_response(request)
+        return self.finish(config, request, response, recorder, start)
+
+    async def __acall__(self, request):
+        config = get_profiling_settings()
+        if not config['ENABLED']:
+            return await self.get_response(request)
+
+        recorder = QueryRecorder()
+        request._profiling_render_time = 0.0
+        start = time.perf_counter()
+        # Installed on the thread the request's database work runs on
+        recording = await sync_to_async(self.record_queries)(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(recording.close)()
+        return self.finish(config, request, response, recorder, start)
+
+    def record_queries(self, recorder):
+        """An ExitStack wrapping this thread's connections with the recorder until closed"""
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        return stack
+
+    def finish(self, config, request, response, recorder, start):
+        total = (time.perf_counter() - start) * 1000
+
+        endpoint = endpoint_name(request)
+        render = request._profiling_render_time
+        slowest = recorder.slowest(config['SLOWEST_QUERIES'])
+
+        timings = [
+            timing_entry('db', recorder.duration, f'{recorder.count} queries'),
+            timing_entry('render', render),
+            timing_entry('app', max(total - recorder.duration - render, 0)),
+            timing_entry('total', total),
+        ]
+        for index, (duration, sql) in enumerate(slowest, start=1):
+            # SQL text only leaves the server in development
+            timings.append(timing_entry(f'sql-{index}', duration, sql[:120] if settings.DEBUG else None))
+        response['Server-Timing'] = ', '.join(timings)
+
+        if endpoint != 'query_profile':
+            record_request({
+                'endpoint': endpoint,
+                'method': request.method,
+                'status': response.status_code,
+                'duration': total,
+                'render': render,
+                'db_time': recorder.duration,
+                'queries': recorder.count,
+                'slowest': [{'duration': round(duration, 2), 'sql': sql} for duration, sql in slowest],
+            }, config['HISTORY_SIZE'])
+
+        self.check_budget(config, endpoint, request, recorder)
+        return response
+
+    def process_template_response(self, request, response):
+        if not hasattr(request, '_profiling_render_time'):
+            # Profiling is disabled
+            return response
+        # DRF responses are rendered after the view returns; time that step
+        start = time.perf_counter()
+
+        def rendered(response):
+            request._profiling_render_time += (time.perf_counter() - start) * 1000
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def check_budget(self, config, endpoint, request, recorder):
+        budgets = config['BUDGETS']
+        budget = budgets.get(f'{request.method} {endpoint}')
+        if budget is None and request.method in ('GET', 'HEAD'):
+            budget = budgets.get(endpoint)
+        if budget is None or recorder.count <= budget:
+            return
+        message = (
+            f'{request.method} {request.get_full_path()} ({endpoint}) ran {recorder.count} queries, '
+            f'budget is {budget}'
+        )
+        if config['BUDGET_ACTION'] == 'raise':
+            statements = '\n'.join(sql for _, sql in recorder.queries)
+            raise QueryBudgetExceeded(f'{message}:\n{statements}')
+        logger.warning(message)
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(entries):
+    grouped = defaultdict(list)
+    for entry in entries:
+        grouped[(entry['method'], entry['endpoint'])].append(entry)
+
+    summary = []
+    for (method, endpoint), requests in grouped.items():
+        durations = [entry['duration'] for entry in requests]
+        queries = [entry['queries'] for entry in requests]
+        slowest = max(requests, key=lambda entry: entry['duration'])
+        summary.append({
+            'endpoint': endpoint,
+            'method': method,
+            'requests': len(requests),
+            'p50_ms': round(percentile(durations, 50), 2),
+            'p95_ms': round(percentile(durations, 95), 2),
+            'max_ms': round(max(durations), 2),
+            'avg_db_ms': round(sum(entry['db_time'] for entry in requests) / len(requests), 2),
+            'avg_render_ms': round(sum(entry['render'] for entry in requests) / len(requests), 2),
+            'p95_queries': percentile(queries, 95),
+            'max_queries': max(queries),
+            'slowest_queries': slowest['slowest'],
+        })
+    return summary
+
+
+@api_view(['GET', 'DELETE'])
+def query_profile(request):
+    """
+    Worst endpoints of the recent requests held in memory (DEBUG only).
+
+    `?sort=latency` (default) orders by p95 latency, `?sort=queries` by p95
+    query count; `?limit=` caps the rows. DELETE clears the buffer.
+    """
+    if not settings.DEBUG:
+        raise Http404
+
+    if request.method == 'DELETE':
+        clear_history()
+        return Response(status=204)
+
+    sort_key = 'p95_queries' if request.query_params.get('sort') == 'queries' else 'p95_ms'
+    try:
+        limit = max(int(request.query_params.get('limit', 20)), 1)
+    except ValueError:
+        limit = 20
+
+    entries = get_history()
+    summary = sorted(summarize(entries), key=lambda row: row[sort_key], reverse=True)
+    return Response({
+        'requests': len(entries),
+        'history_size': get_profiling_settings()['HISTORY_SIZE'],
+        'endpoints': summary[:limit],
+    })
@@ -0,0 +1,226 @@
+"""
+Per-department rollup tables kept current from the rows they summarize.
+
+A Rollup subclass describes one table: the source model and its date field,
+the rollup model keyed on (period fields..., department), the coverage model
+recording how far back the table is complete, and the aggregates of one
+rollup row. refresh() recomputes the rows behind (day, department_id) keys,
+rebuild() backfills from a date onwards and covers() tells readers whether
+they may use the table.
+
+Source rows belong to employees, so moving or deleting an employee changes
+every registered table. The Employee receivers below look up the employee's
+previous department and dates once for all of them.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from django.db import transaction
+from django.db.models import Min, Q, Value
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from employees.models import Department, Employee
+
+ROLLUPS = []
+
+
+def register(rollup):
+    """Add a rollup to the tables the Employee receivers keep current"""
+    ROLLUPS.append(rollup)
+    return rollup
+
+
+class Rollup:
+    source = None
+    date_field = None
+    model = None
+    coverage_model = None
+    # Fields of the rollup's unique key besides department, e.g. ('date',)
+    period_fields = ()
+    fields = []
+    refresh_chunk_size = 500
+    # Source days aggregated per query by rebuild(); None aggregates in one query
+    rebuild_chunk_days = None
+
+    def aggregates(self):
+        """Aggregate expressions producing one rollup row per group of source rows"""
+        raise NotImplementedError
+
+    def group(self, queryset):
+        """values() of a source queryset grouped by period and department"""
+        raise NotImplementedError
+
+    def build(self, row):
+        """Unsaved rollup object for one grouped row"""
+        raise NotImplementedError
+
+    def period_of(self, day):
+        """Values of period_fields for a source date"""
+        raise NotImplementedError
+
+    def in_periods(self, periods):
+        """Q selecting the source rows of the given periods"""
+        raise NotImplementedError
+
+    def periods_from(self, start_date):
+        """Q selecting the rollup rows of periods starting on or after start_date"""
+        raise NotImplementedError
+
+    def period_start(self, day):
+        return day
+
+    def key(self, rollup):
+        return tuple(getattr(rollup, name) for name in self.period_fields) + (rollup.department_id,)
+
+    def compute(self, queryset):
+        """Yield unsaved rollup objects grouped by (period, department)"""
+        rows = self.group(queryset.order_by()).annotate(**self.aggregates())
+        for row in rows.iterator():
+            yield self.build(row)
+
+    def save(self, rollups, batch_size=1000):
+        """Insert or update rollup rows keyed on (period, department)"""
+        self.model.objects.bulk_create(
+            rollups,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=[*self.period_fields, 'department'],
+            update_fields=self.fields + ['updated_at'],
+        )
+
+    def refresh(self, keys):
+        """Recompute the rollup rows for an iterable of (source date, department_id) keys"""
+        date_field = self.source._meta.get_field(self.date_field)
+        keys = {
+            self.period_of(date_field.to_python(day)) + (department_id,)
+            for day, department_id in keys
+            if day is not None and department_id is not None
+        }
+        if not keys:
+            return
+
+        # Chunk by period to keep IN clauses within database parameter limits
+        periods = sorted({key[:-1] for key in keys})
+        for index in range(0, len(periods), self.refresh_chunk_size):
+            chunk_periods = periods[index:index + self.refresh_chunk_size]
+            chunk_keys = {key for key in keys if key[:-1] in set(chunk_periods)}
+            department_ids = {key[-1] for key in chunk_keys}
+            rollups = [
+                rollup for rollup in self.compute(self.source.objects.filter(
+                    self.in_periods(chunk_periods), employee__department_id__in=department_ids
+                ))
+                if self.key(rollup) in chunk_keys
+            ]
+
+            with transaction.atomic():
+                empty_keys = chunk_keys - {self.key(rollup) for rollup in rollups}
+                if empty_keys:
+                    stale = Q()
+                    for *period, department_id in empty_keys:
+                        stale |= Q(**dict(zip(self.period_fields, period)), department_id=department_id)
+                    self.model.objects.filter(stale).delete()
+                if rollups:
+                    self.save(rollups)
+
+    def chunks(self, queryset, start_date, chunk_days):
+        if not chunk_days:
+            yield queryset
+            return
+        last_date = queryset.order_by(f'-{self.date_field}').values_list(self.date_field, flat=True).first()
+        chunk_start = start_date
+        while last_date is not None and chunk_start <= last_date:
+            chunk_end = chunk_start + timedelta(days=chunk_days - 1)
+            yield queryset.filter(**{f'{self.date_field}__range': [chunk_start, chunk_end]})
+            chunk_start = chunk_end + timedelta(days=1)
+
+    def rebuild(self, start_date=None, chunk_days=None):
+        """
+        Recompute every rollup row from the period of start_date onwards.
+
+        Defaults to the earliest source row. With chunk_days, work is split
+        into date chunks so long histories are streamed rather than held in
+        memory. Returns the number of rollup rows written.
+        """
+        # A full rebuild also covers the empty periods before the first row
+        coverage_start = self.period_start(start_date or date.min)
+        if start_date is None:
+            start_date = self.source.objects.aggregate(
+                first=Min(self.date_field)
+            )['first'] or timezone.now().date()
+        start_date = self.period_start(start_date)
+
+        written = 0
+        with transaction.atomic():
+            self.model.objects.filter(self.periods_from(start_date)).delete()
+            rows = self.source.objects.filter(**{f'{self.date_field}__gte': start_date})
+            for chunk in self.chunks(rows, start_date, chunk_days or self.rebuild_chunk_days):
+                rollups = list(self.compute(chunk))
+                self.save(rollups)
+                written += len(rollups)
+
+            # Signals keep every period current, so older coverage stays valid
+            coverage = self.coverage_model.objects.order_by('start_date').first()
+            if coverage is None:
+                self.coverage_model.objects.create(start_date=coverage_start)
+            else:
+                coverage.start_date = min(coverage.start_date, coverage_start)
+                coverage.save()
+        return written
+
+    def covers(self, start_date):
+        """Whether rollup rows are complete for every period from start_date onwards"""
+        coverage = self.coverage_model.objects.order_by('start_date').first()
+        return coverage is not None and coverage.start_date <= start_date
+
+
+def employee_dates(employee):
+    """{rollup: source dates} of an employee's rows in every registered table, in one query"""
+    querysets = [
+        rollup.source.objects.filter(employee=employee).order_by().values_list(Value(index), rollup.date_field)
+        for index, rollup in enumerate(ROLLUPS)
+    ]
+    dates = defaultdict(list)
+    if querysets:
+        # UNION also drops duplicate dates
+        for index, day in querysets[0].union(*querysets[1:]):
+            dates[ROLLUPS[index]].append(day)
+    return dates
+
+
+@receiver(pre_save, sender=Employee)
+def remember_previous_department(sender, instance, raw=False, **kwargs):
+    instance._previous_department_id = None
+    if raw or instance.pk is None:
+        return
+    instance._previous_department_id = Employee.objects.filter(
+        pk=instance.pk
+    ).values_list('department_id', flat=True).first()
+
+
+@receiver(post_save, sender=Employee)
+def move_rollups_on_department_change(sender, instance, raw=False, created=False, **kwargs):
+    previous_department_id = getattr(instance, '_previous_department_id', None)
+    if raw or created or previous_department_id in (None, instance.department_id):
+        return
+    for rollup, dates in employee_dates(instance).items():
+        rollup.refresh(
+            (day, department_id)
+            for day in dates
+            for department_id in (previous_department_id, instance.department_id)
+        )
+
+
+@receiver(pre_delete, sender=Employee)
+def remember_employee_dates(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, Department):
+        return
+    instance._rollup_dates = employee_dates(instance)
+
+
+@receiver(post_delete, sender=Employee)
+def update_rollups_on_employee_delete(sender, instance, origin=None, **kwargs):
+    # Department deletes cascade to that department's rollup rows
+    if isinstance(origin, Department):
+        return
+    for rollup, dates in getattr(instance, '_rollup_dates', {}).items():
+        rollup.refresh((day, instance.department_id) for day in dates)
@@ -0,0 +1,239 @@
+"""
+Fast list serialization for the API ViewSets.
+
+ViewSets using FastListMixin build their list pages straight from values()
+rows instead of model instances: each serializer field is compiled once per
+request into a (lookup, converter) pair, so there is no per-row field lookup,
+attribute-chain walking or model instantiation. Output is byte-identical to
+the regular serializer, which stays in use for every other action and for
+serializers with fields the compiler does not understand.
+
+FastJSONRenderer is a drop-in JSONRenderer that encodes with orjson when it
+is installed and produces the same bytes as the stdlib-based renderer, except
+for NaN and infinity, which it writes as null.
+"""
+import operator
+import re
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.utils.functional import cached_property
+from rest_framework import fields as drf_fields
+from rest_framework import serializers
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+LOOKUP_SEP = '__'
+
+# Fields whose to_representation() returns database values unchanged
+IDENTITY_FIELDS = (
+    drf_fields.BooleanField,
+    drf_fields.CharField,
+    drf_fields.EmailField,
+    drf_fields.ChoiceField,
+    drf_fields.IntegerField,
+    drf_fields.ReadOnlyField,
+)
+ISO_FORMAT_FIELDS = (drf_fields.DateField, drf_fields.TimeField)
+
+# orjson formats floats below 1e-4 or from 1e16 up unlike repr(), e.g. 0.00001
+# and 1e16 for 1e-05 and 1e+16. Starting the pattern with a literal lets re
+# skip ahead quickly; matches inside strings only cost a needless fallback.
+ORJSON_EXPONENT = re.compile(rb'e(?<=[0-9]e)[-0-9]')
+
+
+def orjson_float_differs(output):
+    """Whether orjson output may hold a float the stdlib encoder writes differently"""
+    return b'0.0000' in output or ORJSON_EXPONENT.search(output) is not None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer encoding with orjson when available.
+
+    Falls back to the stdlib encoder for indented output, non-default JSON
+    settings, anything orjson refuses and output with floats orjson formats
+    differently, so the bytes match. The exception is NaN and infinity:
+    orjson writes them as null where the stdlib encoder raises under
+    STRICT_JSON. Finding them would mean walking the whole payload in Python,
+    which costs as much as encoding it with the stdlib.
+    """
+    use_orjson = True
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or not self.use_orjson
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        encoder = self.encoder_class()
+        try:
+            ret = orjson.dumps(
+                data,
+                default=encoder.default,
+                # Let DRF's encoder format dates/times exactly like the stdlib path
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        if orjson_float_differs(ret):
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+class FastPathUnavailable(Exception):
+    """Raised when a serializer has a field that cannot be built from values()"""
+
+
+def model_lookup(model, source_attrs):
+    """The values() lookup for a source path, or None if it is not a chain of concrete fields"""
+    for index, attr in enumerate(source_attrs):
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return None
+        if not field.concrete:
+            return None
+        if index < len(source_attrs) - 1:
+            # DRF omits the key entirely when a nullable relation is empty
+            if not field.is_relation or field.null:
+                return None
+            model = field.related_model
+    return LOOKUP_SEP.join(source_attrs)
+
+
+def field_converter(field):
+    """A function turning a database value into the field's representation, or None for identity"""
+    if isinstance(field, PrimaryKeyRelatedField):
+        if field.pk_field is not None:
+            raise FastPathUnavailable(field.field_name)
+        return None
+    if type(field) in IDENTITY_FIELDS:
+        return None
+    if type(field) in ISO_FORMAT_FIELDS:
+        default_format = (
+            api_settings.DATE_FORMAT if isinstance(field, drf_fields.DateField) else api_settings.TIME_FORMAT
+        )
+        output_format = getattr(field, 'format', default_format)
+        if output_format and output_format.lower() == drf_fields.ISO_8601:
+            return operator.methodcaller('isoformat')
+    if isinstance(field, (serializers.BaseSerializer, drf_fields.SerializerMethodField)):
+        raise FastPathUnavailable(field.field_name)
+    return field.to_representation
+
+
+class RowBuilder:
+    """
+    Builds serializer-shaped dicts from values() rows.
+
+    Compiles the readable fields of a (possibly sparse) model serializer
+    into values() lookups and converters; model properties are evaluated on
+    a bare instance populated with the columns (or annotations) listed for
+    them in the serializer's Meta.field_dependencies.
+    """
+
+    def __init__(self, serializer):
+        serializer = getattr(serializer, 'child', serializer)
+        meta = getattr(serializer, 'Meta', None)
+        self.model = meta.model
+        dependencies = getattr(meta, 'field_dependencies', {})
+
+        self.lookups = []
+        self.columns = []
+        self.properties = []
+        for field in serializer._readable_fields:
+            if field.source == '*':
+                raise FastPathUnavailable(field.field_name)
+            source_attrs = field.source_attrs
+            prop = getattr(self.model, source_attrs[0], None) if len(source_attrs) == 1 else None
+            if isinstance(prop, (property, cached_property)):
+                for lookup in dependencies.get(field.field_name, []):
+                    self.add_lookup(lookup)
+                # An annotation named like a cached_property is read from the instance dict
+                getter = operator.attrgetter(source_attrs[0])
+                self.properties.append((field.field_name, getter, field_converter(field)))
+                self.columns.append((field.field_name, None, None))
+                continue
+
+            lookup = model_lookup(self.model, source_attrs)
+            if lookup is None:
+                raise FastPathUnavailable(field.field_name)
+            self.add_lookup(lookup)
+            self.columns.append((field.field_name, lookup, field_converter(field)))
+
+    def add_lookup(self, lookup):
+        if lookup not in self.lookups:
+            self.lookups.append(lookup)
+
+    def values(self, queryset, extra_lookups=()):
+        """values() queryset carrying every lookup the fields need (plus e.g. ordering keys)"""
+        for lookup in extra_lookups:
+            self.add_lookup(lookup)
+        return queryset.values(*self.lookups)
+
+    def build(self, rows):
+        columns = self.columns
+        properties = self.properties
+        model = self.model
+        results = []
+        for row in rows:
+            computed = {}
+            if properties:
+                instance = model.__new__(model)
+                instance.__dict__.update(
+                    {lookup: value for lookup, value in row.items() if LOOKUP_SEP not in lookup}
+                )
+                for name, getter, converter in properties:
+                    value = getter(instance)
+                    computed[name] = value if value is None or converter is None else converter(value)
+
+            data = {}
+            for name, lookup, converter in columns:
+                if lookup is None:
+                    data[name] = computed[name]
+                    continue
+                value = row[lookup]
+                data[name] = value if value is None or converter is None else converter(value)
+            results.append(data)
+        return results
+
+
+def fast_list_enabled():
+    return getattr(settings, 'API_FAST_LIST_SERIALIZATION', True)
+
+
+class FastListMixin:
+    """
+    Serves the `list` action from values() rows when the serializer allows it.
+
+    Falls back to the regular list() whenever the serializer cannot be
+    compiled or API_FAST_LIST_SERIALIZATION is off.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if not fast_list_enabled():
+            return super().list(request, *args, **kwargs)
+        try:
+            builder = RowBuilder(self.get_serializer(many=True))
+        except FastPathUnavailable:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        ordering = [name.lstrip('-') for name in getattr(self.paginator, 'ordering', None) or ()]
+        rows = builder.values(queryset, extra_lookups=ordering)
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(builder.build(page))
+        return Response(builder.build(rows))
@@ -0,0 +1,107 @@
+"""
+Production server launcher.
+
+    python -m manage_system.server          # gunicorn, WSGI (SERVER_INTERFACE=wsgi)
+    python -m manage_system.server asgi     # uvicorn, ASGI
+
+Workers, threads, keepalive and timeouts come from environment variables (or
+.env), so containers are tuned without editing a command line:
+
+- HOST / PORT: bind address (default 0.0.0.0:8000)
+- WEB_CONCURRENCY: worker processes (default 2 x CPUs + 1 for WSGI, CPUs for ASGI)
+- SERVER_THREADS: threads per gunicorn worker (default 4); above 1 uses the gthread worker
+- SERVER_KEEPALIVE: seconds an idle client connection stays open (default 5)
+- SERVER_TIMEOUT: seconds before a silent gunicorn worker is restarted (default 30)
+- SERVER_GRACEFUL_TIMEOUT: seconds workers get to finish requests on shutdown (default 30)
+- SERVER_MAX_REQUESTS: requests before a worker is replaced, staggered by up to
+  SERVER_MAX_REQUESTS_JITTER (default 0, never). Replacing a worker drops its
+  keep-alive connections and resets its live feed counters.
+- SERVER_ACCESS_LOG: log every request to stdout (default True)
+
+Each worker process has its own database connections (or pool), dashboard
+cache and live feed counters; size DATABASE_POOL_MAX_SIZE accordingly.
+"""
+import os
+import sys
+import environ
+
+env = environ.Env()
+environ.Env.read_env()
+
+INTERFACES = ['wsgi', 'asgi']
+
+
+def default_workers(interface):
+    cpus = os.cpu_count() or 1
+    # Sync workers wait on the database; async workers overlap that themselves
+    return cpus * 2 + 1 if interface == 'wsgi' else cpus
+
+
+def gunicorn_options():
+    threads = env.int('SERVER_THREADS', default=4)
+    return {
+        'bind': f"{env('HOST', default='0.0.0.0')}:{env.int('PORT', default=8000)}",
+        'workers': env.int('WEB_CONCURRENCY', default=default_workers('wsgi')),
+        'threads': threads,
+        'worker_class': 'gthread' if threads > 1 else 'sync',
+        'keepalive': env.int('SERVER_KEEPALIVE', default=5),
+        'timeout': env.int('SERVER_TIMEOUT', default=30),
+        'graceful_timeout': env.int('SERVER_GRACEFUL_TIMEOUT', default=30),
+        'max_requests': env.int('SERVER_MAX_REQUESTS', default=0),
+        'max_requests_jitter': env.int('SERVER_MAX_REQUESTS_JITTER', default=0),
+        'accesslog': '-' if env.bool('SERVER_ACCESS_LOG', default=True) else None,
+        # Workers share the listening socket; the app is imported in each one
+        'preload_app': False,
+    }
+
+
+def uvicorn_options():
+    max_requests = env.int('SERVER_MAX_REQUESTS', default=0)
+    return {
+        'host': env('HOST', default='0.0.0.0'),
+        'port': env.int('PORT', default=8000),
+        'workers': env.int('WEB_CONCURRENCY', default=default_workers('asgi')),
+        'timeout_keep_alive': env.int('SERVER_KEEPALIVE', default=5),
+        'timeout_graceful_shutdown': env.int('SERVER_GRACEFUL_TIMEOUT', default=30),
+        # uvicorn has no jitter; the supervisor restarts workers that exit
+        'limit_max_requests': max_requests or None,
+        'access_log': env.bool('SERVER_ACCESS_LOG', default=True),
+        # Django does not implement the lifespan protocol
+        'lifespan': 'off',
+    }
+
+
+def run_gunicorn(options):
+    from gunicorn.app.base import BaseApplication
+    from gunicorn.util import import_app
+
+    class Application(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return import_app('manage_system.wsgi:application')
+
+    Application().run()
+
+
+def run_uvicorn(options):
+    import uvicorn
+    uvicorn.run('manage_system.asgi:application', **options)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    interface = argv[0] if argv else env('SERVER_INTERFACE', default='wsgi')
+    if interface not in INTERFACES:
+        sys.exit(f'usage: python -m manage_system.server [{"|".join(INTERFACES)}]')
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'manage_system.settings')
+    if interface == 'wsgi':
+        run_gunicorn(gunicorn_options())
+    else:
+        run_uvicorn(uvicorn_options())
+
+
+if __name__ == '__main__':
+    main()
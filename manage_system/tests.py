@@ -0,0 +1,699 @@
+import os
+import re
+from decimal import Decimal
+from datetime import date, time, timedelta
+from unittest import mock
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.db import OperationalError, connection, connections
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import NoReverseMatch, reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase
+from employees.models import Department, Employee
+from attendance.models import Attendance, AttendanceDailyRollup
+from performance.models import Performance, PerformanceMonthlyRollup
+from dashboard.cache import get_cache
+from . import serialization, server
+from .health import pool_stats
+from .profiling import QueryBudgetExceeded, clear_history
+from .serialization import FastJSONRenderer, RowBuilder
+
+# Tables that grow by employees x workdays / reviews and must never be scanned
+BIG_TABLES = ['attendance_attendance', 'performance_performance']
+
+
+def explain(sql):
+    """Return the query plan lines for a captured (already interpolated) statement"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            # Tiny test tables make seq scans cheap; force the planner to show index usability
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(f'EXPLAIN {sql}')
+            return [row[0] for row in cursor.fetchall()]
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def full_scans(plan):
+    """Big tables read without any index in a query plan"""
+    scanned = []
+    for line in plan:
+        for table in BIG_TABLES:
+            if connection.vendor == 'postgresql':
+                if re.search(rf'Seq Scan on {table}\b', line):
+                    scanned.append(table)
+            elif re.search(rf'\bSCAN {table}\b', line) and 'INDEX' not in line:
+                scanned.append(table)
+    return scanned
+
+
+class QueryPlanTests(APITestCase):
+    """Runs EXPLAIN on every query issued by the ViewSet actions"""
+
+    # (url name, url args, query params) for each action whose plan is checked;
+    # '{employee}' and '{department}' in params are replaced with the fixture ids
+    CASES = [
+        ('attendance-list', [], {'date': '2023-06-01'}),
+        ('attendance-list', [], {'date': '2023-06-01', 'status': 'late'}),
+        ('attendance-list', [], {'employee': '{employee}'}),
+        ('attendance-today', [], {}),
+        ('attendance-stats', [], {'start_date': '2023-06-01', 'end_date': '2023-06-30'}),
+        ('attendance-monthly-overview', [], {'year': 2023, 'month': 6}),
+        ('attendance-timeseries', [], {'start_date': '2023-01-01', 'end_date': '2023-12-31', 'bucket': 'month'}),
+        ('attendance-timeseries', [], {
+            'start_date': '2023-01-01', 'end_date': '2023-12-31', 'bucket': 'week', 'group_by': 'employee'
+        }),
+        ('performance-list', [], {'review_date': '2023-06-01'}),
+        ('performance-list', [], {'employee': '{employee}'}),
+        ('performance-overdue-reviews', [], {}),
+        ('performance-upcoming-reviews', [], {}),
+        ('performance-stats', [], {'start_date': '2023-01-01', 'end_date': '2023-12-31'}),
+        ('performance-rating-analysis', [], {'year': 2023}),
+        ('employee-list', [], {}),
+        ('employee-attendance', ['employee'], {}),
+        ('employee-performance', ['employee'], {}),
+        ('employee-attendance', ['employee'], {'start_date': '2023-06-01', 'end_date': '2023-06-30'}),
+        ('employee-summary', ['employee'], {'start_date': '2023-06-01', 'end_date': '2023-06-30'}),
+        ('department-detail', ['department'], {}),
+        ('department-stats', [], {}),
+        ('search', [], {'q': 'john'}),
+    ]
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.department = Department.objects.create(name='Engineering')
+        self.employee = Employee.objects.create(
+            name='John Doe', email='john@example.com', phone_number='1234567890',
+            address='123 Main St', date_of_joining='2023-01-01', department=self.department
+        )
+        today = timezone.now().date()
+        for day in [date(2023, 6, 1), date(2023, 6, 2), today]:
+            Attendance.objects.create(employee=self.employee, date=day, status='present')
+            Performance.objects.create(
+                employee=self.employee, rating=4, review_date=day,
+                next_review_date=day + timedelta(days=180)
+            )
+        self.url_args = {'employee': self.employee.pk, 'department': self.department.pk}
+
+    def test_actions_do_not_scan_big_tables(self):
+        failures = []
+        for url_name, arg_names, params in self.CASES:
+            url = reverse(url_name, args=[self.url_args[name] for name in arg_names])
+            params = {
+                name: value.format(**self.url_args) if isinstance(value, str) else value
+                for name, value in params.items()
+            }
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200, url_name)
+
+            for query in context.captured_queries:
+                sql = query['sql']
+                if not any(table in sql for table in BIG_TABLES) or not sql.startswith('SELECT'):
+                    continue
+                plan = explain(sql)
+                scanned = full_scans(plan)
+                if scanned:
+                    failures.append(
+                        f'{url_name} {params}: full scan of {scanned}\n  {sql}\n  ' + '\n  '.join(plan)
+                    )
+        self.assertFalse(failures, '\n\n'.join(failures))
+
+    def test_harness_detects_full_scan(self):
+        # notes is deliberately unindexed
+        sql = "SELECT id FROM attendance_attendance WHERE notes = 'x'"
+        self.assertEqual(full_scans(explain(sql)), ['attendance_attendance'])
+
+
+class QueryProfilingTests(APITestCase):
+    """Server-Timing headers, query budgets and the profile view"""
+
+    def setUp(self):
+        get_user_model().objects.create_user(username='testuser', password='testpass')
+        # Log in through the session so budgets see the real authentication queries
+        self.client.login(username='testuser', password='testpass')
+        self.objects = {}
+        for d in range(3):
+            department = Department.objects.create(name=f'Department {d}')
+            for e in range(3):
+                employee = Employee.objects.create(
+                    name=f'Employee {d}{e}', email=f'employee{d}{e}@example.com',
+                    phone_number='1234567890', address='123 Main St',
+                    date_of_joining='2023-01-01', department=department
+                )
+                for day in range(1, 4):
+                    attendance = Attendance.objects.create(
+                        employee=employee, date=date(2023, 6, day), status='present'
+                    )
+                    performance = Performance.objects.create(
+                        employee=employee, rating=4, review_date=date(2023, 6, day),
+                        next_review_date=date(2023, 12, day)
+                    )
+        self.objects = {
+            'department': department, 'employee': employee,
+            'attendance': attendance, 'performance': performance,
+        }
+        clear_history()
+
+    def url_for(self, url_name):
+        try:
+            return reverse(url_name)
+        except NoReverseMatch:
+            return reverse(url_name, args=[self.objects[url_name.split('-')[0]].pk])
+
+    def test_endpoints_within_budget(self):
+        config = {**settings.QUERY_PROFILING, 'BUDGET_ACTION': 'raise'}
+        with override_settings(QUERY_PROFILING=config):
+            for url_name in config['BUDGETS']:
+                response = self.client.get(self.url_for(url_name))
+                self.assertEqual(response.status_code, 200, url_name)
+
+    @override_settings(DEBUG=True)
+    def test_asgi_middleware_stack_stays_async(self):
+        # With DEBUG, Django logs every sync-only middleware it has to wrap in a thread
+        with self.assertNoLogs('django.request', 'DEBUG'):
+            ASGIHandler()
+
+    @override_settings(QUERY_PROFILING={'BUDGETS': {'employee-list': 1}, 'BUDGET_ACTION': 'raise'})
+    def test_budget_exceeded_raises(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(reverse('employee-list'))
+
+    @override_settings(QUERY_PROFILING={'BUDGETS': {'employee-list': 1}, 'BUDGET_ACTION': 'log'})
+    def test_budget_exceeded_logs(self):
+        with self.assertLogs('manage_system.profiling', 'WARNING') as logs:
+            response = self.client.get(reverse('employee-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('(employee-list) ran 5 queries, budget is 1', logs.output[0])
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('employee-list'))
+        timings = [entry.split(';')[0] for entry in response['Server-Timing'].split(', ')]
+        self.assertEqual(timings[:4], ['db', 'render', 'app', 'total'])
+        self.assertIn('desc="5 queries"', response['Server-Timing'])
+        self.assertIn('sql-1', timings)
+
+    @override_settings(QUERY_PROFILING={'ENABLED': False})
+    def test_disabled_profiling_adds_no_header(self):
+        response = self.client.get(reverse('employee-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(DEBUG=True)
+    def test_profile_view_ranks_endpoints(self):
+        for _ in range(3):
+            self.client.get(reverse('employee-list'))
+        self.client.get(reverse('attendance-today'))
+
+        response = self.client.get(reverse('query_profile'), {'sort': 'queries'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['requests'], 4)
+        endpoints = response.data['endpoints']
+        self.assertEqual([row['endpoint'] for row in endpoints], ['employee-list', 'attendance-today'])
+        self.assertEqual(endpoints[0]['requests'], 3)
+        self.assertEqual(endpoints[0]['p95_queries'], 5)
+        self.assertIn('p95_ms', endpoints[0])
+
+        self.client.delete(reverse('query_profile'))
+        self.assertEqual(self.client.get(reverse('query_profile')).data['requests'], 0)
+
+    def test_profile_view_is_debug_only(self):
+        response = self.client.get(reverse('query_profile'))
+        self.assertEqual(response.status_code, 404)
+
+
+class SparseFieldsetTests(APITestCase):
+    """`?fields=` / `?omit=` trim both the response and the columns queried"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.department = Department.objects.create(name='Engineering')
+        self.employee = Employee.objects.create(
+            name='John Doe', email='john@example.com', phone_number='1234567890',
+            address='123 Main St', date_of_joining='2023-01-01', department=self.department
+        )
+        self.attendance = Attendance.objects.create(
+            employee=self.employee, date=date(2023, 6, 1), status='present', notes='On time'
+        )
+        self.performance = Performance.objects.create(
+            employee=self.employee, rating=4, review_date=date(2023, 6, 1), comments='Great work'
+        )
+
+    def get(self, url_name, params, args=()):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse(url_name, args=args), params)
+        sql = '\n'.join(query['sql'] for query in context.captured_queries)
+        return response, sql
+
+    def test_fields_limits_response_and_columns(self):
+        response, sql = self.get('employee-list', {'fields': 'id,name,department_name'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data['results'], [{'id': self.employee.id, 'name': 'John Doe', 'department_name': 'Engineering'}]
+        )
+        self.assertNotIn('"employees_employee"."address"', sql)
+        self.assertNotIn('"employees_department"."description"', sql)
+        # attendance_rate was not requested, so its annotation is skipped
+        self.assertNotIn('attendance_attendance', sql)
+
+    def test_property_fields_load_their_columns(self):
+        response, sql = self.get('attendance-list', {'fields': 'id,working_hours,is_late'})
+        self.assertEqual(response.data['results'], [{'id': self.attendance.id, 'working_hours': None, 'is_late': False}])
+        self.assertIn('"attendance_attendance"."check_in_time"', sql)
+        self.assertNotIn('"attendance_attendance"."notes"', sql)
+        # Still joined for the default ordering, but no employee columns are loaded
+        self.assertNotIn('"employees_employee"."email"', sql)
+
+    def test_omit_defers_columns(self):
+        response, sql = self.get('performance-list', {'omit': 'comments,goals,achievements,areas_for_improvement'})
+        result = response.data['results'][0]
+        self.assertNotIn('comments', result)
+        self.assertEqual(result['employee_name'], 'John Doe')
+        self.assertEqual(result['rating_text'], 'Good')
+        self.assertNotIn('"performance_performance"."comments"', sql)
+        self.assertIn('"performance_performance"."rating"', sql)
+
+    def test_retrieve_with_nested_serializer(self):
+        response, sql = self.get('performance-detail', {'fields': 'id,employee'}, args=[self.performance.id])
+        self.assertEqual(set(response.data), {'id', 'employee'})
+        self.assertEqual(response.data['employee']['department_name'], 'Engineering')
+        self.assertNotIn('"performance_performance"."comments"', sql)
+
+    def test_department_without_stats(self):
+        response, sql = self.get('department-list', {'fields': 'id,name'})
+        self.assertEqual(response.data['results'], [{'id': self.department.id, 'name': 'Engineering'}])
+        self.assertNotIn('employees_employee', sql)
+
+    def test_cursor_pagination_keeps_ordering_columns(self):
+        Attendance.objects.create(employee=self.employee, date=date(2023, 6, 2), status='late')
+        response, _ = self.get('attendance-list', {'fields': 'id', 'pagination': 'cursor', 'page_size': 1})
+        with self.assertNumQueries(1):
+            next_page = self.client.get(response.data['next'])
+        self.assertEqual(next_page.data['results'], [{'id': self.attendance.id}])
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get(reverse('employee-list'), {'fields': 'name,salary_band'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('salary_band', str(response.data['fields']))
+
+
+class FastListSerializationTests(APITestCase):
+    """The values() list path must render the same bytes as the DRF serializers"""
+
+    CASES = [
+        ('employee-list', {}),
+        ('employee-list', {'fields': 'id,name,attendance_rate,years_of_service'}),
+        ('employee-list', {'omit': 'address', 'ordering': '-salary', 'search': 'o'}),
+        ('attendance-list', {}),
+        ('attendance-list', {'page_size': 2, 'page': 2}),
+        ('attendance-list', {'pagination': 'cursor', 'page_size': 2}),
+        ('attendance-list', {'fields': 'id,working_hours,is_late,department_name', 'count': 'none'}),
+        ('performance-list', {}),
+        ('performance-list', {'pagination': 'cursor', 'page_size': 1, 'rating': 4}),
+        ('performance-list', {'omit': 'comments,goals', 'count': 'capped'}),
+    ]
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        today = timezone.now().date()
+        departments = [
+            Department.objects.create(name='Engineering'),
+            Department.objects.create(name='Ventes \u2028 «Europe»'),
+        ]
+        for i, (name, salary, gender) in enumerate([
+            ('John "JD" Doe', '55000.50', 'M'),
+            ('Zoë 😀 Åkesson', None, ''),
+            ('Line\nBreak\u2029Name', '1234567.00', 'F'),
+        ]):
+            employee = Employee.objects.create(
+                name=name, email=f'employee{i}@example.com', phone_number='1234567890',
+                address=f'{i} Main St\nApt <{i}>', date_of_joining=date(2020, 2, 29) + timedelta(days=i),
+                department=departments[i % 2], gender=gender, salary=salary, is_active=i != 1
+            )
+            for day, status, check_in, check_out in [
+                (today, 'present', time(8, 59, 30), time(17, 20)),
+                (today - timedelta(days=1), 'late', time(9, 40), time(18, 0, 0, 250000)),
+                (today - timedelta(days=40), 'absent', None, None),
+            ]:
+                Attendance.objects.create(
+                    employee=employee, date=day, status=status, check_in_time=check_in,
+                    check_out_time=check_out, notes=None if i else 'Doctor\u2028s note'
+                )
+            Performance.objects.create(
+                employee=employee, rating=4 - i, review_date=today - timedelta(days=10 * i),
+                next_review_date=None if i else today - timedelta(days=1),
+                reviewer='Jane', comments=None if i else 'Très bien'
+            )
+
+    def fetch(self, url_name, params, fast):
+        with self.settings(API_FAST_LIST_SERIALIZATION=fast):
+            response = self.client.get(reverse(url_name), params)
+        self.assertEqual(response.status_code, 200)
+        return response.content
+
+    def assert_same_bytes(self):
+        for url_name, params in self.CASES:
+            with self.subTest(url_name=url_name, params=params):
+                expected = self.fetch(url_name, params, fast=False)
+                with mock.patch.object(RowBuilder, 'build', autospec=True, side_effect=RowBuilder.build) as build:
+                    actual = self.fetch(url_name, params, fast=True)
+                self.assertTrue(build.called, 'fast path was not used')
+                self.assertEqual(actual, expected)
+
+    def test_fast_list_matches_serializers_with_orjson(self):
+        if serialization.orjson is None:
+            self.skipTest('orjson is not installed')
+        self.assert_same_bytes()
+
+    def test_fast_list_matches_serializers_with_stdlib_json(self):
+        with mock.patch.object(serialization, 'orjson', None):
+            self.assert_same_bytes()
+
+    def test_cursor_links_match(self):
+        first = self.client.get(reverse('attendance-list'), {'pagination': 'cursor', 'page_size': 2})
+        with self.settings(API_FAST_LIST_SERIALIZATION=False):
+            slow_first = self.client.get(reverse('attendance-list'), {'pagination': 'cursor', 'page_size': 2})
+        self.assertEqual(first.data['next'], slow_first.data['next'])
+        self.assertEqual(self.client.get(first.data['next']).content, self.client.get(slow_first.data['next']).content)
+
+    def test_renderer_matches_stdlib_for_drf_types(self):
+        data = {
+            'when': timezone.now(), 'day': date(2024, 1, 2), 'at': time(9, 30, 0, 123456),
+            'amount': Decimal('1.10'), 'nested': [{1: None, 'x': 1.5}],
+            'text': 'a\u2028b\u2029c "é"',
+        }
+        renderer = FastJSONRenderer()
+        # orjson writes these without repr()'s exponent form
+        for extra in ({}, {'rate': 1e-05}, {'per_second': [2.7777777777777776e-07]}, {'big': {'x': -1e16}}):
+            with self.subTest(extra=extra):
+                with mock.patch.object(serialization, 'orjson', None):
+                    expected = renderer.render({**data, **extra})
+                self.assertEqual(renderer.render({**data, **extra}), expected)
+
+    def test_renderer_writes_non_finite_floats_as_null(self):
+        if serialization.orjson is None:
+            self.skipTest('orjson is not installed')
+        renderer = FastJSONRenderer()
+        with mock.patch.object(serialization, 'orjson', None), self.assertRaises(ValueError):
+            renderer.render({'value': float('nan')})
+        self.assertEqual(renderer.render({'value': float('nan'), 'limit': float('inf')}), b'{"value":null,"limit":null}')
+
+
+class ConditionalGetTests(APITestCase):
+    """ETag/Last-Modified validators and 304 responses on list and detail endpoints"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.department = Department.objects.create(name='Engineering')
+        self.employee = self.create_employee('John Doe', 'john@example.com')
+        self.other = self.create_employee('Jane Roe', 'jane@example.com', Department.objects.create(name='Sales'))
+
+    def create_employee(self, name, email, department=None):
+        return Employee.objects.create(
+            name=name, email=email, phone_number='1234567890', address='123 Main St',
+            date_of_joining='2023-01-01', department=department or self.department
+        )
+
+    def revalidate(self, url, etag, **params):
+        return self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+
+    def test_list_not_modified_before_fetching_page(self):
+        url = reverse('employee-list')
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('Last-Modified', first)
+        self.assertIn('no-cache', first['Cache-Control'])
+        # Only the probe runs: no COUNT, page query or serialization
+        with self.assertNumQueries(1):
+            second = self.revalidate(url, first['ETag'])
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertEqual(second.content, b'')
+
+    def test_list_etag_follows_updates_deletes_and_related_rows(self):
+        url = reverse('employee-list')
+        etags = [self.client.get(url)['ETag']]
+        for change in [
+            lambda: self.employee.save(),
+            lambda: self.other.delete(),
+            lambda: self.department.save(),
+            lambda: Attendance.objects.create(employee=self.employee, date=timezone.now().date(), status='present'),
+        ]:
+            change()
+            response = self.revalidate(url, etags[-1])
+            self.assertEqual(response.status_code, 200)
+            etags.append(response['ETag'])
+        self.assertEqual(len(set(etags)), len(etags))
+
+    def test_filtered_list_ignores_other_rows(self):
+        url = reverse('employee-list')
+        first = self.client.get(url, {'department': self.department.pk, 'fields': 'id,name'})
+        self.other.save()
+        response = self.revalidate(url, first['ETag'], department=self.department.pk, fields='id,name')
+        self.assertEqual(response.status_code, 304)
+
+    def test_detail_uses_its_own_row(self):
+        url = reverse('performance-detail', args=[
+            Performance.objects.create(employee=self.employee, rating=4, review_date=date(2023, 6, 1)).pk
+        ])
+        first = self.client.get(url)
+        Performance.objects.create(employee=self.other, rating=3, review_date=date(2023, 6, 1))
+        self.assertEqual(self.revalidate(url, first['ETag']).status_code, 304)
+        self.employee.save()
+        self.assertEqual(self.revalidate(url, first['ETag']).status_code, 200)
+
+    def test_missing_detail_is_404(self):
+        response = self.client.get(reverse('employee-detail', args=[0]), HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn('ETag', response)
+
+    def test_uncounted_lists_have_no_validators(self):
+        Attendance.objects.create(employee=self.employee, date=date(2023, 6, 1), status='present')
+        url = reverse('attendance-list')
+        self.assertIn('ETag', self.client.get(url))
+        self.assertNotIn('ETag', self.client.get(url, {'pagination': 'cursor'}))
+        self.assertNotIn('ETag', self.client.get(url, {'count': 'none'}))
+
+
+class EmployeeRollupSignalTests(APITestCase):
+    """The shared Employee receivers keep every rollup table current"""
+
+    def setUp(self):
+        self.engineering = Department.objects.create(name='Engineering')
+        self.sales = Department.objects.create(name='Sales')
+        self.employee = Employee.objects.create(
+            name='John Doe', email='john@example.com', phone_number='1234567890',
+            address='123 Main St', date_of_joining='2023-01-01', department=self.engineering
+        )
+        for day in (date(2023, 6, 1), date(2023, 6, 2)):
+            Attendance.objects.create(employee=self.employee, date=day, status='present')
+            Performance.objects.create(employee=self.employee, rating=4, review_date=day)
+
+    def queries_matching(self, context, pattern):
+        return [query['sql'] for query in context.captured_queries if re.search(pattern, query['sql'])]
+
+    def test_department_move_reads_previous_department_and_dates_once(self):
+        self.employee.department = self.sales
+        with CaptureQueriesContext(connection) as context:
+            self.employee.save()
+        self.assertEqual(len(self.queries_matching(context, r'^SELECT "employees_employee"\."department_id" AS "department_id"')), 1)
+        self.assertEqual(len(self.queries_matching(context, r'\bUNION\b')), 1)
+
+        self.assertEqual(
+            list(AttendanceDailyRollup.objects.values_list('department', 'total')),
+            [(self.sales.pk, 1), (self.sales.pk, 1)]
+        )
+        self.assertEqual(
+            list(PerformanceMonthlyRollup.objects.values_list('department', 'total_reviews')),
+            [(self.sales.pk, 2)]
+        )
+
+    def test_employee_delete_reads_dates_once(self):
+        with CaptureQueriesContext(connection) as context:
+            self.employee.delete()
+        self.assertEqual(len(self.queries_matching(context, r'\bUNION\b')), 1)
+        self.assertFalse(AttendanceDailyRollup.objects.exists())
+        self.assertFalse(PerformanceMonthlyRollup.objects.exists())
+
+
+class BatchTests(APITestCase):
+    """POST /api/v1/batch/: GET sub-requests answered in one response"""
+
+    def setUp(self):
+        get_cache().clear()
+        self.user = get_user_model().objects.create_user(username='testuser', password='testpass')
+        self.client.login(username='testuser', password='testpass')
+        department = Department.objects.create(name='Engineering')
+        for i in range(3):
+            employee = Employee.objects.create(
+                name=f'Employee {i}', email=f'employee{i}@example.com', phone_number='1234567890',
+                address='123 Main St', date_of_joining='2023-01-01', department=department
+            )
+            Attendance.objects.create(employee=employee, date=timezone.now().date(), status='present')
+        self.url = reverse('batch')
+
+    def batch(self, *paths, client=None, **extra):
+        requests = [{'id': f'r{index}', 'path': path} for index, path in enumerate(paths)]
+        response = (client or self.client).post(self.url, {'requests': requests}, format='json', **extra)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['responses']
+
+    def test_responses_match_direct_requests(self):
+        paths = ['/dashboard/api/attendance-chart/', '/api/v1/attendance/?ordering=-date&page_size=10']
+        responses = self.batch(*paths)
+        self.assertEqual([response['id'] for response in responses], ['r0', 'r1'])
+        for path, response in zip(paths, responses):
+            self.assertEqual(response['status'], 200)
+            self.assertEqual(response['body'], self.client.get(path).json())
+
+    def test_sub_requests_reuse_authentication(self):
+        path = reverse('employee-list')
+        with CaptureQueriesContext(connection) as direct:
+            self.client.get(path)
+        # The session and user are looked up once for the whole batch
+        with self.assertNumQueries(2 * len(direct.captured_queries) - 2):
+            self.batch(path, path)
+
+    def test_token_authentication(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user).key}')
+        [response] = self.batch(reverse('employee-list'), client=client)
+        self.assertEqual((response['status'], response['body']['count']), (200, 3))
+
+    def test_views_apply_their_own_permissions(self):
+        chart, employees = self.batch(reverse('dashboard_stats'), reverse('employee-list'), client=APIClient())
+        self.assertEqual(chart['status'], 200)
+        self.assertEqual(employees['status'], 401)
+
+    def test_batch_validators_do_not_apply_to_sub_requests(self):
+        [response] = self.batch(reverse('employee-list'), HTTP_IF_NONE_MATCH='*')
+        self.assertEqual((response['status'], response['body']['count']), (200, 3))
+
+    def test_unbatchable_routes(self):
+        missing, profile, export, detail = self.batch(
+            '/nowhere/', reverse('query_profile'), reverse('employee-export'),
+            reverse('employee-detail', args=[0])
+        )
+        self.assertEqual(missing['status'], 404)
+        self.assertEqual(profile['status'], 400)
+        self.assertEqual(export['status'], 406)
+        self.assertEqual(detail['status'], 404)
+
+    @override_settings(BATCH={'MAX_REQUESTS': 2})
+    def test_invalid_batches(self):
+        for requests in ([], [{'path': 'https://example.com/api/v1/employees/'}], [{'path': '/healthz'}] * 3):
+            response = self.client.post(self.url, {'requests': requests}, format='json')
+            self.assertEqual(response.status_code, 400, requests)
+
+
+@override_settings(BATCH={'MAX_WORKERS': 2})
+class ParallelBatchTests(TransactionTestCase):
+    """Committed data so the batch pool's connections can see it"""
+
+    def setUp(self):
+        get_cache().clear()
+        get_user_model().objects.create_user(username='testuser', password='testpass')
+        self.client = APIClient()
+        self.client.login(username='testuser', password='testpass')
+        department = Department.objects.create(name='Engineering')
+        Employee.objects.create(
+            name='Employee', email='employee@example.com', phone_number='1234567890',
+            address='123 Main St', date_of_joining='2023-01-01', department=department
+        )
+
+    def test_parallel_matches_sequential(self):
+        requests = [{'path': reverse(name)} for name in ('employee-list', 'department-list', 'dashboard_stats')]
+        results = [
+            self.client.post(reverse('batch'), {'requests': requests, 'parallel': parallel}, format='json').json()
+            for parallel in (False, True)
+        ]
+        self.assertEqual(results[0], results[1])
+        self.assertEqual([response['status'] for response in results[1]['responses']], [200, 200, 200])
+
+
+class HealthCheckTests(APITestCase):
+    """/healthz database check and pool saturation"""
+
+    POOL_STATS = {'pool_min': 2, 'pool_max': 4, 'pool_size': 4, 'pool_available': 0, 'requests_num': 120}
+
+    def patch_pool(self, stats):
+        pool = mock.Mock(**{'get_stats.return_value': stats})
+        return mock.patch.object(
+            type(connections['default']), 'pool', new_callable=mock.PropertyMock, create=True, return_value=pool
+        )
+
+    def test_ok_without_pool(self):
+        response = self.client.get(reverse('healthz'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'max-age=0, no-cache, no-store, must-revalidate, private')
+        data = response.json()
+        self.assertEqual(data['status'], 'ok')
+        self.assertIn('latency_ms', data['database'])
+        self.assertEqual(data['database']['conn_max_age'], connection.settings_dict['CONN_MAX_AGE'])
+        self.assertNotIn('pool', data['database'])
+
+    def test_pool_stats(self):
+        self.assertEqual(pool_stats(mock.Mock(**{'get_stats.return_value': self.POOL_STATS})), {
+            'min_size': 2, 'max_size': 4, 'size': 4, 'available': 0, 'in_use': 4, 'saturation': 1.0,
+            'requests_waiting': 0, 'requests': 120, 'requests_queued': 0, 'requests_wait_ms': 0,
+            'requests_failed': 0,
+        })
+
+    def test_saturated_pool_is_degraded(self):
+        with self.patch_pool({**self.POOL_STATS, 'requests_waiting': 3}):
+            response = self.client.get(reverse('healthz'))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['status'], 'degraded')
+        self.assertEqual(data['database']['pool']['requests_waiting'], 3)
+        self.assertNotIn('conn_max_age', data['database'])
+
+    def test_database_down(self):
+        with mock.patch.object(connections['default'], 'cursor', side_effect=OperationalError('connection refused')):
+            response = self.client.get(reverse('healthz'))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['status'], 'unavailable')
+        self.assertEqual(response.json()['database']['error'], 'connection refused')
+
+
+class ServerOptionsTests(SimpleTestCase):
+    """Launcher options read from the environment"""
+
+    def options(self, builder, **environ):
+        with mock.patch.dict(os.environ, environ), mock.patch.object(server.os, 'cpu_count', return_value=2):
+            for name in ['WEB_CONCURRENCY', 'SERVER_THREADS', 'SERVER_MAX_REQUESTS', 'PORT']:
+                if name not in environ:
+                    os.environ.pop(name, None)
+            return builder()
+
+    def test_gunicorn_defaults(self):
+        options = self.options(server.gunicorn_options)
+        self.assertEqual(options['workers'], 5)
+        self.assertEqual(options['worker_class'], 'gthread')
+        self.assertEqual(options['bind'].rsplit(':', 1)[1], '8000')
+        self.assertEqual(options['max_requests'], 0)
+
+    def test_gunicorn_from_environment(self):
+        options = self.options(
+            server.gunicorn_options, WEB_CONCURRENCY='3', SERVER_THREADS='1', SERVER_KEEPALIVE='75', PORT='9000'
+        )
+        self.assertEqual(options['workers'], 3)
+        self.assertEqual(options['threads'], 1)
+        self.assertEqual(options['worker_class'], 'sync')
+        self.assertEqual(options['keepalive'], 75)
+        self.assertEqual(options['bind'].rsplit(':', 1)[1], '9000')
+
+    def test_uvicorn_options(self):
+        options = self.options(server.uvicorn_options)
+        self.assertEqual(options['workers'], 2)
+        self.assertIsNone(options['limit_max_requests'])
+        self.assertEqual(options['lifespan'], 'off')
+        self.assertEqual(self.options(server.uvicorn_options, SERVER_MAX_REQUESTS='500')['limit_max_requests'], 500)
@@ -23,6 +23,9 @@ from django.shortcuts import redirect
 from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
+from .batch import batch
+from .health import health_check
+from .profiling import query_profile
 
 # Swagger schema view
 schema_view = get_schema_view(
@@ -44,6 +47,7 @@ def redirect_to_dashboard(request):
 
 urlpatterns = [
     path('', redirect_to_dashboard, name='home'),
+    path('healthz', health_check, name='healthz'),
     path('admin/', admin.site.urls),
     
     # Dashboard URLs
@@ -53,6 +57,10 @@ urlpatterns = [
     path('api/v1/', include('employees.urls')),
     path('api/v1/', include('attendance.urls')),
     path('api/v1/', include('performance.urls')),
+    path('api/v1/', include('search.urls')),
+    path('api/v1/', include('changes.urls')),
+    path('api/v1/batch/', batch, name='batch'),
+    path('api/v1/_profile/', query_profile, name='query_profile'),
     
     # Swagger URLs
     path('swagger<format>/', schema_view.without_ui(cache_timeout=0), name='schema-json'),
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from performance.rollups import rebuild_rollups
+from datetime import datetime
+
+
+class Command(BaseCommand):
+    help = 'Backfill the monthly performance rollup table from raw performance reviews'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--start',
+            help='Rebuild rollups from the month of this date (YYYY-MM-DD) onwards (default: earliest review)'
+        )
+
+    def handle(self, *args, **options):
+        start_date = None
+        if options['start']:
+            try:
+                start_date = datetime.strptime(options['start'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('--start must be a date in YYYY-MM-DD format')
+
+        written = rebuild_rollups(start_date=start_date)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt {written} performance rollup rows')
+        )
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.3 on 2026-10-18 08:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employees", "0002_tune_indexes"),
+        ("performance", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="performance",
+            name="performance_employe_46ef83_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="performance",
+            name="performance_review__10a908_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="performance",
+            name="performance_rating_294d36_idx",
+        ),
+        migrations.AddIndex(
+            model_name="performance",
+            index=models.Index(
+                fields=["review_date", "rating"], name="performance_date_rating_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="performance",
+            index=models.Index(
+                fields=["next_review_date"], name="performance_next_review_idx"
+            ),
+        ),
+    ]
@@ -1,6 +1,6 @@
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
-from employees.models import Employee
+from employees.models import Department, Employee
 
 
 class Performance(models.Model):
@@ -35,9 +35,8 @@ class Performance(models.Model):
     class Meta:
         ordering = ['-review_date', 'employee__name']
         indexes = [
-            models.Index(fields=['employee']),
-            models.Index(fields=['review_date']),
-            models.Index(fields=['rating']),
+            models.Index(fields=['review_date', 'rating'], name='performance_date_rating_idx'),
+            models.Index(fields=['next_review_date'], name='performance_next_review_idx'),
         ]
 
     def __str__(self):
@@ -55,3 +54,44 @@ class Performance(models.Model):
         if self.next_review_date:
             return self.next_review_date < timezone.now().date()
         return False
+
+
+class PerformanceMonthlyRollup(models.Model):
+    """Per-month, per-department review totals maintained from Performance"""
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    department = models.ForeignKey(
+        Department,
+        on_delete=models.CASCADE,
+        related_name='performance_rollups'
+    )
+    total_reviews = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-year', '-month', 'department__name']
+        unique_together = ['year', 'month', 'department']
+
+    def __str__(self):
+        return f"{self.department.name} - {self.year}-{self.month:02d} - {self.total_reviews} reviews"
+
+    @property
+    def average_rating(self):
+        if not self.total_reviews:
+            return 0
+        return self.rating_sum / self.total_reviews
+
+
+class PerformanceRollupCoverage(models.Model):
+    """Earliest month from which PerformanceMonthlyRollup rows are known to be complete"""
+    start_date = models.DateField()
+    rebuilt_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Rollups complete from {self.start_date:%Y-%m}"
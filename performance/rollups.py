@@ -0,0 +1,84 @@
+from datetime import date
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+from manage_system.rollups import Rollup, register
+from .models import Performance, PerformanceMonthlyRollup, PerformanceRollupCoverage
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def next_month_start(year, month):
+    if month == 12:
+        return date(year + 1, 1, 1)
+    return date(year, month + 1, 1)
+
+
+class PerformanceRollup(Rollup):
+    """
+    Monthly, per-department review totals.
+
+    There is at most one row per department and month, so rebuilds aggregate
+    in a single grouped query.
+    """
+    source = Performance
+    date_field = 'review_date'
+    model = PerformanceMonthlyRollup
+    coverage_model = PerformanceRollupCoverage
+    period_fields = ('year', 'month')
+    fields = [
+        'total_reviews', 'rating_sum',
+        'rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5',
+    ]
+    # Each month is a date range, so keep the OR of ranges small
+    refresh_chunk_size = 100
+
+    def aggregates(self):
+        aggregates = {
+            'total_reviews': Count('id'),
+            'rating_sum': Sum('rating'),
+        }
+        for rating, _ in Performance.RATING_CHOICES:
+            aggregates[f'rating_{rating}'] = Count('id', filter=Q(rating=rating))
+        return aggregates
+
+    def group(self, queryset):
+        return queryset.values(
+            'employee__department_id',
+            review_year=ExtractYear('review_date'),
+            review_month=ExtractMonth('review_date'),
+        )
+
+    def build(self, row):
+        return PerformanceMonthlyRollup(
+            year=row['review_year'],
+            month=row['review_month'],
+            department_id=row['employee__department_id'],
+            **{field: row[field] or 0 for field in self.fields},
+        )
+
+    def period_of(self, day):
+        return (day.year, day.month)
+
+    def in_periods(self, periods):
+        in_months = Q()
+        for year, month in periods:
+            in_months |= Q(
+                review_date__gte=date(year, month, 1),
+                review_date__lt=next_month_start(year, month)
+            )
+        return in_months
+
+    def periods_from(self, start_date):
+        return Q(year__gt=start_date.year) | Q(year=start_date.year, month__gte=start_date.month)
+
+    def period_start(self, day):
+        return month_start(day)
+
+
+performance_rollup = register(PerformanceRollup())
+ROLLUP_FIELDS = performance_rollup.fields
+refresh_rollups = performance_rollup.refresh
+rebuild_rollups = performance_rollup.rebuild
+rollups_cover = performance_rollup.covers
@@ -13,6 +13,21 @@ class PerformanceSerializer(serializers.ModelSerializer):
         model = Performance
         fields = '__all__'
         read_only_fields = ('created_at', 'updated_at')
+        field_dependencies = {
+            'rating_text': ['rating'],
+            'is_overdue': ['next_review_date'],
+        }
+
+
+class TopPerformerSerializer(serializers.ModelSerializer):
+    """Compact review summary for the top performers list"""
+    employee_name = serializers.CharField(source='employee.name', read_only=True)
+    department_name = serializers.CharField(source='employee.department.name', read_only=True)
+
+    class Meta:
+        model = Performance
+        fields = ['id', 'employee', 'employee_name', 'department_name', 'rating', 'review_date']
+        read_only_fields = fields
 
 
 class PerformanceDetailSerializer(serializers.ModelSerializer):
@@ -23,4 +38,8 @@ class PerformanceDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = Performance
         fields = '__all__'
-        read_only_fields = ('created_at', 'updated_at') 
\ No newline at end of file
+        read_only_fields = ('created_at', 'updated_at')
+        field_dependencies = {
+            'rating_text': ['rating'],
+            'is_overdue': ['next_review_date'],
+        } 
\ No newline at end of file
@@ -0,0 +1,37 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from employees.models import Department, Employee
+from .models import Performance
+from .rollups import refresh_rollups
+
+
+@receiver(pre_save, sender=Performance)
+def remember_previous_rollup_key(sender, instance, raw=False, **kwargs):
+    """Record the (review_date, department) an existing review counted towards before it changes"""
+    instance._previous_rollup_key = None
+    if raw or instance.pk is None:
+        return
+    instance._previous_rollup_key = Performance.objects.filter(
+        pk=instance.pk
+    ).values_list('review_date', 'employee__department_id').first()
+
+
+@receiver(post_save, sender=Performance)
+def update_rollup_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    keys = {(instance.review_date, instance.employee.department_id)}
+    previous_key = getattr(instance, '_previous_rollup_key', None)
+    if previous_key:
+        keys.add(previous_key)
+    refresh_rollups(keys)
+
+
+@receiver(post_delete, sender=Performance)
+def update_rollup_on_delete(sender, instance, origin=None, **kwargs):
+    # Cascades from Employee/Department deletes are handled once per origin
+    # by the Employee receivers in manage_system.rollups
+    if isinstance(origin, (Employee, Department)):
+        return
+    refresh_rollups([(instance.review_date, instance.employee.department_id)])
+
@@ -1,9 +1,13 @@
+from datetime import date
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
 from employees.models import Employee, Department
-from .models import Performance
+from .models import Performance, PerformanceMonthlyRollup
+from .rollups import rebuild_rollups
 from django.contrib.auth import get_user_model
 
 # Create your tests here.
@@ -35,3 +39,101 @@ class PerformanceAPITests(APITestCase):
         response = self.client.post(url, data)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(Performance.objects.count(), 2)
+
+
+class PerformanceAnalysisTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.engineering = Department.objects.create(name='Engineering')
+        self.sales = Department.objects.create(name='Sales')
+        self.employees = [
+            Employee.objects.create(
+                name=f'Employee {i}', email=f'employee{i}@example.com', phone_number='1234567890',
+                address='123 Main St', date_of_joining='2023-01-01',
+                department=self.engineering if i % 2 else self.sales
+            )
+            for i in range(4)
+        ]
+        for i, employee in enumerate(self.employees):
+            Performance.objects.create(employee=employee, rating=5 - i, review_date=date(2023, 3, 10))
+            Performance.objects.create(employee=employee, rating=4, review_date=date(2023, 7, 1 + i))
+
+    def rating_analysis(self):
+        response = self.client.get(reverse('performance-rating-analysis'), {'year': 2023})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_rating_analysis_monthly_stats(self):
+        with self.assertNumQueries(3):
+            data = self.rating_analysis()
+        monthly = {row['month']: row for row in data['monthly_stats']}
+        self.assertEqual(len(monthly), 12)
+        self.assertEqual(monthly[3], {'month': 3, 'average_rating': 3.5, 'total_reviews': 4})
+        self.assertEqual(monthly[7], {'month': 7, 'average_rating': 4.0, 'total_reviews': 4})
+        self.assertEqual(monthly[1], {'month': 1, 'average_rating': 0, 'total_reviews': 0})
+
+    def test_rating_analysis_reads_rollups_once_rebuilt(self):
+        expected = self.rating_analysis()
+        rebuild_rollups()
+        self.assertEqual(PerformanceMonthlyRollup.objects.count(), 4)
+        with CaptureQueriesContext(connection) as context:
+            data = self.rating_analysis()
+        self.assertFalse(any(
+            '"performance_performance"' in query['sql'] for query in context.captured_queries
+        ))
+        self.assertEqual(data['monthly_stats'], expected['monthly_stats'])
+        self.assertEqual(
+            [(row['employee__department__name'], row['avg_rating'], row['total_reviews'])
+             for row in data['department_ratings']],
+            [(row['employee__department__name'], row['avg_rating'], row['total_reviews'])
+             for row in expected['department_ratings']]
+        )
+
+    def test_rollups_follow_review_changes(self):
+        rollup = lambda department, month: PerformanceMonthlyRollup.objects.get(
+            year=2023, month=month, department=department
+        )
+        review = Performance.objects.create(
+            employee=self.employees[1], rating=1, review_date=date(2023, 3, 20)
+        )
+        self.assertEqual(rollup(self.engineering, 3).total_reviews, 3)
+        self.assertEqual(rollup(self.engineering, 3).rating_1, 1)
+
+        review.review_date = date(2023, 8, 1)
+        review.save()
+        self.assertEqual(rollup(self.engineering, 3).total_reviews, 2)
+        self.assertEqual(rollup(self.engineering, 8).rating_sum, 1)
+
+        review.delete()
+        self.assertFalse(PerformanceMonthlyRollup.objects.filter(month=8).exists())
+
+        self.employees[1].department = self.sales
+        self.employees[1].save()
+        self.assertEqual(rollup(self.sales, 3).total_reviews, 3)
+        self.assertEqual(rollup(self.engineering, 3).total_reviews, 1)
+
+    def test_stats_top_performers_are_paginated(self):
+        response = self.client.get(reverse('performance-stats'), {
+            'start_date': '2023-01-01', 'end_date': '2023-12-31', 'top_page_size': 3
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        top = response.data['top_performers']
+        self.assertEqual(response.data['overall_stats']['top_performers_count'], 6)
+        self.assertEqual(top['count'], 6)
+        self.assertEqual(len(top['results']), 3)
+        self.assertIn('top_page=2', top['next'])
+        self.assertEqual(top['results'][0]['rating'], 5)
+        self.assertEqual(
+            set(top['results'][0]),
+            {'id', 'employee', 'employee_name', 'department_name', 'rating', 'review_date'}
+        )
+
+    def test_stats_top_performers_count_ignores_count_mode(self):
+        for mode in ('none', 'capped'):
+            response = self.client.get(reverse('performance-stats'), {
+                'start_date': '2023-01-01', 'end_date': '2023-12-31', 'top_page_size': 3, 'count': mode
+            })
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data['overall_stats']['top_performers_count'], 6)
+            self.assertEqual(response.data['top_performers']['count'], 6)
@@ -3,14 +3,35 @@ from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Avg, Count, Q
+from django.db.models import Avg, Count, Q, Sum
+from django.db.models.functions import TruncMonth
 from django.utils import timezone
-from datetime import datetime, timedelta
-from .models import Performance
-from .serializers import PerformanceSerializer, PerformanceDetailSerializer
+from datetime import date, datetime, timedelta
+from .models import Performance, PerformanceMonthlyRollup
+from attendance.models import Attendance
+from .rollups import rollups_cover
+from .serializers import PerformanceSerializer, PerformanceDetailSerializer, TopPerformerSerializer
+from manage_system.conditional import ConditionalGetMixin
+from manage_system.exports import ExportMixin
+from manage_system.fieldsets import SparseFieldsetMixin
+from manage_system.serialization import FastListMixin
+from manage_system.pagination import PaginationModeMixin, StandardPagination
 
 
-class PerformanceViewSet(viewsets.ModelViewSet):
+class TopPerformerPagination(StandardPagination):
+    """Pages through the top performers embedded in the stats response"""
+    page_size = 10
+    page_query_param = 'top_page'
+    page_size_query_param = 'top_page_size'
+    max_page_size = 100
+
+    def get_count_mode(self, request):
+        # The count is reported as overall_stats.top_performers_count, so it is
+        # always exact; ?count= selects the mode of list endpoints only
+        return 'exact'
+
+
+class PerformanceViewSet(ConditionalGetMixin, FastListMixin, SparseFieldsetMixin, PaginationModeMixin, ExportMixin, viewsets.ModelViewSet):
     """ViewSet for Performance model with CRUD operations"""
     queryset = Performance.objects.select_related('employee', 'employee__department').all()
     serializer_class = PerformanceSerializer
@@ -19,6 +40,34 @@ class PerformanceViewSet(viewsets.ModelViewSet):
     search_fields = ['employee__name', 'employee__department__name', 'reviewer']
     ordering_fields = ['review_date', 'rating', 'employee__name']
     ordering = ['-review_date', 'employee__name']
+    cursor_ordering = ['-review_date', 'id']
+    export_fields = {
+        'id': 'id',
+        'employee': 'employee_id',
+        'employee_name': 'employee__name',
+        'department_name': 'employee__department__name',
+        'rating': 'rating',
+        'review_date': 'review_date',
+        'reviewer': 'reviewer',
+        'comments': 'comments',
+        'goals': 'goals',
+        'achievements': 'achievements',
+        'areas_for_improvement': 'areas_for_improvement',
+        'next_review_date': 'next_review_date',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+    }
+    last_modified_fields = ['updated_at', 'employee__updated_at', 'employee__department__updated_at']
+
+    def get_conditional_probes(self, queryset):
+        probes = super().get_conditional_probes(queryset)
+        if self.action == 'retrieve' and self.wants_field('employee'):
+            # The nested employee renders attendance_rate
+            probes.append((
+                Attendance.objects.current_month().filter(employee__in=queryset.values('employee')),
+                ['updated_at']
+            ))
+        return probes
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -62,11 +111,10 @@ class PerformanceViewSet(viewsets.ModelViewSet):
             end_date = today
 
         # Filter performances by date range
-        performances = self.queryset.filter(review_date__range=[start_date, end_date])
+        performances = Performance.objects.filter(review_date__range=[start_date, end_date])
         
         # Calculate overall statistics
-        total_reviews = performances.count()
-        avg_rating = performances.aggregate(avg_rating=Avg('rating'))['avg_rating'] or 0
+        overall = performances.aggregate(total_reviews=Count('id'), avg_rating=Avg('rating'))
         
         # Rating distribution
         rating_distribution = performances.values('rating').annotate(
@@ -77,11 +125,20 @@ class PerformanceViewSet(viewsets.ModelViewSet):
         dept_stats = performances.values('employee__department__name').annotate(
             total_reviews=Count('id'),
             avg_rating=Avg('rating')
-        )
+        ).order_by('employee__department__name')
         
-        # Top performers (rating >= 4)
-        top_performers = performances.filter(rating__gte=4).select_related('employee')
-        top_performers_data = PerformanceSerializer(top_performers, many=True).data
+        # Top performers (rating >= 4), best and most recent first, one page at a time
+        top_performers = performances.filter(rating__gte=4).select_related(
+            'employee', 'employee__department'
+        ).only(
+            'id', 'rating', 'review_date',
+            'employee__id', 'employee__name', 'employee__department__name'
+        ).order_by('-rating', '-review_date', 'id')
+        paginator = TopPerformerPagination()
+        page = paginator.paginate_queryset(top_performers, request, view=self)
+        top_performers_data = paginator.get_paginated_response(
+            TopPerformerSerializer(page, many=True).data
+        ).data
         
         return Response({
             'date_range': {
@@ -89,9 +146,9 @@ class PerformanceViewSet(viewsets.ModelViewSet):
                 'end_date': end_date
             },
             'overall_stats': {
-                'total_reviews': total_reviews,
-                'average_rating': round(avg_rating, 2),
-                'top_performers_count': top_performers.count()
+                'total_reviews': overall['total_reviews'],
+                'average_rating': round(overall['avg_rating'] or 0, 2),
+                'top_performers_count': top_performers_data['count']
             },
             'rating_distribution': rating_distribution,
             'department_stats': dept_stats,
@@ -101,34 +158,69 @@ class PerformanceViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def rating_analysis(self, request):
         """Get detailed rating analysis for charts"""
-        year = request.query_params.get('year', timezone.now().year)
-        
-        # Get performances for the specified year
-        performances = self.queryset.filter(
-            review_date__year=year
-        )
-        
-        # Monthly rating averages
+        year = int(request.query_params.get('year', timezone.now().year))
+        year_start, next_year_start = date(year, 1, 1), date(year + 1, 1, 1)
+
+        if rollups_cover(year_start):
+            monthly_rows, dept_ratings = self.rollup_rating_analysis(year)
+        else:
+            performances = Performance.objects.filter(
+                review_date__gte=year_start, review_date__lt=next_year_start
+            )
+            monthly_rows = {
+                row['review_month'].month: row
+                for row in performances.annotate(
+                    review_month=TruncMonth('review_date')
+                ).order_by().values('review_month').annotate(
+                    avg_rating=Avg('rating'),
+                    total_reviews=Count('id')
+                )
+            }
+
+            # Department-wise average ratings
+            dept_ratings = performances.values('employee__department__name').annotate(
+                avg_rating=Avg('rating'),
+                total_reviews=Count('id')
+            ).order_by('employee__department__name')
+
+        # Monthly rating averages, with empty months filled in
         monthly_stats = []
         for month in range(1, 13):
-            month_performances = performances.filter(review_date__month=month)
-            avg_rating = month_performances.aggregate(
-                avg_rating=Avg('rating')
-            )['avg_rating'] or 0
+            row = monthly_rows.get(month, {})
             monthly_stats.append({
                 'month': month,
-                'average_rating': round(avg_rating, 2),
-                'total_reviews': month_performances.count()
+                'average_rating': round(row.get('avg_rating') or 0, 2),
+                'total_reviews': row.get('total_reviews', 0)
             })
         
-        # Department-wise average ratings
-        dept_ratings = performances.values('employee__department__name').annotate(
-            avg_rating=Avg('rating'),
-            total_reviews=Count('id')
-        )
-        
         return Response({
             'year': year,
             'monthly_stats': monthly_stats,
             'department_ratings': dept_ratings
         })
+
+    def rollup_rating_analysis(self, year):
+        """Monthly and department-wise rating averages read from the monthly rollup table"""
+        rollups = PerformanceMonthlyRollup.objects.filter(year=year)
+        monthly_rows = {
+            row['month']: {
+                'avg_rating': row['rating_sum'] / row['total_reviews'],
+                'total_reviews': row['total_reviews']
+            }
+            for row in rollups.order_by().values('month').annotate(
+                rating_sum=Sum('rating_sum'),
+                total_reviews=Sum('total_reviews')
+            )
+        }
+        dept_ratings = [
+            {
+                'employee__department__name': row['department__name'],
+                'avg_rating': row['rating_sum'] / row['total_reviews'],
+                'total_reviews': row['total_reviews']
+            }
+            for row in rollups.values('department__name').annotate(
+                rating_sum=Sum('rating_sum'),
+                total_reviews=Sum('total_reviews')
+            ).order_by('department__name')
+        ]
+        return monthly_rows, dept_ratings
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+"""
+Load test `manage.py runserver` against the production launcher, locally.
+
+Starts both servers from this checkout on --runserver-port and --server-port
+with the current environment (.env, DATABASE_URL, ...), waits for /healthz
+on each, runs scripts/loadtest.py against every --path on both and stops
+them again. Launcher tuning (WEB_CONCURRENCY, SERVER_THREADS, ...) is read
+from the environment as usual.
+
+    # Dashboard JSON, a page and a hashed static file; measure queries, not the cache
+    DEBUG=False DASHBOARD_CACHE_TIMEOUT=0 python scripts/compare_servers.py \\
+        --path /dashboard/api/stats/ --path /dashboard/ --path /static/live.js
+
+Run `python manage.py collectstatic` first when DEBUG is off.
+"""
+import argparse
+import http.client
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import loadtest
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def start(command, env):
+    # A file rather than a pipe: runserver logs every request to stderr
+    log = tempfile.TemporaryFile(mode='w+')
+    process = subprocess.Popen(
+        command, cwd=BASE_DIR, env={**os.environ, **env}, stdout=subprocess.DEVNULL, stderr=log
+    )
+    process.log = log
+    return process
+
+
+def wait_until_ready(process, port, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            process.log.seek(0)
+            raise RuntimeError(f'server on port {port} exited:\n{process.log.read()}')
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+        try:
+            connection.request('GET', '/healthz')
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        finally:
+            connection.close()
+        time.sleep(0.2)
+    raise RuntimeError(f'server on port {port} not ready after {timeout} seconds')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--path', action='append', metavar='PATH',
+                        help='Path to load test on both servers; repeatable (default: /dashboard/api/stats/)')
+    parser.add_argument('--interface', choices=['wsgi', 'asgi'], default='wsgi',
+                        help='Launcher interface: gunicorn (wsgi) or uvicorn (asgi) (default: wsgi)')
+    parser.add_argument('--runserver-port', type=int, default=8100, help='Port for runserver (default: 8100)')
+    parser.add_argument('--server-port', type=int, default=8101, help='Port for the launcher (default: 8101)')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent connections (default: 16)')
+    parser.add_argument('--requests', type=int, default=1000, help='Requests per target (default: 1000)')
+    parser.add_argument('--startup-timeout', type=float, default=30,
+                        help='Seconds to wait for each server to answer /healthz (default: 30)')
+    args = parser.parse_args(argv)
+
+    servers = [
+        ('runserver', args.runserver_port, start(
+            [sys.executable, 'manage.py', 'runserver', '--noreload', f'127.0.0.1:{args.runserver_port}'], {}
+        )),
+        (args.interface, args.server_port, start(
+            [sys.executable, '-m', 'manage_system.server', args.interface],
+            {'HOST': '127.0.0.1', 'PORT': str(args.server_port), 'SERVER_ACCESS_LOG': 'False'}
+        )),
+    ]
+    try:
+        for _, port, process in servers:
+            wait_until_ready(process, port, args.startup_timeout)
+        failed = 0
+        for path in args.path or ['/dashboard/api/stats/']:
+            print(f'\n{path}')
+            failed |= loadtest.main([
+                *(f'{label}=http://127.0.0.1:{port}{path}' for label, port, _ in servers),
+                '--concurrency', str(args.concurrency), '--requests', str(args.requests),
+            ])
+        return failed
+    finally:
+        for _, _, process in servers:
+            process.terminate()
+        for _, _, process in servers:
+            process.wait()
+            process.log.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+"""
+Concurrent HTTP load test for comparing deployments of the same endpoints.
+
+Each target is fetched by --concurrency client threads, each keeping one
+keep-alive connection, until --requests responses have been received; the
+report lists throughput and latency percentiles per target. Only the
+standard library is used, so it runs from any machine.
+
+    # WSGI and ASGI servers side by side (see "Serving over ASGI" in the README)
+    python scripts/loadtest.py \\
+        wsgi=http://127.0.0.1:8000/dashboard/api/stats/ \\
+        asgi=http://127.0.0.1:8001/dashboard/api/async/stats/ \\
+        --concurrency 32 --requests 2000
+
+    # Connection reuse: the same endpoint on servers started with CONN_MAX_AGE=0,
+    # the default persistent connections and DATABASE_POOL=True (see the README)
+    python scripts/loadtest.py \\
+        fresh=http://127.0.0.1:8000/dashboard/api/stats/ \\
+        persistent=http://127.0.0.1:8001/dashboard/api/stats/ \\
+        pooled=http://127.0.0.1:8002/dashboard/api/stats/
+
+Targets after the first also show their p50 relative to the first target's.
+"""
+import argparse
+import http.client
+import math
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def parse_target(value):
+    label, separator, url = value.partition('=')
+    if not separator:
+        label, url = value, value
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        raise argparse.ArgumentTypeError(f'Not an http(s) URL: {url}')
+    return label, parts
+
+
+def connect(parts, timeout):
+    connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+    return connection_class(parts.hostname, parts.port, timeout=timeout)
+
+
+def run(parts, concurrency, total, timeout, headers):
+    """Issue `total` GET requests over `concurrency` connections; returns (latencies, errors, elapsed)"""
+    path = parts.path or '/'
+    if parts.query:
+        path = f'{path}?{parts.query}'
+    latencies = []
+    errors = []
+    remaining = [total]
+    lock = threading.Lock()
+
+    def worker():
+        connection = connect(parts, timeout)
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    break
+                remaining[0] -= 1
+            start = time.perf_counter()
+            try:
+                connection.request('GET', path, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                failed = response.status >= 400 and f'HTTP {response.status}'
+            except (OSError, http.client.HTTPException) as exc:
+                failed = type(exc).__name__
+                connection.close()
+                connection = connect(parts, timeout)
+            duration = (time.perf_counter() - start) * 1000
+            with lock:
+                if failed:
+                    errors.append(failed)
+                else:
+                    latencies.append(duration)
+        connection.close()
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors, time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('targets', nargs='+', type=parse_target, metavar='[LABEL=]URL')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent connections (default: 16)')
+    parser.add_argument('--requests', type=int, default=1000, help='Requests per target (default: 1000)')
+    parser.add_argument('--warmup', type=int, default=50, help='Untimed requests per target first (default: 50)')
+    parser.add_argument('--timeout', type=float, default=30, help='Socket timeout in seconds (default: 30)')
+    parser.add_argument('--header', action='append', default=[], metavar='NAME:VALUE',
+                        help='Extra request header, e.g. "Authorization: Token ..."; repeatable')
+    args = parser.parse_args(argv)
+
+    headers = {}
+    for header in args.header:
+        name, _, value = header.partition(':')
+        headers[name.strip()] = value.strip()
+
+    print(f'{args.requests} requests per target, {args.concurrency} concurrent connections')
+    failed = False
+    baseline = None
+    for label, parts in args.targets:
+        if args.warmup:
+            run(parts, min(args.concurrency, args.warmup), args.warmup, args.timeout, headers)
+        latencies, errors, elapsed = run(parts, args.concurrency, args.requests, args.timeout, headers)
+        if not latencies:
+            print(f'{label:>12}: all {len(errors)} requests failed ({errors[0]})')
+            failed = True
+            continue
+        p50 = percentile(latencies, 50)
+        comparison = f', p50 {p50 / baseline[1]:.2f}x {baseline[0]}' if baseline else ''
+        baseline = baseline or (label, p50)
+        print(
+            f'{label:>12}: {len(latencies) / elapsed:8.1f} req/s, '
+            f'p50 {p50:7.1f} ms, p95 {percentile(latencies, 95):7.1f} ms, '
+            f'p99 {percentile(latencies, 99):7.1f} ms, max {max(latencies):7.1f} ms, '
+            f'{len(errors)} errors{comparison}'
+        )
+        failed = failed or bool(errors)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
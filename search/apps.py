@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+class SearchConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "search"
+
+    def ready(self):
+        from .backends import repair_fts_indexes
+        post_migrate.connect(repair_fts_indexes, sender=self, dispatch_uid='search_repair_fts_indexes')
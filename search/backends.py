@@ -0,0 +1,254 @@
+"""
+Ranked full-text search over employees and performance reviews.
+
+- PostgresSearchBackend matches a stored, GIN-indexed tsvector column
+  (generated from the SearchVector expressions below, so ranking reads it
+  instead of re-parsing the text) and ranks with SearchRank; employee
+  names also match on pg_trgm similarity (GIN trigram index), so typos
+  and fragments still hit.
+- SqliteSearchBackend queries FTS5 external-content tables, kept in sync
+  with the source tables by triggers, and ranks with bm25().
+- LikeSearchBackend is the `icontains` matching DRF's SearchFilter does: no
+  index and no ranking. It serves other databases and is the benchmark
+  baseline.
+
+Every backend returns [(pk, rank)] pairs, best match first.
+"""
+import operator
+import re
+from functools import reduce
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    SearchVectorField,
+    TrigramSimilarity,
+)
+from django.db import connection, connections
+from django.db.models import Expression, Q
+from django.db.models.functions import Greatest
+
+# Text search configurations baked into the stored search documents;
+# changing one needs a migration regenerating the column
+EMPLOYEE_CONFIG = 'simple'
+PERFORMANCE_CONFIG = 'english'
+
+EMPLOYEE_FIELDS = ['name', 'email']
+PERFORMANCE_FIELDS = ['comments', 'goals', 'achievements']
+
+
+def get_search_settings():
+    return {
+        'BACKEND': 'auto',
+        'MAX_RESULTS': 100,
+        **getattr(settings, 'SEARCH', {}),
+    }
+
+
+def query_words(query):
+    return re.findall(r'[^\W_]+', query)
+
+
+def prefix_query(query, config):
+    """A tsquery requiring every word of the query as a prefix, like the SQLite backend"""
+    return SearchQuery(
+        ' & '.join(f'{word}:*' for word in query_words(query)), search_type='raw', config=config
+    )
+
+
+def employee_vector():
+    """Expression the PostgreSQL search document of employees is generated from"""
+    return (
+        SearchVector('name', weight='A', config=EMPLOYEE_CONFIG)
+        + SearchVector('email', weight='B', config=EMPLOYEE_CONFIG)
+    )
+
+
+def performance_vector():
+    """Expression the PostgreSQL search document of reviews is generated from"""
+    return SearchVector(*PERFORMANCE_FIELDS, config=PERFORMANCE_CONFIG)
+
+
+DOCUMENT_COLUMN = 'search_document'
+
+
+class SearchDocument(Expression):
+    """
+    The generated tsvector column search migration 0001 adds on PostgreSQL.
+
+    It is not a model field, so the ORM never selects or writes it.
+    """
+    output_field = SearchVectorField()
+
+    def as_sql(self, compiler, connection):
+        alias = compiler.query.get_initial_alias()
+        return f'{compiler.quote_name_unless_alias(alias)}.{connection.ops.quote_name(DOCUMENT_COLUMN)}', []
+
+
+class LikeSearchBackend:
+    """Every term must appear somewhere in the fields, as with SearchFilter"""
+    name = 'like'
+
+    def matches(self, queryset, fields, query, limit):
+        terms = query.split()
+        if not terms:
+            return []
+        condition = reduce(operator.and_, (
+            reduce(operator.or_, (Q(**{f'{field}__icontains': term}) for field in fields))
+            for term in terms
+        ))
+        return [(pk, 0.0) for pk in queryset.filter(condition).values_list('pk', flat=True)[:limit]]
+
+    def search_employees(self, query, limit):
+        from employees.models import Employee
+        return self.matches(Employee.objects.all(), EMPLOYEE_FIELDS, query, limit)
+
+    def search_performance(self, query, limit):
+        from performance.models import Performance
+        return self.matches(Performance.objects.all(), PERFORMANCE_FIELDS, query, limit)
+
+
+class PostgresSearchBackend:
+    name = 'postgres'
+
+    def search_employees(self, query, limit):
+        from employees.models import Employee
+        if not query_words(query):
+            return []
+        search_query = prefix_query(query, EMPLOYEE_CONFIG)
+        queryset = Employee.objects.alias(document=SearchDocument()).annotate(
+            rank=Greatest(SearchRank(SearchDocument(), search_query), TrigramSimilarity('name', query)),
+        ).filter(
+            # `%` can use the trigram index; its cut-off is pg_trgm.similarity_threshold (0.3)
+            Q(document=search_query) | Q(name__trigram_similar=query)
+        )
+        return list(queryset.order_by('-rank', 'pk').values_list('pk', 'rank')[:limit])
+
+    def search_performance(self, query, limit):
+        from performance.models import Performance
+        if not query_words(query):
+            return []
+        search_query = prefix_query(query, PERFORMANCE_CONFIG)
+        queryset = Performance.objects.alias(document=SearchDocument()).annotate(
+            rank=SearchRank(SearchDocument(), search_query),
+        ).filter(document=search_query)
+        return list(queryset.order_by('-rank', 'pk').values_list('pk', 'rank')[:limit])
+
+
+class FtsIndex:
+    """An FTS5 external-content table mirroring text columns of a model's table"""
+
+    def __init__(self, name, source, columns, weights):
+        self.name = name
+        self.source = source
+        self.columns = columns
+        self.weights = weights
+
+    @property
+    def triggers(self):
+        return [f'{self.name}_insert', f'{self.name}_delete', f'{self.name}_update']
+
+    def install_sql(self):
+        columns = ', '.join(self.columns)
+        new = ', '.join(f'new.{column}' for column in self.columns)
+        old = ', '.join(f'old.{column}' for column in self.columns)
+        insert_trigger, delete_trigger, update_trigger = self.triggers
+        return [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.name} USING fts5("
+            f"{columns}, content='{self.source}', content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+            f"CREATE TRIGGER IF NOT EXISTS {insert_trigger} AFTER INSERT ON {self.source} BEGIN "
+            f"INSERT INTO {self.name}(rowid, {columns}) VALUES (new.id, {new}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {delete_trigger} AFTER DELETE ON {self.source} BEGIN "
+            f"INSERT INTO {self.name}({self.name}, rowid, {columns}) VALUES ('delete', old.id, {old}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {update_trigger} AFTER UPDATE OF {columns} ON {self.source} BEGIN "
+            f"INSERT INTO {self.name}({self.name}, rowid, {columns}) VALUES ('delete', old.id, {old}); "
+            f"INSERT INTO {self.name}(rowid, {columns}) VALUES (new.id, {new}); END",
+            f"INSERT INTO {self.name}({self.name}) VALUES ('rebuild')",
+        ]
+
+    def drop_sql(self):
+        return [f'DROP TRIGGER IF EXISTS {trigger}' for trigger in self.triggers] + [
+            f'DROP TABLE IF EXISTS {self.name}'
+        ]
+
+    def search(self, match, limit):
+        weights = ', '.join(str(weight) for weight in self.weights)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid, -bm25({self.name}, {weights}) AS score FROM {self.name} '
+                f'WHERE {self.name} MATCH %s ORDER BY score DESC, rowid LIMIT %s',
+                [match, limit]
+            )
+            return cursor.fetchall()
+
+
+FTS_INDEXES = {
+    'employees': FtsIndex('search_employee_fts', 'employees_employee', EMPLOYEE_FIELDS, [10.0, 5.0]),
+    'performance': FtsIndex('search_performance_fts', 'performance_performance', PERFORMANCE_FIELDS, [1.0, 1.0, 1.0]),
+}
+
+
+def fts_match(query):
+    """An FTS5 MATCH expression requiring every word of the query as a prefix"""
+    return ' '.join(f'"{word}"*' for word in query_words(query))
+
+
+def install_fts_indexes(schema_editor):
+    for index in FTS_INDEXES.values():
+        for sql in index.install_sql():
+            schema_editor.execute(sql)
+
+
+def drop_fts_indexes(schema_editor):
+    for index in FTS_INDEXES.values():
+        for sql in index.drop_sql():
+            schema_editor.execute(sql)
+
+
+def repair_fts_indexes(using, **kwargs):
+    """
+    Recreate sync triggers dropped by a migration and reindex (post_migrate).
+
+    SQLite migrations that alter employees_employee or performance_performance
+    rebuild the table, which drops its triggers.
+    """
+    if connections[using].vendor != 'sqlite':
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE name LIKE %s", ['search_%'])
+        existing = {name for name, in cursor.fetchall()}
+        for index in FTS_INDEXES.values():
+            # No table means the search migration is not applied
+            if index.name in existing and not existing.issuperset(index.triggers):
+                for sql in index.install_sql():
+                    cursor.execute(sql)
+
+
+class SqliteSearchBackend:
+    name = 'sqlite-fts5'
+
+    def search_employees(self, query, limit):
+        match = fts_match(query)
+        return FTS_INDEXES['employees'].search(match, limit) if match else []
+
+    def search_performance(self, query, limit):
+        match = fts_match(query)
+        return FTS_INDEXES['performance'].search(match, limit) if match else []
+
+
+BACKENDS = {
+    'postgres': PostgresSearchBackend,
+    'sqlite': SqliteSearchBackend,
+    'like': LikeSearchBackend,
+}
+AUTO_BACKENDS = {'postgresql': 'postgres', 'sqlite': 'sqlite'}
+
+
+def get_backend(name=None):
+    """The configured backend, or the best one for the database when it is 'auto'"""
+    name = name or get_search_settings()['BACKEND']
+    if name == 'auto':
+        name = AUTO_BACKENDS.get(connection.vendor, 'like')
+    return BACKENDS[name]()
@@ -0,0 +1,75 @@
+from django.core.management.base import BaseCommand, CommandError
+from employees.models import Employee
+from search.backends import get_backend
+import time
+
+REVIEW_QUERIES = ['leadership', 'communication skills', 'completed project on time']
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the unindexed icontains (ILIKE) search with the full-text search '
+        'backend for this database on employee and performance review queries. '
+        'Seed first, e.g. `python manage.py seed_data --employees 5000`.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=20,
+            help='Number of timed runs per query and backend (default: 20)'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=20,
+            help='Results per search, as with ?limit= on /api/v1/search/ (default: 20)'
+        )
+        parser.add_argument(
+            '--query',
+            action='append',
+            help='Search text to time against both employees and reviews; repeatable '
+                 '(default: a few employee names and review phrases)'
+        )
+        parser.add_argument(
+            '--backend',
+            choices=['auto', 'postgres', 'sqlite'],
+            default='auto',
+            help='Full-text backend to compare against ILIKE (default: auto)'
+        )
+
+    def handle(self, *args, **options):
+        baseline = get_backend('like')
+        backend = get_backend(options['backend'])
+        if backend.name == baseline.name:
+            raise CommandError('No full-text backend for this database; nothing to compare.')
+
+        if options['query']:
+            cases = [(kind, query) for query in options['query'] for kind in ('employees', 'performance')]
+        else:
+            names = Employee.objects.order_by('pk').values_list('name', flat=True)[:2]
+            cases = [('employees', name.split()[0]) for name in names]
+            cases += [('employees', name) for name in names]
+            cases += [('performance', query) for query in REVIEW_QUERIES]
+        if not cases:
+            raise CommandError('No employees found; seed the database first.')
+
+        self.stdout.write(f'{backend.name} vs ILIKE, limit {options["limit"]}')
+        for kind, query in cases:
+            self.stdout.write(f'{kind}: "{query}"')
+            baseline_median = None
+            for implementation in (baseline, backend):
+                search = getattr(implementation, f'search_{kind}')
+                timings = []
+                for _ in range(options['iterations']):
+                    started = time.perf_counter()
+                    results = search(query, options['limit'])
+                    timings.append((time.perf_counter() - started) * 1000)
+                timings.sort()
+                median = timings[len(timings) // 2]
+                baseline_median = baseline_median or median
+                self.stdout.write(
+                    f'  {implementation.name:>12}: median {median:8.2f} ms, '
+                    f'min {timings[0]:8.2f} ms, {baseline_median / median:6.2f}x, {len(results)} results'
+                )
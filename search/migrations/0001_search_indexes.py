@@ -0,0 +1,80 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+from django.db.models.sql import Query
+from search.backends import (
+    DOCUMENT_COLUMN,
+    drop_fts_indexes,
+    employee_vector,
+    install_fts_indexes,
+    performance_vector,
+)
+
+
+def search_documents(apps):
+    # (model, expression the stored document is generated from, GIN index name)
+    return [
+        (apps.get_model("employees", "Employee"), employee_vector(), "employee_search_idx"),
+        (apps.get_model("performance", "Performance"), performance_vector(), "performance_search_idx"),
+    ]
+
+
+def trigram_index(apps):
+    return (
+        apps.get_model("employees", "Employee"),
+        GinIndex(OpClass("name", name="gin_trgm_ops"), name="employee_name_trgm_idx"),
+    )
+
+
+def expression_sql(schema_editor, model, expression):
+    """Inline SQL for an expression over unqualified columns of the model's table"""
+    query = Query(model, alias_cols=False)
+    compiler = query.get_compiler(connection=schema_editor.connection)
+    sql, params = expression.resolve_expression(query, allow_joins=False).as_sql(
+        compiler, schema_editor.connection
+    )
+    return sql % tuple(schema_editor.quote_value(param) for param in params)
+
+
+def create_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    quote = schema_editor.quote_name
+    if vendor == "postgresql":
+        for model, expression, index in search_documents(apps):
+            table = quote(model._meta.db_table)
+            schema_editor.execute(
+                f"ALTER TABLE {table} ADD COLUMN {quote(DOCUMENT_COLUMN)} tsvector "
+                f"GENERATED ALWAYS AS ({expression_sql(schema_editor, model, expression)}) STORED"
+            )
+            schema_editor.execute(f"CREATE INDEX {quote(index)} ON {table} USING gin ({quote(DOCUMENT_COLUMN)})")
+        schema_editor.add_index(*trigram_index(apps))
+    elif vendor == "sqlite":
+        install_fts_indexes(schema_editor)
+
+
+def drop_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    quote = schema_editor.quote_name
+    if vendor == "postgresql":
+        schema_editor.remove_index(*trigram_index(apps))
+        for model, _, _ in search_documents(apps):
+            # Dropping the column drops its index too
+            schema_editor.execute(
+                f"ALTER TABLE {quote(model._meta.db_table)} DROP COLUMN {quote(DOCUMENT_COLUMN)}"
+            )
+    elif vendor == "sqlite":
+        drop_fts_indexes(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employees", "0003_department_late_after"),
+        ("performance", "0003_performance_rollups"),
+    ]
+
+    operations = [
+        # No-op on databases other than PostgreSQL
+        TrigramExtension(),
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,17 @@
+from rest_framework import serializers
+from .backends import get_search_settings
+
+SEARCH_TYPES = ['employees', 'performance']
+
+
+class SearchQuerySerializer(serializers.Serializer):
+    """Query parameters of the search endpoint"""
+    q = serializers.CharField(required=False, allow_blank=True, default='', max_length=200)
+    type = serializers.ChoiceField(choices=SEARCH_TYPES, required=False)
+    limit = serializers.IntegerField(required=False, default=20, min_value=1)
+
+    def validate_limit(self, value):
+        max_results = get_search_settings()['MAX_RESULTS']
+        if value > max_results:
+            raise serializers.ValidationError(f'Ensure this value is less than or equal to {max_results}.')
+        return value
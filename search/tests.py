@@ -0,0 +1,90 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from unittest import skipUnless
+from employees.models import Department, Employee
+from performance.models import Performance
+from .backends import FTS_INDEXES, get_backend, repair_fts_indexes
+
+
+class SearchTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.department = Department.objects.create(name='Engineering')
+        self.jane = self.create_employee('Jane Smith', 'jane@example.com')
+        self.john = self.create_employee('John Janeway', 'jj@example.com')
+        self.review = Performance.objects.create(
+            employee=self.jane, rating=5, review_date='2024-01-15',
+            comments='Excellent leadership during the migration', goals='Mentor junior developers'
+        )
+        Performance.objects.create(
+            employee=self.john, rating=3, review_date='2024-01-15', comments='Consistent performer'
+        )
+
+    def create_employee(self, name, email):
+        return Employee.objects.create(
+            name=name, email=email, phone_number='1234567890', address='123 Main St',
+            date_of_joining='2023-01-01', department=self.department
+        )
+
+    def search(self, **params):
+        response = self.client.get(reverse('search'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_employees_ranked_by_match(self):
+        data = self.search(q='jane', type='employees')
+        self.assertEqual(list(data['results']), ['employees'])
+        employees = data['results']['employees']
+        # Both match; the exact first name ranks above the prefix of a surname
+        self.assertEqual([row['id'] for row in employees], [self.jane.pk, self.john.pk])
+        self.assertEqual(employees[0]['department_name'], 'Engineering')
+        self.assertGreaterEqual(employees[0]['rank'], employees[1]['rank'])
+
+    def test_review_text_search(self):
+        data = self.search(q='mentor leadership', type='performance')
+        reviews = data['results']['performance']
+        self.assertEqual([row['id'] for row in reviews], [self.review.pk])
+        self.assertEqual(reviews[0]['employee_name'], 'Jane Smith')
+
+    def test_blank_query_returns_nothing(self):
+        data = self.search()
+        self.assertEqual(data['results'], {'employees': [], 'performance': []})
+
+    def test_invalid_params(self):
+        url = reverse('search')
+        self.assertEqual(self.client.get(url, {'q': 'jane', 'type': 'departments'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'q': 'jane', 'limit': 1000}).status_code, 400)
+
+    def test_limit(self):
+        self.assertEqual(len(self.search(q='jane', type='employees', limit=1)['results']['employees']), 1)
+
+    def test_index_follows_updates_and_deletes(self):
+        Performance.objects.filter(pk=self.review.pk).update(comments='Outstanding accessibility work')
+        self.assertEqual(
+            [row['id'] for row in self.search(q='accessibility')['results']['performance']], [self.review.pk]
+        )
+        self.assertEqual(self.search(q='leadership')['results']['performance'], [])
+        self.jane.delete()
+        self.assertEqual(self.search(q='accessibility')['results']['performance'], [])
+
+    def test_like_backend_matches_every_term(self):
+        backend = get_backend('like')
+        self.assertEqual(
+            [pk for pk, _ in backend.search_employees('jane example', 10)], [self.jane.pk, self.john.pk]
+        )
+        self.assertEqual(backend.search_performance('junior leadership', 10), [(self.review.pk, 0.0)])
+
+    @skipUnless(connection.vendor == 'sqlite', 'FTS5 index is SQLite-only')
+    def test_repair_recreates_dropped_triggers(self):
+        index = FTS_INDEXES['employees']
+        with connection.cursor() as cursor:
+            for trigger in index.triggers:
+                cursor.execute(f'DROP TRIGGER {trigger}')
+        self.create_employee('Xavier Quill', 'xq@example.com')
+        self.assertEqual(self.search(q='xavier')['results']['employees'], [])
+
+        repair_fts_indexes(using='default')
+        self.assertEqual(len(self.search(q='xavier')['results']['employees']), 1)
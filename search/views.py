@@ -0,0 +1,54 @@
+from django.db.models import F
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from employees.models import Employee
+from performance.models import Performance
+from .backends import get_backend
+from .serializers import SEARCH_TYPES, SearchQuerySerializer
+
+
+def ranked_rows(queryset, ranked, fields, **expressions):
+    """values() rows for the ranked primary keys, in rank order and carrying the rank"""
+    positions = {pk: position for position, (pk, _) in enumerate(ranked)}
+    ranks = dict(ranked)
+    rows = list(queryset.filter(pk__in=positions).values(*fields, **expressions))
+    for row in rows:
+        row['rank'] = ranks[row['id']]
+    rows.sort(key=lambda row: positions[row['id']])
+    return rows
+
+
+class SearchView(APIView):
+    """
+    Ranked full-text search over employees and performance reviews.
+
+    `q` is the search text. `type` (`employees` or `performance`) limits the
+    search to one kind of result and `limit` caps each list (default 20).
+    Employees match on name and email; reviews on comments, goals and
+    achievements.
+    """
+
+    def get(self, request):
+        params = SearchQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        query = params.validated_data
+        text, limit = query['q'].strip(), query['limit']
+        backend = get_backend()
+
+        results = {}
+        for kind in [query['type']] if query.get('type') else SEARCH_TYPES:
+            if not text:
+                results[kind] = []
+            elif kind == 'employees':
+                results[kind] = ranked_rows(
+                    Employee.objects.all(), backend.search_employees(text, limit),
+                    ['id', 'name', 'email', 'department', 'is_active'],
+                    department_name=F('department__name'),
+                )
+            else:
+                results[kind] = ranked_rows(
+                    Performance.objects.all(), backend.search_performance(text, limit),
+                    ['id', 'employee', 'review_date', 'rating', 'reviewer'],
+                    employee_name=F('employee__name'),
+                )
+        return Response({'query': text, 'backend': backend.name, 'results': results})